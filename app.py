@@ -45,7 +45,7 @@ def main():
 
         # Tab 1: Requirements Input
         with tab1:
-            requirements_ui.display_requirements_section()
+            requirements_ui.display_requirements_section(openai_config)
 
         # Tab 2: Test Cases
         with tab2:
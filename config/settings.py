@@ -24,7 +24,89 @@ DEFAULT_TIMEOUT = 30  # seconds
 
 # OpenAI API settings
 OPENAI_MODELS = ["gpt-4o-mini", "gpt-4.1-mini", "o3-mini"]
-MAX_TOKENS = 10000
+MAX_TOKENS = 10000  # upper bound for max_completion_tokens of a request
+MIN_COMPLETION_TOKENS = 2048
+COMPLETION_TOKEN_HEADROOM = 2.0  # expected output x headroom (reasoning models think first)
+
+# OpenAI rate limits (set to your organization's quota for the selected models)
+OPENAI_REQUESTS_PER_MINUTE = int(os.environ.get("OPENAI_REQUESTS_PER_MINUTE", 500))
+OPENAI_TOKENS_PER_MINUTE = int(os.environ.get("OPENAI_TOKENS_PER_MINUTE", 200000))
+OPENAI_MAX_RETRIES = 6
+OPENAI_RETRY_BASE_DELAY = 1.0  # seconds
+OPENAI_RETRY_MAX_DELAY = 60.0  # seconds
+
+# OpenAI HTTP connection pool (shared by all sessions using the same API key)
+OPENAI_POOL_MAX_CONNECTIONS = 32  # matches MAX_GENERATION_CONCURRENCY
+OPENAI_POOL_MAX_KEEPALIVE = 16
+OPENAI_POOL_KEEPALIVE_EXPIRY = 120.0  # seconds an idle connection is kept open
+OPENAI_REQUEST_TIMEOUT = 600.0  # seconds
+OPENAI_CONNECT_TIMEOUT = 10.0  # seconds
+
+# Test case generation settings
+DEFAULT_GENERATION_CONCURRENCY = 8  # requests in flight at once (1 = sequential)
+MAX_GENERATION_CONCURRENCY = 32
+PROMPT_TEMPLATE_VERSION = "5"  # bump whenever the generation prompt changes
+EST_TOKENS_PER_TEST_CASE = 350  # rough completion size of one test case
+STREAMING_ENABLED = True  # show test cases while they are being generated
+
+# Test case output format requested from the model:
+#   standard   - free-form JSON with full field names
+#   compact    - short keys and bounded lists, expanded locally
+#   structured - compact keys enforced by a strict JSON schema (structured outputs)
+OUTPUT_FORMATS = ["standard", "compact", "structured"]
+DEFAULT_OUTPUT_FORMAT = "standard"
+
+# Packed requests (several short requirements per API call)
+PACK_MAX_REQUIREMENTS = 10
+PACK_MAX_DESCRIPTION_TOKENS = 200  # longer requirements always get their own request
+PACK_TOKEN_BUDGET = 12000  # prompt + expected completion tokens per packed request
+
+# Long requirements (e.g. pasted policy excerpts) are split into chunks of at
+# most this many estimated tokens, generated separately and merged
+CHUNK_MAX_TOKENS = 2000
+
+# Near-duplicate requirements (generated once and shared by the whole group)
+DEDUP_ENABLED = True
+DEDUP_SIMILARITY_THRESHOLD = 0.75  # Jaccard similarity of word shingles
+DEDUP_SHINGLE_SIZE = 2  # words per shingle
+DEDUP_NUM_PERM = 128  # MinHash permutations
+
+# Fair sharing of generation capacity between sessions using the same API key
+GLOBAL_GENERATION_CONCURRENCY = 16  # units of work in flight across all sessions
+FAIR_SHARE_INTERACTIVE_WEIGHT = 2  # turns per round for runs started from the UI
+FAIR_SHARE_BACKGROUND_WEIGHT = 1  # turns per round for background generation
+FAIR_SHARE_IDLE_AFTER = 600  # seconds an unused queue of an API key is kept
+
+# Background generation when requirements are loaded (opt-in)
+PREFETCH_ENABLED = False
+PREFETCH_CONCURRENCY = 4  # requests in flight at once, leaves room for interactive runs
+PREFETCH_STOP_TIMEOUT = 120.0  # seconds to let in-flight requests finish when a run starts
+
+# Offline test case templates ('prefer' tries them before the API,
+# 'fallback' only when the API fails)
+TEMPLATE_MODES = ["fallback", "prefer", "off"]
+DEFAULT_TEMPLATE_MODE = "fallback"
+
+# Generated test case cache settings
+CACHE_ENABLED = True
+CACHE_DIR = os.environ.get("AI_TESTING_TOOL_CACHE_DIR", os.path.join(BASE_DIR, ".cache"))
+CACHE_MAX_ENTRIES = 50000
+CACHE_MAX_AGE_DAYS = 30
+
+# Reuse of test cases generated for similar past requirements
+RETRIEVAL_ENABLED = False  # opt-in: a lexical match can still miss antonyms the polarity check does not know
+RETRIEVAL_SIMILARITY_THRESHOLD = 0.8  # TF-IDF cosine similarity of requirement texts
+RETRIEVAL_CANDIDATES = 5  # best BM25 matches checked against the threshold
+RETRIEVAL_MAX_DOCUMENTS = 50000
+
+# Generation run journals (used to resume interrupted runs)
+RUNS_DIR = os.environ.get("AI_TESTING_TOOL_RUNS_DIR", os.path.join(BASE_DIR, ".runs"))
+RUNS_KEEP = 20  # number of most recent run journals to keep
+RUNS_RESUME_IDLE_AFTER = 120  # seconds without journal writes before a run is offered for resuming
+
+# Generation telemetry
+TELEMETRY_LOG_FILE = os.environ.get("AI_TESTING_TOOL_TELEMETRY_LOG") or None  # JSON Lines, optional
+TELEMETRY_SLOWEST_COUNT = 5  # slowest requirements shown in the summary
 
 # UI settings
 MAIN_HEADER_COLOR = "#FF8C00"  # Dark orange
@@ -41,4 +123,36 @@ DEFAULT_FILENAME_PDF = "test_report.pdf"
 
 # SSH connection settings
 SSH_DEFAULT_PORT = 22
-SSH_TIMEOUT = 20  # seconds
\ No newline at end of file
+SSH_TIMEOUT = 20  # seconds
+
+# Pooled SSH connections, reused across test executions and reruns
+SSH_POOL_ENABLED = True
+SSH_POOL_MAX_CONNECTIONS = 32  # open connections kept across all sessions
+SSH_POOL_IDLE_TIMEOUT = 300  # seconds before an unused connection is closed
+SSH_POOL_HEALTH_CHECK_AFTER = 30  # seconds unused before a connection is probed on reuse
+SSH_KEEPALIVE_INTERVAL = 15  # seconds between keepalive packets
+
+# Output of remote commands, read as it arrives
+SSH_READ_CHUNK = 32768  # bytes read from a channel at a time
+SSH_OUTPUT_BUFFER = 1024 * 1024  # characters of stdout and stderr kept per command (the end is kept)
+LIVE_OUTPUT_INTERVAL = 0.25  # seconds between redraws of live output
+LIVE_OUTPUT_CHARS = 20000  # characters of live output shown
+
+# Test cases run at once over one SSH connection, each on its own channel
+# (lowered automatically to the server's MaxSessions, 10 by default for OpenSSH)
+SSH_PARALLEL_SESSIONS = 8
+
+# How a suite is run over a connection: 'parallel' uploads and runs every test
+# case on its own channel, 'bundle' sends all scripts in one compressed upload
+# to a single remote runner (fewest round trips on high-latency links), 'agent'
+# runs them inside a resident remote interpreter started once per connection
+EXECUTION_MODES = ["parallel", "bundle", "agent"]
+DEFAULT_EXECUTION_MODE = "parallel"
+BUNDLE_TEST_TIMEOUT = 600  # seconds before the remote runner stops a test
+AGENT_TEST_TIMEOUT = 600  # seconds before the agent kills a test
+REMOTE_MAX_OUTPUT = 1024 * 1024  # characters of stdout and stderr kept per test by the remote runner and agent (the end is kept)
+
+# Fleet mode: the same test cases on every host of an inventory
+FLEET_MAX_HOSTS = 32  # hosts connected and running at once
+FLEET_MAX_CONCURRENCY = 128  # test cases running at once across all hosts
+FLEET_SESSIONS_PER_HOST = 4  # test cases running at once on one host
\ No newline at end of file
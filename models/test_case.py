@@ -332,4 +332,95 @@ def convert_models_to_list(models):
     Returns:
         list: List of dictionaries
     """
-    return [convert_model_to_dict(model) for model in models]
\ No newline at end of file
+    return [convert_model_to_dict(model) for model in models]
+
+# Short keys used by the compact generation schema, mapped to TestCase fields
+COMPACT_TEST_CASE_KEYS = {
+    "id": "test_case_id",
+    "t": "title",
+    "pre": "preconditions",
+    "s": "steps",
+    "c": "verification_commands",
+    "er": "expected_results",
+    "pc": "pass_criteria",
+    "p": "priority",
+    "ty": "type"
+}
+
+COMPACT_PRIORITIES = {"H": "High", "M": "Medium", "L": "Low"}
+
+# Upper bounds on list fields in compact test cases
+COMPACT_MAX_STEPS = 5
+COMPACT_MAX_COMMANDS = 3
+
+def compact_test_case_schema():
+    """
+    Build the strict JSON schema for a compact generation response.
+    
+    The response is an object with a single "tc" array of compact test cases.
+    List bounds are described to the model and enforced again on expansion.
+    
+    Returns:
+        dict: JSON schema
+    """
+    def text(description):
+        return {"type": "string", "description": description}
+    
+    def text_list(description):
+        return {"type": "array", "items": {"type": "string"}, "description": description}
+    
+    test_case = {
+        "type": "object",
+        "properties": {
+            "id": text("Test case ID"),
+            "t": text("Title"),
+            "pre": text("Preconditions, one sentence"),
+            "s": text_list(f"Test steps, at most {COMPACT_MAX_STEPS} short imperative steps"),
+            "c": text_list(f"Linux verification commands, at most {COMPACT_MAX_COMMANDS}, no prose"),
+            "er": text("Expected results, one sentence"),
+            "pc": text("Pass criteria, one sentence"),
+            "p": {"type": "string", "enum": list(COMPACT_PRIORITIES)},
+            "ty": text("Type, e.g. Security or Configuration")
+        },
+        "required": list(COMPACT_TEST_CASE_KEYS),
+        "additionalProperties": False
+    }
+    
+    return {
+        "type": "object",
+        "properties": {"tc": {"type": "array", "items": test_case}},
+        "required": ["tc"],
+        "additionalProperties": False
+    }
+
+def expand_compact_test_case(data):
+    """
+    Expand a compact test case into the dictionary shape TestCase.from_dict expects.
+    
+    Keys that are already in the full form are kept, so expanding a
+    non-compact test case is harmless.
+    
+    Args:
+        data (dict): Compact test case
+    
+    Returns:
+        dict: Test case with full field names
+    """
+    expanded = {}
+    for key, value in data.items():
+        expanded[COMPACT_TEST_CASE_KEYS.get(key, key)] = value
+    
+    # Map single-letter priorities back to their full names
+    priority = expanded.get("priority")
+    if isinstance(priority, str):
+        expanded["priority"] = COMPACT_PRIORITIES.get(priority.strip().upper(), priority)
+    
+    # Enforce the list bounds the model was asked to respect
+    for field, limit in (("steps", COMPACT_MAX_STEPS), ("verification_commands", COMPACT_MAX_COMMANDS)):
+        value = expanded.get(field)
+        if isinstance(value, str):
+            value = [value]
+        if isinstance(value, list):
+            expanded[field] = value[:limit]
+    
+    return expanded
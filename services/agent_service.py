@@ -0,0 +1,477 @@
+"""
+Persistent remote runner agent.
+This module starts a small Python agent on the remote system once per
+connection. It stays resident on one SSH channel and runs each test script
+sent to it in a child process forked from its own interpreter, so a test
+does not pay for starting Python and importing the common modules again.
+Each child has its own working directory, environment and output, can be
+killed when it runs too long, and cannot take the agent down with it.
+"""
+
+import json
+import time
+import shlex
+import struct
+import threading
+from concurrent.futures import Future
+from config import settings
+
+# Runs on the remote system; kept compatible with Python 3.5+.
+# Frames in both directions are a 4-byte big-endian length and a JSON body.
+# socket is imported for the test scripts, which inherit the loaded modules.
+_AGENT = r'''
+import os, sys, json, time, codecs, signal, socket, struct, selectors, threading, traceback, subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+jobs, max_output = int(sys.argv[1]), int(sys.argv[2])
+
+# Keep the frame streams to ourselves; tests get /dev/null as stdin
+frames_in, frames_out = os.fdopen(os.dup(0), "rb", 0), os.fdopen(os.dup(1), "wb")
+devnull = os.open(os.devnull, os.O_RDWR)
+for fd in (0, 1, 2):
+    os.dup2(devnull, fd)
+write_lock = threading.Lock()
+children, children_lock = set(), threading.Lock()
+
+class Tail:
+    """End of a decoded output stream, at most max_output characters."""
+    def __init__(self):
+        self.decoder = codecs.getincrementaldecoder("utf-8")("replace")
+        self.parts, self.size, self.dropped = [], 0, 0
+    def feed(self, data, final=False):
+        text = self.decoder.decode(data, final)
+        self.parts.append(text)
+        self.size += len(text)
+        if self.size > 2 * max_output:
+            self.trim()
+    def trim(self):
+        text = "".join(self.parts)
+        cut = max(0, len(text) - max_output)
+        self.parts, self.size, self.dropped = [text[cut:]], len(text) - cut, self.dropped + cut
+    def value(self):
+        self.feed(b"", True)
+        self.trim()
+        text = self.parts[0]
+        return "[... %d characters dropped ...]\n%s" % (self.dropped, text) if self.dropped else text
+
+def read_exact(size):
+    data = b""
+    while len(data) < size:
+        chunk = frames_in.read(size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+def send(message):
+    body = json.dumps(message).encode("utf-8")
+    with write_lock:
+        frames_out.write(struct.pack(">I", len(body)) + body)
+        frames_out.flush()
+
+def kill(pid):
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except OSError:
+        pass
+
+def collect(pid, fds, timeout):
+    """Read a child's stdout and stderr until both close, killing it on timeout."""
+    tails = [Tail(), Tail()]
+    selector = selectors.DefaultSelector()
+    for tail, fd in zip(tails, fds):
+        selector.register(fd, selectors.EVENT_READ, tail)
+    deadline = time.time() + timeout if timeout else None
+    timed_out = False
+    try:
+        while selector.get_map():
+            wait = None if deadline is None else deadline - time.time()
+            if wait is not None and wait <= 0:
+                timed_out = True
+                kill(pid)
+                break
+            for key, _ in selector.select(wait):
+                data = os.read(key.fd, 65536)
+                if data:
+                    key.data.feed(data)
+                else:
+                    selector.unregister(key.fd)
+    finally:
+        selector.close()
+        for fd in fds:
+            os.close(fd)
+    return tails[0].value(), tails[1].value(), timed_out
+
+def execute(code, name):
+    try:
+        exec(compile(code, name, "exec"), {"__name__": "__main__", "__file__": name})
+        return 0
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            return e.code or 0
+        print(e.code, file=sys.stderr)
+        return 1
+    except BaseException:
+        traceback.print_exc()
+        return 1
+
+def close_inherited():
+    """Close the descriptors the child inherited besides 0, 1 and 2 (pipes of other tests, frames)."""
+    try:
+        fds = [int(fd) for fd in os.listdir("/proc/self/fd")]
+    except OSError:
+        fds = range(3, 1024)
+    for fd in fds:
+        if fd > 2:
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+def run_script(code, name, timeout):
+    out_r, out_w = os.pipe()
+    err_r, err_w = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        status = 1
+        try:
+            # Own process group, so a timeout also kills what the test started
+            os.setsid()
+            os.dup2(out_w, 1)
+            os.dup2(err_w, 2)
+            close_inherited()
+            sys.stdout = open(1, "w", encoding="utf-8", errors="replace", closefd=False)
+            sys.stderr = open(2, "w", encoding="utf-8", errors="backslashreplace", closefd=False, buffering=1)
+            status = execute(code, name)
+        finally:
+            try:
+                sys.stdout.flush()
+                sys.stderr.flush()
+            finally:
+                os._exit(status)
+    os.close(out_w)
+    os.close(err_w)
+    with children_lock:
+        children.add(pid)
+    try:
+        out, err, timed_out = collect(pid, (out_r, err_r), timeout)
+        status = os.waitpid(pid, 0)[1]
+    finally:
+        with children_lock:
+            children.discard(pid)
+    return (os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)), out, err, timed_out
+
+def run_command(command, timeout):
+    out_r, out_w = os.pipe()
+    err_r, err_w = os.pipe()
+    try:
+        process = subprocess.Popen(command, shell=True, stdin=devnull, stdout=out_w, stderr=err_w, start_new_session=True)
+    finally:
+        os.close(out_w)
+        os.close(err_w)
+    out, err, timed_out = collect(process.pid, (out_r, err_r), timeout)
+    return process.wait(), out, err, timed_out
+
+def handle(request):
+    started = time.time()
+    timeout = request.get("timeout")
+    try:
+        if request["kind"] == "command":
+            code, out, err, timed_out = run_command(request["command"], timeout)
+        else:
+            code, out, err, timed_out = run_script(request["code"], request.get("name", "<test>"), timeout)
+        if timed_out:
+            code, err = -1, err + "\nTimed out after %s seconds" % timeout
+    except BaseException:
+        code, out, err = -1, "", traceback.format_exc()
+    send({"id": request["id"], "exit_status": code, "stdout": out, "stderr": err,
+          "duration": time.time() - started})
+
+executor = ThreadPoolExecutor(max(1, jobs))
+send({"id": 0, "ready": True, "python": sys.version.split()[0]})
+while True:
+    header = read_exact(4)
+    if header is None:
+        break
+    body = read_exact(struct.unpack(">I", header)[0])
+    if body is None:
+        break
+    executor.submit(handle, json.loads(body.decode("utf-8")))
+
+# The client went away; stop the tests still running
+with children_lock:
+    for pid in children:
+        kill(pid)
+os._exit(0)
+'''
+
+def _agent_command(jobs, max_output=settings.REMOTE_MAX_OUTPUT):
+    """
+    Build the remote command starting the agent.
+
+    Args:
+        jobs (int): Requests the agent handles at once
+        max_output (int, optional): Characters of stdout and stderr kept per
+            request (the end is kept)
+
+    Returns:
+        str: Shell command
+    """
+    return f"python3 -u -c {shlex.quote(_AGENT)} {int(jobs)} {int(max_output)}"
+
+class RemoteAgent:
+    """
+    Client of an agent running on one channel of an SSH connection.
+
+    Requests can be sent from several threads at once; each returns a Future
+    resolved by a reader thread when the agent answers.
+    """
+
+    def __init__(self, ssh_client, jobs=settings.SSH_PARALLEL_SESSIONS):
+        """
+        Start the agent on a new channel and wait until it is ready.
+
+        Args:
+            ssh_client (paramiko.SSHClient): Open SSH client connection
+            jobs (int, optional): Requests the agent handles at once
+
+        Raises:
+            RuntimeError: If the agent does not start
+        """
+        self.jobs = jobs
+        self.transport = ssh_client.get_transport()
+        self._channel = self.transport.open_session(timeout=settings.SSH_TIMEOUT)
+        self._channel.exec_command(_agent_command(jobs))
+        self._send_lock = threading.Lock()
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._next_id = 1
+        self._ready = Future()
+        self._reader = threading.Thread(target=self._read_forever, name="remote-agent-reader", daemon=True)
+        self._reader.start()
+
+        try:
+            self.python_version = self._ready.result(timeout=settings.SSH_TIMEOUT)
+        except Exception as e:
+            self.close()
+            raise RuntimeError(f"Remote agent did not start: {self._failure_reason(e)}")
+
+    @property
+    def alive(self):
+        """
+        bool: True while the agent channel is open.
+        """
+        return self._reader.is_alive() and not self._channel.closed
+
+    def _recv_exact(self, size):
+        """
+        Read an exact number of bytes from the agent.
+
+        Args:
+            size (int): Number of bytes
+
+        Returns:
+            bytes: The data, or None at end of stream
+        """
+        data = b""
+        while len(data) < size:
+            chunk = self._channel.recv(size - len(data))
+            if not chunk:
+                return None
+            data += chunk
+        return data
+
+    def _read_forever(self):
+        """
+        Resolve requests with the frames the agent sends (runs in the reader thread).
+        """
+        error = "agent exited"
+
+        try:
+            while True:
+                header = self._recv_exact(4)
+                body = self._recv_exact(struct.unpack(">I", header)[0]) if header else None
+                if body is None:
+                    break
+
+                message = json.loads(body.decode("utf-8"))
+                if message.get("ready"):
+                    self._ready.set_result(message.get("python"))
+                    continue
+
+                with self._pending_lock:
+                    future = self._pending.pop(message["id"], None)
+                if future is not None:
+                    future.set_result(message)
+        except Exception as e:
+            error = str(e)
+        finally:
+            self._fail_pending(error)
+
+    def _fail_pending(self, error):
+        """
+        Fail the requests still waiting for an answer.
+
+        Args:
+            error (str): Why the agent stopped
+        """
+        reason = self._failure_reason(error)
+        failure = RuntimeError(f"Remote agent stopped: {reason}")
+
+        if not self._ready.done():
+            self._ready.set_exception(failure)
+
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+
+        for future in pending.values():
+            future.set_exception(failure)
+
+    def _failure_reason(self, error):
+        """
+        Describe why the agent failed, preferring what it wrote to stderr.
+
+        Args:
+            error: Exception or message seen locally
+
+        Returns:
+            str: Reason
+        """
+        stderr = b""
+        while self._channel.recv_stderr_ready():
+            stderr += self._channel.recv_stderr(65536)
+
+        return stderr.decode("utf-8", "replace").strip() or str(error)
+
+    def submit(self, kind, timeout=None, **fields):
+        """
+        Send a request to the agent.
+
+        Args:
+            kind (str): 'script' (with code and name) or 'command' (with command)
+            timeout (float, optional): Seconds before the agent kills the
+                request's process and reports it as timed out
+            **fields: Request fields
+
+        Returns:
+            concurrent.futures.Future: Resolves to a dict with exit_status,
+                stdout, stderr and duration
+        """
+        future = Future()
+
+        with self._pending_lock:
+            request_id = self._next_id
+            self._next_id += 1
+            self._pending[request_id] = future
+
+        body = json.dumps(dict(fields, id=request_id, kind=kind, timeout=timeout)).encode("utf-8")
+
+        try:
+            with self._send_lock:
+                self._channel.sendall(struct.pack(">I", len(body)) + body)
+        except Exception as e:
+            with self._pending_lock:
+                self._pending.pop(request_id, None)
+            future.set_exception(RuntimeError(f"Remote agent unavailable: {str(e)}"))
+
+        return future
+
+    def run_script(self, python_code, name, timeout=settings.AGENT_TEST_TIMEOUT):
+        """
+        Run a test script in a child process of the agent.
+
+        An agent that does not answer even after the test timed out is
+        stopped and forgotten, so the next run starts a fresh one.
+
+        Args:
+            python_code (str): Python code to execute
+            name (str): File name shown in tracebacks
+            timeout (float, optional): Seconds before the test is killed
+
+        Returns:
+            dict: exit_status, output, error and duration
+        """
+        started = time.monotonic()
+        future = self.submit("script", timeout=timeout, code=python_code, name=name)
+
+        try:
+            answer = future.result(timeout=timeout + settings.SSH_TIMEOUT)
+        except Exception as e:
+            if future.done():
+                message = str(e)
+            else:
+                message = f"Timed out after {timeout} seconds"
+                self.close()
+                _forget_agent(self)
+            return {"exit_status": -1, "output": "", "error": message, "duration": time.monotonic() - started}
+
+        return {
+            "exit_status": answer["exit_status"],
+            "output": answer["stdout"],
+            "error": answer["stderr"],
+            "duration": answer["duration"]
+        }
+
+    def close(self):
+        """
+        Stop the agent by closing its channel.
+        """
+        self._channel.close()
+
+_agents = {}
+_agents_lock = threading.Lock()
+_start_locks = {}
+
+def get_agent(ssh_client, jobs=settings.SSH_PARALLEL_SESSIONS):
+    """
+    Get the agent of a connection, starting it on first use.
+
+    The agent lives as long as the connection (pooled connections keep it
+    across runs); one that stopped is restarted. Threads asking for the agent
+    of the same connection at once wait for a single agent to start.
+
+    Args:
+        ssh_client (paramiko.SSHClient): Open SSH client connection
+        jobs (int, optional): Requests a newly started agent handles at once
+
+    Returns:
+        RemoteAgent: Running agent
+    """
+    transport = ssh_client.get_transport()
+
+    with _agents_lock:
+        # Forget agents of closed connections
+        for key in [key for key, agent in _agents.items() if not agent.transport.is_active()]:
+            del _agents[key]
+            _start_locks.pop(key, None)
+
+        agent = _agents.get(id(transport))
+        if agent is not None and agent.transport is transport and agent.alive:
+            return agent
+
+        start_lock = _start_locks.setdefault(id(transport), threading.Lock())
+
+    with start_lock:
+        # Another thread may have started it while this one waited
+        with _agents_lock:
+            agent = _agents.get(id(transport))
+        if agent is not None and agent.transport is transport and agent.alive:
+            return agent
+
+        agent = RemoteAgent(ssh_client, jobs)
+
+        with _agents_lock:
+            _agents[id(transport)] = agent
+
+    return agent
+
+def _forget_agent(agent):
+    """
+    Drop an agent from the registry, so the next get_agent starts a new one.
+
+    Args:
+        agent (RemoteAgent): Agent to forget
+    """
+    with _agents_lock:
+        for key in [key for key, known in _agents.items() if known is agent]:
+            del _agents[key]
@@ -3,11 +3,25 @@ OpenAI API integration for generating test cases.
 This module handles all interactions with the OpenAI API for generating test cases
 based on requirements.
 """
+import re
+import copy
 import json
 import time
+import textwrap
+import queue
+import random
+import hashlib
+import threading
+from email.utils import parsedate_to_datetime
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import httpx
 import openai
 import streamlit as st
 from config import settings
+from services import cache_service, journal_service, queue_service, retrieval_service, telemetry_service, template_service
+from models import test_case as test_case_model
+from utils import helpers
+from utils.json_stream import IncrementalJSONArrayParser, repair_json
 
 def generate_test_cases(requirement=None, openai_config=None, num_test_cases=3):
     """
@@ -21,9 +35,8 @@ def generate_test_cases(requirement=None, openai_config=None, num_test_cases=3):
     Returns:
         list: Generated test cases
     """
-    # If called with full requirements list, use the original implementation
+    # If called with full requirements list, generate for all of them
     if isinstance(requirement, list):
-        # Preserve the original method's behavior for multiple requirements
         if not requirement:
             st.warning("No requirements provided. Please add requirements first.")
             return []
@@ -32,117 +45,1505 @@ def generate_test_cases(requirement=None, openai_config=None, num_test_cases=3):
             st.error("OpenAI API key is required")
             return []
 
-        # Initialize OpenAI client
-        client = openai.OpenAI(api_key=openai_config["api_key"])
-        all_test_cases = []
+        return _generate_for_requirements(requirement, openai_config)
 
-        # Set up progress tracking
-        progress_bar = st.progress(0)
-        status_text = st.empty()
+    # Single requirement generation path
+    if not requirement:
+        st.warning("No requirement provided.")
+        return []
+
+    model = openai_config.get("model", "gpt-4")
+    options = _get_generation_options(openai_config, num_test_cases)
+    cache = _get_cache(openai_config)
+    telemetry = _start_telemetry(model)
+    req_id = requirement.get("requirement_id", "REQ")
+
+    # Serve unchanged requirements from the cache
+    if cache is not None:
+        cached = _get_cached_test_cases(cache, requirement, options)
+        if cached is not None:
+            telemetry.record(req_id, "cache", test_cases=len(cached))
+            telemetry.finish()
+            return cached
+
+    # Reuse the test cases of a similar past requirement
+    past_index = _get_retrieval_index(openai_config)
+    if past_index is not None:
+        retrieved = _get_retrieved_test_cases(past_index, requirement, num_test_cases)
+        if retrieved is not None:
+            telemetry.record(req_id, "retrieved", test_cases=len(retrieved))
+            telemetry.finish()
+            return retrieved
+
+    # Use the offline templates first when they are preferred
+    template_mode = _get_template_mode(openai_config)
+    if template_mode == "prefer":
+        templated = _get_template_test_cases(template_mode, requirement, num_test_cases)
+        if templated:
+            telemetry.record(req_id, "template", test_cases=len(templated))
+            telemetry.finish()
+            return templated
+
+    # Initialize OpenAI client
+    client = _get_client(openai_config.get("api_key"), openai_config.get("base_url"))
+    stats = telemetry_service.RequestStats()
+
+    try:
+        test_cases = _run_queued(
+            queue_service.get_queue(openai_config.get("api_key")),
+            helpers.get_session_id(),
+            settings.FAIR_SHARE_INTERACTIVE_WEIGHT,
+            _generate_for_requirement,
+            client,
+            requirement,
+            options,
+            stats=stats
+        )
+
+    except json.JSONDecodeError:
+        error = f"Invalid JSON response for {requirement.get('requirement_id')}"
+
+    except Exception as e:
+        error = f"Error generating test cases: {str(e)}"
+
+    else:
+        if cache is not None:
+            _put_cached_test_cases(cache, requirement, options, test_cases)
+        _add_to_retrieval_index(past_index, requirement, test_cases)
+
+        telemetry.record(req_id, "api", stats, len(test_cases))
+        telemetry.finish()
+        return test_cases
+
+    # Fall back to the offline templates when the API failed
+    templated = _get_template_test_cases(template_mode, requirement, num_test_cases)
+    if templated:
+        st.warning(f"{error}. Using offline template test cases instead.")
+        telemetry.record(req_id, "template", stats, len(templated))
+    else:
+        st.error(error)
+        telemetry.record(req_id, "api", stats, error=error)
+
+    telemetry.finish()
+    return templated or []
+
+class _TokenBucket:
+    """
+    Token bucket refilled continuously at a per-minute rate.
+
+    Callers reserve capacity up front; the bucket may go negative, in which
+    case the caller is told how long to wait before its reservation is covered.
+    """
+
+    def __init__(self, per_minute):
+        """
+        Initialize a full bucket.
+
+        Args:
+            per_minute (float): Capacity refilled every minute
+        """
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def reserve(self, amount, now):
+        """
+        Reserve capacity from the bucket.
+
+        Args:
+            amount (float): Capacity to reserve
+            now (float): Current monotonic time
+
+        Returns:
+            float: Seconds to wait before the reservation may be used
+        """
+        self._refill(now)
+        self.level -= min(amount, self.capacity)
+
+        if self.level >= 0:
+            return 0.0
+        return -self.level / self.rate
+
+    def adjust(self, delta, now):
+        """
+        Correct an earlier reservation once the real cost is known.
+
+        Args:
+            delta (float): Actual cost minus reserved cost
+            now (float): Current monotonic time
+        """
+        self._refill(now)
+        self.level = min(self.capacity, self.level - delta)
+
+    def _refill(self, now):
+        """
+        Add the capacity accumulated since the last update.
+
+        Args:
+            now (float): Current monotonic time
+        """
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+class RequestScheduler:
+    """
+    Rate-limit-aware scheduler for OpenAI API requests.
+
+    Requests are admitted against requests-per-minute and tokens-per-minute
+    token buckets so concurrent workers stay within quota. Rate limit (429),
+    timeout, connection and server errors are retried with jittered
+    exponential backoff, honouring any Retry-After header. A 429 pauses every
+    worker sharing the scheduler, not just the one that received it.
+    """
+
+    def __init__(self, requests_per_minute=settings.OPENAI_REQUESTS_PER_MINUTE,
+                 tokens_per_minute=settings.OPENAI_TOKENS_PER_MINUTE,
+                 max_retries=settings.OPENAI_MAX_RETRIES):
+        """
+        Initialize the scheduler.
+
+        Args:
+            requests_per_minute (int): Request budget per minute
+            tokens_per_minute (int): Token budget per minute
+            max_retries (int): Maximum retries per request
+        """
+        self.requests = _TokenBucket(requests_per_minute)
+        self.tokens = _TokenBucket(tokens_per_minute)
+        self.max_retries = max_retries
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def call(self, func, estimated_tokens, stats=None, **kwargs):
+        """
+        Run an API call once budget is available, retrying on transient errors.
+
+        Args:
+            func (callable): API method to call
+            estimated_tokens (int): Expected prompt + completion tokens
+            stats (RequestStats, optional): Receives the time spent waiting and the retry count
+            **kwargs: Arguments passed to func
+
+        Returns:
+            object: Result of func
+
+        Raises:
+            openai.OpenAIError: If the call still fails after all retries
+        """
+        attempt = 0
+
+        while True:
+            waited = self._acquire(estimated_tokens)
+            if stats is not None:
+                stats.queue_wait += waited
+
+            try:
+                response = func(**kwargs)
+
+            except (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError) as e:
+                if attempt >= self.max_retries:
+                    raise
 
-        for i, req in enumerate(requirement):
-            req_id = req.get("requirement_id", f"REQ-{i+1}")
-            status_text.text(f"Generating test cases for {req_id} ({i+1}/{len(requirement)})")
+                delay = self._backoff_delay(attempt, e)
+                if isinstance(e, openai.RateLimitError):
+                    self._pause(delay)
+
+                attempt += 1
+                if stats is not None:
+                    stats.retries += 1
+                    stats.queue_wait += delay
+                time.sleep(delay)
+                continue
+
+            if stats is not None:
+                stats.requests += 1
+
+            # Correct the token reservation with the real usage
+            usage = getattr(response, "usage", None)
+            total_tokens = getattr(usage, "total_tokens", None)
+            if total_tokens:
+                with self._lock:
+                    self.tokens.adjust(total_tokens - estimated_tokens, time.monotonic())
+
+            return response
+
+    def _acquire(self, estimated_tokens):
+        """
+        Block until a request and its estimated tokens fit within the budgets.
+
+        Args:
+            estimated_tokens (int): Expected prompt + completion tokens
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        with self._lock:
+            now = time.monotonic()
+            wait = max(
+                self.requests.reserve(1, now),
+                self.tokens.reserve(estimated_tokens, now),
+                self._paused_until - now
+            )
+
+        if wait > 0:
+            time.sleep(wait)
+            return wait
+
+        return 0.0
+
+    def _pause(self, delay):
+        """
+        Hold back all new requests for a while after a rate limit error.
+
+        Args:
+            delay (float): Seconds to pause
+        """
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+
+    def _backoff_delay(self, attempt, error):
+        """
+        Determine how long to wait before retrying.
+
+        Args:
+            attempt (int): Number of retries already made
+            error (Exception): Error raised by the API call
+
+        Returns:
+            float: Seconds to wait
+        """
+        retry_after = _get_retry_after(error)
+        if retry_after is not None:
+            # Small jitter so paused workers don't all retry at the same instant
+            return min(retry_after, settings.OPENAI_RETRY_MAX_DELAY) + random.uniform(0, 0.5)
+
+        # Full jitter exponential backoff
+        ceiling = min(settings.OPENAI_RETRY_MAX_DELAY, settings.OPENAI_RETRY_BASE_DELAY * (2 ** attempt))
+        return random.uniform(ceiling / 2, ceiling)
+
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+def get_scheduler(api_key, model):
+    """
+    Get the process-wide request scheduler for an API key and model.
+
+    OpenAI rate limits apply per organization and model, so every session
+    using the same key and model shares one scheduler.
+
+    Args:
+        api_key (str): OpenAI API key
+        model (str): Model name
+
+    Returns:
+        RequestScheduler: Shared scheduler
+    """
+    key = (hashlib.sha256((api_key or "").encode("utf-8")).hexdigest(), model)
+
+    with _schedulers_lock:
+        if key not in _schedulers:
+            _schedulers[key] = RequestScheduler()
+        return _schedulers[key]
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+def _get_client(api_key, base_url=None):
+    """
+    Get the process-wide OpenAI client for an API key and endpoint.
+
+    Clients are shared across Streamlit reruns and sessions so that their
+    keep-alive connections (and TLS sessions) are reused instead of opening a
+    new connection pool for every generation. Retries are handled by the
+    request scheduler, so the client's own retry loop is disabled.
+
+    Args:
+        api_key (str): OpenAI API key
+        base_url (str, optional): OpenAI-compatible API base URL (defaults to
+            the OPENAI_BASE_URL environment variable, then the OpenAI API)
+
+    Returns:
+        openai.OpenAI: Shared OpenAI client
+    """
+    key = (hashlib.sha256((api_key or "").encode("utf-8")).hexdigest(), base_url)
+
+    with _clients_lock:
+        if key not in _clients:
+            timeout = httpx.Timeout(settings.OPENAI_REQUEST_TIMEOUT, connect=settings.OPENAI_CONNECT_TIMEOUT)
+            http_client = httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=settings.OPENAI_POOL_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.OPENAI_POOL_MAX_KEEPALIVE,
+                    keepalive_expiry=settings.OPENAI_POOL_KEEPALIVE_EXPIRY
+                ),
+                timeout=timeout,
+                follow_redirects=True
+            )
+            _clients[key] = openai.OpenAI(
+                api_key=api_key,
+                base_url=base_url,
+                max_retries=0,
+                timeout=timeout,
+                http_client=http_client
+            )
+        return _clients[key]
+
+def _create_completion(client, expected_completion_tokens, stats=None, **kwargs):
+    """
+    Create a chat completion through the shared request scheduler.
+
+    Args:
+        client (openai.OpenAI): OpenAI client
+        expected_completion_tokens (int): Expected size of the completion
+        stats (RequestStats, optional): Receives the scheduling cost of the request
+        **kwargs: Arguments for client.chat.completions.create
+
+    Returns:
+        object: Chat completion response
+    """
+    prompt_tokens = sum(_estimate_tokens(m.get("content", "")) for m in kwargs.get("messages", []))
+    scheduler = get_scheduler(client.api_key, kwargs.get("model"))
+
+    return scheduler.call(
+        client.chat.completions.create,
+        prompt_tokens + expected_completion_tokens,
+        stats,
+        **kwargs
+    )
+
+def _request_completion(client, expected_completion_tokens, on_object=None, stats=None, **kwargs):
+    """
+    Request a chat completion and return its text content.
+
+    When on_object is given the completion is streamed and every object
+    inside a JSON array of the response is passed to it as soon as it is
+    complete, as ``on_object(array_key, obj)``.
+
+    Args:
+        client (openai.OpenAI): OpenAI client
+        expected_completion_tokens (int): Expected size of the completion
+        on_object (callable, optional): Called with each streamed object
+        stats (RequestStats, optional): Receives the latency, token usage and retries
+        **kwargs: Arguments for client.chat.completions.create
 
-            # Create a safe requirement ID for use in test case IDs
-            # Keep only alphanumeric characters
-            safe_req_id = ''.join(c for c in req_id if c.isalnum())
+    Returns:
+        str: Completion text (possibly truncated if the stream broke off)
+    """
+    stats = stats if stats is not None else telemetry_service.RequestStats()
+    start = time.monotonic()
+    waited_before = stats.queue_wait
+
+    try:
+        if on_object is None:
+            response = _create_completion(client, expected_completion_tokens, stats, **kwargs)
+            stats.add_usage(getattr(response, "usage", None))
+            return response.choices[0].message.content
+
+        stream = _create_completion(
+            client,
+            expected_completion_tokens,
+            stats,
+            stream=True,
+            extra_body={"stream_options": {"include_usage": True}},
+            **kwargs
+        )
+        parser = IncrementalJSONArrayParser()
+        content = []
+
+        try:
+            for chunk in stream:
+                # The usage arrives in a final chunk without choices
+                stats.add_usage(getattr(chunk, "usage", None))
+                if not chunk.choices:
+                    continue
+
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+
+                content.append(delta)
+                for key, obj in parser.feed(delta):
+                    on_object(key, obj)
+
+        except (openai.APIConnectionError, openai.APIError):
+            # A stream that breaks off still yields the objects completed so far
+            if not content:
+                raise
+
+        return "".join(content)
+
+    finally:
+        # Time spent waiting for budget or retries is queue wait, not latency
+        stats.latency += time.monotonic() - start - (stats.queue_wait - waited_before)
+
+def _get_retry_after(error):
+    """
+    Read the server-requested retry delay from an API error.
+
+    Args:
+        error (Exception): Error raised by the API call
+
+    Returns:
+        float: Seconds to wait, or None if the server did not say
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+
+        retry_after = headers.get("retry-after")
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                # HTTP-date form
+                return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+    return None
+
+def _generate_for_requirements(requirements, openai_config):
+    """
+    Generate test cases for a list of requirements.
+
+    Each requirement is served from the first source that has test cases for
+    it: the journal of the run being resumed, the persistent cache, a similar
+    past requirement, or the offline templates (template mode 'prefer').
+    Near-duplicate requirements (see file_parser.mark_near_duplicates) wait
+    for the requirement they duplicate and receive copies of its test cases.
+    The remaining requirements are requested from the OpenAI API, packed into
+    shared requests and run concurrently through the fair queue of the API
+    key (see queue_service). A failed request falls back to the offline
+    templates unless template mode is 'off'. Every completed requirement is
+    recorded in the run journal and per-requirement telemetry is kept in
+    st.session_state.generation_telemetry.
+
+    Args:
+        requirements (list): Requirements to generate test cases for
+        openai_config (dict): Configuration for OpenAI API; besides api_key,
+            base_url, model and num_test_cases it may hold:
+            - resume_run_id: Journal of an interrupted run to resume
+            - use_cache, use_retrieval: Enable the cache and past test case reuse
+            - template_mode: One of settings.TEMPLATE_MODES
+            - dedupe: Generate once per group of near-duplicates
+            - pack_size: Maximum requirements per request
+            - max_concurrency: Maximum requests in flight at once
+            - output_format: One of settings.OUTPUT_FORMATS
+            - stream: Append each test case to st.session_state.test_cases and
+              display it as soon as it is received
+
+    Returns:
+        list: Generated test cases for all requirements, in requirement order
+    """
+    # Initialize OpenAI client (safe to share between worker threads)
+    client = _get_client(openai_config["api_key"], openai_config.get("base_url"))
+    model = openai_config.get("model", "gpt-4")
+    num_test_cases = openai_config.get("num_test_cases", 3)
+    options = _get_generation_options(openai_config, num_test_cases)
+    cache = _get_cache(openai_config)
+    past_index = _get_retrieval_index(openai_config)
+    template_mode = _get_template_mode(openai_config)
+    telemetry = _start_telemetry(model)
+
+    # One result slot per requirement keeps the output in requirement order
+    results = [[] for _ in requirements]
+    total = len(requirements)
+    pending = []
+
+    # Journal every completed requirement so an interrupted run can be resumed
+    journal, journaled = _open_journal(openai_config, model, num_test_cases, total)
+    resumed = 0
+    cached_count = 0
+    retrieved_count = 0
+    templated_count = 0
+
+    # Near-duplicates wait for the requirement whose test cases they share
+    duplicate_of = _near_duplicate_representatives(requirements) if openai_config.get("dedupe", settings.DEDUP_ENABLED) else {}
+    members = {}
+
+    for i, req in enumerate(requirements):
+        # Skip requirements already completed in the run being resumed
+        key = (req.get("requirement_id"), helpers.requirement_fingerprint(req))
+        if key in journaled:
+            results[i] = journaled[key]
+            resumed += 1
+            telemetry.record(req.get("requirement_id", f"REQ-{i+1}"), "journal", test_cases=len(results[i]))
+            continue
+
+        # Serve unchanged requirements from the cache
+        cached = None
+        if cache is not None:
+            cached = _get_cached_test_cases(cache, req, options, f"REQ-{i+1}")
+
+        # Reuse the test cases of a similar past requirement
+        retrieved = None
+        if cached is None and past_index is not None:
+            retrieved = _get_retrieved_test_cases(past_index, req, num_test_cases, f"REQ-{i+1}")
+
+        # Generate common controls locally when templates are preferred
+        templated = None
+        if cached is None and retrieved is None and template_mode == "prefer":
+            templated = _get_template_test_cases(template_mode, req, num_test_cases, f"REQ-{i+1}")
+
+        if cached is not None:
+            results[i] = cached
+            cached_count += 1
+            _record_in_journal(journal, req, cached)
+            telemetry.record(req.get("requirement_id", f"REQ-{i+1}"), "cache", test_cases=len(cached))
+        elif retrieved is not None:
+            results[i] = retrieved
+            retrieved_count += 1
+            _record_in_journal(journal, req, retrieved)
+            telemetry.record(req.get("requirement_id", f"REQ-{i+1}"), "retrieved", test_cases=len(retrieved))
+        elif templated:
+            results[i] = templated
+            templated_count += 1
+            _record_in_journal(journal, req, templated)
+            telemetry.record(req.get("requirement_id", f"REQ-{i+1}"), "template", test_cases=len(templated))
+        elif i in duplicate_of:
+            members.setdefault(duplicate_of[i], []).append(i)
+        else:
+            pending.append(i)
+
+    # Duplicates of requirements that are already done can be filled in now
+    for index in [index for index in members if index not in pending]:
+        _share_test_cases(requirements, index, members.pop(index), results, journal, telemetry)
+
+    waiting = sum(len(group) for group in members.values())
+    completed = total - len(pending) - waiting
+    if resumed:
+        st.info(f"Resumed run {journal.run_id}: {resumed} requirements were already completed")
+    if cached_count:
+        st.info(f"Loaded test cases for {cached_count} unchanged requirements from cache")
+    if retrieved_count:
+        st.info(f"Reused the test cases of similar past requirements for {retrieved_count} requirements")
+    if templated_count:
+        st.info(f"Generated test cases for {templated_count} requirements from offline templates")
+    if waiting:
+        st.info(f"{waiting} near-duplicate requirements will share the test cases of the requirement they duplicate")
+
+    if not pending:
+        _finish_journal(journal)
+        telemetry.finish()
+        return [tc for test_cases in results for tc in test_cases]
+
+    # Streamed test cases are handed from the workers to this thread through a queue
+    streamed = queue.Queue() if openai_config.get("stream", False) else None
+    live_view = None
+    if streamed is not None:
+        st.session_state.setdefault("test_cases", []).extend(
+            tc for test_cases in results for tc in test_cases
+        )
+        live_view = st.container()
+
+    # Group short requirements into packed requests when packing is enabled
+    units = _pack_requirements(requirements, pending, num_test_cases, _get_pack_size(openai_config))
+    max_workers = _get_max_concurrency(openai_config, len(units))
+
+    # Units of work wait their turn in the queue shared with the other sessions
+    fair_queue = queue_service.get_queue(openai_config["api_key"])
+    queue_id = helpers.get_session_id()
+
+    # Set up progress tracking
+    progress_bar = st.progress(completed / total)
+    status_text = st.empty()
+    queue_text = st.empty()
+    status_text.text(
+        f"Generating test cases for {len(pending)} requirements in {len(units)} requests "
+        f"({max_workers} concurrent requests)"
+    )
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(
+                _run_queued,
+                fair_queue,
+                queue_id,
+                settings.FAIR_SHARE_INTERACTIVE_WEIGHT,
+                _generate_unit_safely,
+                client,
+                [requirements[i] for i in unit],
+                options,
+                [f"REQ-{i+1}" for i in unit],
+                streamed.put if streamed is not None else None,
+                time.monotonic()
+            ): unit
+            for unit in units
+        }
+
+        # Worker threads must not touch Streamlit, so all UI updates happen here
+        not_done = set(futures)
+        while not_done:
+            done, not_done = wait(not_done, timeout=0.2, return_when=FIRST_COMPLETED)
+
+            if streamed is not None:
+                _display_streamed_test_cases(streamed, live_view)
+
+            _display_queue_position(queue_text, fair_queue.status(queue_id))
+
+            for future in done:
+                unit = futures[future]
+
+                for index, (test_cases, error, stats) in zip(unit, future.result()):
+                    req_id = requirements[index].get("requirement_id", f"REQ-{index+1}")
+                    completed += 1
+
+                    # Fall back to the offline templates when the API failed
+                    templated = None
+                    if error:
+                        templated = _get_template_test_cases(template_mode, requirements[index], num_test_cases, f"REQ-{index+1}")
+
+                    if templated:
+                        st.warning(f"{error}. Using offline template test cases instead.")
+                        telemetry.record(req_id, "template", stats, len(templated), None, len(unit))
+                        _record_in_journal(journal, requirements[index], templated)
+                        test_cases = templated
+                        if streamed is not None:
+                            for tc in templated:
+                                streamed.put(tc)
+                    elif error:
+                        st.error(error)
+                        telemetry.record(req_id, "api", stats, len(test_cases), error, len(unit))
+                    else:
+                        telemetry.record(req_id, "api", stats, len(test_cases), error, len(unit))
+                        _record_in_journal(journal, requirements[index], test_cases)
+                        if cache is not None:
+                            _put_cached_test_cases(cache, requirements[index], options, test_cases)
+                        _add_to_retrieval_index(past_index, requirements[index], test_cases)
+                    results[index] = test_cases
+
+                    # Fan the test cases out to the requirement's near-duplicates
+                    if index in members:
+                        shared = _share_test_cases(requirements, index, members.pop(index), results, journal, telemetry, error)
+                        completed += len(shared)
+                        if streamed is not None:
+                            for member in shared:
+                                for tc in results[member]:
+                                    streamed.put(tc)
+
+                # Update progress
+                status_text.text(f"Generated test cases for {req_id} ({completed}/{total})")
+                progress_bar.progress(completed / total)
+
+    if streamed is not None:
+        _display_streamed_test_cases(streamed, live_view)
+
+    # Clean up progress indicators
+    progress_bar.empty()
+    status_text.empty()
+    queue_text.empty()
+    telemetry.finish()
+
+    # Only a run without failures is finished; otherwise it stays resumable
+    if all(results[i] for i in pending):
+        _finish_journal(journal)
+
+    return [tc for test_cases in results for tc in test_cases]
+
+def prefetch_test_cases(requirements, openai_config, cache, past_index=None, cancelled=None, on_progress=None,
+                        queue_id="background"):
+    """
+    Generate test cases ahead of time and store them in the cache.
+
+    Makes no Streamlit calls, so it can run in a background thread. Cached
+    requirements, near-duplicates of another requirement, requirements with
+    a similar past requirement in past_index and, with template mode
+    'prefer', requirements the templates recognize are skipped. A later
+    generation run then finds the results in the cache.
+
+    Args:
+        requirements (list): Requirements to generate test cases for
+        openai_config (dict): Configuration for OpenAI API
+        cache (TestCaseCache): Cache to store the test cases in
+        past_index (TestCaseIndex, optional): Index of past test cases to reuse and add them to
+        cancelled (threading.Event, optional): No new requests are sent once it is set
+        on_progress (callable, optional): Called with (done, total, failed)
+            when the work is known and after every completed requirement
+        queue_id (str, optional): Identifier of the job in the fair-share queue
+
+    Returns:
+        int: Number of requirements whose test cases were cached
+    """
+    num_test_cases = openai_config.get("num_test_cases", settings.DEFAULT_TEST_CASES_PER_REQ)
+    options = _get_generation_options(openai_config, num_test_cases)
+    template_mode = _get_template_mode(openai_config)
+    duplicate_of = _near_duplicate_representatives(requirements) if openai_config.get("dedupe", settings.DEDUP_ENABLED) else {}
+
+    pending = []
+    for i, req in enumerate(requirements):
+        if i in duplicate_of:
+            continue
+        if cache.contains(_cache_key(req, options)):
+            continue
+        if past_index is not None and _get_retrieved_test_cases(past_index, req, num_test_cases) is not None:
+            continue
+        if template_mode == "prefer" and template_service.match_template(req.get("description", ""))[0]:
+            continue
+        pending.append(i)
+
+    done = failed = generated = 0
+    if on_progress:
+        on_progress(done, len(pending), failed)
+    if not pending:
+        return generated
+
+    client = _get_client(openai_config["api_key"], openai_config.get("base_url"))
+    fair_queue = queue_service.get_queue(openai_config["api_key"])
+    units = iter(_pack_requirements(requirements, pending, num_test_cases, _get_pack_size(openai_config)))
+    max_workers = min(_get_max_concurrency(openai_config, len(pending)), settings.PREFETCH_CONCURRENCY)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        in_flight = {}
+
+        while True:
+            # Submit lazily so that cancelling stops further requests
+            while len(in_flight) < max_workers and not (cancelled is not None and cancelled.is_set()):
+                unit = next(units, None)
+                if unit is None:
+                    break
+                future = executor.submit(
+                    _run_queued,
+                    fair_queue,
+                    queue_id,
+                    settings.FAIR_SHARE_BACKGROUND_WEIGHT,
+                    _generate_unit_safely,
+                    client,
+                    [requirements[i] for i in unit],
+                    options,
+                    [f"REQ-{i+1}" for i in unit]
+                )
+                in_flight[future] = unit
+
+            if not in_flight:
+                break
+
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                unit = in_flight.pop(future)
+
+                for index, (test_cases, error, _) in zip(unit, future.result()):
+                    done += 1
+                    if error or not test_cases:
+                        failed += 1
+                        continue
+
+                    _put_cached_test_cases(cache, requirements[index], options, test_cases)
+                    _add_to_retrieval_index(past_index, requirements[index], test_cases)
+                    generated += 1
+
+                if on_progress:
+                    on_progress(done, len(pending), failed)
+
+    return generated
+
+def _run_queued(fair_queue, queue_id, weight, func, *args, **kwargs):
+    """
+    Run a unit of work once the fair-share queue grants it a slot.
+
+    Args:
+        fair_queue (FairShareQueue): Queue shared by the sessions using the API key
+        queue_id (str): Identifier of the session (or job) in the queue
+        weight (int): Turns per round of the session
+        func (callable): Work to run
+        *args: Positional arguments passed to func
+        **kwargs: Keyword arguments passed to func
+
+    Returns:
+        object: Result of func
+    """
+    fair_queue.acquire(queue_id, weight)
+    try:
+        return func(*args, **kwargs)
+    finally:
+        fair_queue.release(queue_id)
+
+def _display_queue_position(queue_text, status):
+    """
+    Show where this session's work stands in the shared queue.
+
+    Nothing is shown while none of its work is waiting.
+
+    Args:
+        queue_text: Streamlit placeholder for the queue status
+        status (dict): Status from FairShareQueue.status
+    """
+    if not status["waiting"]:
+        queue_text.empty()
+        return
+
+    queue_text.text(
+        f"Shared queue: {status['waiting']} of your requests waiting, {status['running']} running; "
+        f"{status['ahead']} other sessions ahead of you, "
+        f"{status['active']}/{status['capacity']} slots in use by {status['sessions']} sessions"
+    )
+
+def _near_duplicate_representatives(requirements):
+    """
+    Find the requirements that can share the test cases of another one.
+
+    Uses the 'duplicate_of' marks set by file_parser.mark_near_duplicates.
+    Marks pointing at a requirement that is not in the list, or that is itself
+    a duplicate, are ignored.
+
+    Args:
+        requirements (list): Requirements to generate test cases for
+
+    Returns:
+        dict: Index of each near-duplicate -> index of its representative
+    """
+    first_index = {}
+    for i, req in enumerate(requirements):
+        first_index.setdefault(req.get("requirement_id"), i)
+
+    representatives = {}
+    for i, req in enumerate(requirements):
+        representative = first_index.get(req.get("duplicate_of"))
+        if representative is not None and representative != i and not requirements[representative].get("duplicate_of"):
+            representatives[i] = representative
+
+    return representatives
+
+def _share_test_cases(requirements, representative, members, results, journal, telemetry, error=None):
+    """
+    Copy the test cases of a requirement to its near-duplicates.
+
+    Args:
+        requirements (list): All requirements of the run
+        representative (int): Index of the requirement the test cases belong to
+        members (list): Indices of its near-duplicates
+        results (list): Result slot per requirement (updated in place)
+        journal (RunJournal): Run journal, or None if journaling is unavailable
+        telemetry (GenerationTelemetry): Telemetry of the run
+        error (str, optional): Error of the representative, if it failed
+
+    Returns:
+        list: The member indices that were filled in
+    """
+    source_req_id = requirements[representative].get("requirement_id", f"REQ-{representative+1}")
+
+    for index in members:
+        req_id = requirements[index].get("requirement_id", f"REQ-{index+1}")
+        results[index] = _retag_test_cases(results[representative], source_req_id, req_id)
+        _record_in_journal(journal, requirements[index], results[index])
+        telemetry.record(
+            req_id,
+            "duplicate",
+            test_cases=len(results[index]),
+            error=f"Near-duplicate of {source_req_id}, which failed" if error else None
+        )
+
+    return members
+
+def _start_telemetry(model):
+    """
+    Start collecting telemetry for a generation run.
+
+    The telemetry of the latest run is kept in the session state for the
+    summary panel in the Test Cases tab.
+
+    Args:
+        model (str): Model used for the run
+
+    Returns:
+        GenerationTelemetry: Telemetry collector for the run
+    """
+    telemetry = telemetry_service.GenerationTelemetry(model)
+    st.session_state.generation_telemetry = telemetry
+    return telemetry
+
+def _open_journal(openai_config, model, num_test_cases, total):
+    """
+    Open the run journal for a generation run.
+
+    Args:
+        openai_config (dict): Configuration for OpenAI API
+        model (str): Model name
+        num_test_cases (int): Number of test cases per requirement
+        total (int): Number of requirements in the run
+
+    Returns:
+        tuple: (journal, completed) where journal is a RunJournal (or None if
+               journaling failed) and completed maps (requirement_id,
+               fingerprint) to the test cases already generated
+    """
+    try:
+        owner = journal_service.owner_id(openai_config.get("api_key"))
+        run_id = openai_config.get("resume_run_id")
+        if run_id:
+            journal = journal_service.RunJournal.open(run_id)
+            info = journal.read() if journal is not None else {}
+            if info.get("owner") == owner:
+                return journal, info["completed"]
+            st.warning(f"Generation run {run_id} not found, starting a new run")
+
+        return journal_service.RunJournal.create(model, num_test_cases, total, owner), {}
+
+    except Exception as e:
+        st.warning(f"Run journal unavailable, this run cannot be resumed: {str(e)}")
+        return None, {}
+
+def _record_in_journal(journal, requirement, test_cases):
+    """
+    Record a completed requirement in the run journal.
+
+    Args:
+        journal (RunJournal): Run journal, or None if journaling is unavailable
+        requirement (dict): Requirement that was completed
+        test_cases (list): Test cases generated for it
+    """
+    if journal is None or not test_cases:
+        return
+
+    try:
+        journal.record(requirement, test_cases)
+    except Exception:
+        # A journal write failure must never fail generation
+        pass
+
+def _finish_journal(journal):
+    """
+    Mark a run journal as complete.
+
+    Args:
+        journal (RunJournal): Run journal, or None if journaling is unavailable
+    """
+    if journal is None:
+        return
+
+    try:
+        journal.finish()
+    except Exception:
+        pass
+
+def _display_streamed_test_cases(streamed, live_view):
+    """
+    Show test cases received from streaming workers since the last call.
+
+    Args:
+        streamed (queue.Queue): Test cases put there by the worker threads
+        live_view: Streamlit container for the live list
+    """
+    while True:
+        try:
+            tc = streamed.get_nowait()
+        except queue.Empty:
+            return
+
+        st.session_state.test_cases.append(tc)
+        live_view.markdown(
+            f"- **{tc.get('test_case_id', 'Unknown')}** ({tc.get('requirement_id', '')}): "
+            f"{tc.get('title', 'Untitled')}"
+        )
+
+def _generate_unit_safely(client, unit, options, default_ids, on_test_case=None, submitted_at=None):
+    """
+    Generate test cases for one unit of work without raising.
+
+    A unit is either a single requirement or a pack of short requirements that
+    share one request. If a packed response is unusable or leaves out some of
+    its requirements, those requirements are retried individually, and those
+    left with too few test cases are topped up.
+
+    Args:
+        client (openai.OpenAI): OpenAI client
+        unit (list): Requirements in this unit
+        options (dict): Generation options (see _get_generation_options)
+        default_ids (list): Requirement IDs to use for requirements without one
+        on_test_case (callable, optional): Called with each test case as it is streamed
+        submitted_at (float, optional): time.monotonic() when the unit was queued
+
+    Returns:
+        list: One (test_cases, error, stats) tuple per requirement in the unit
+    """
+    queue_wait = time.monotonic() - submitted_at if submitted_at is not None else 0.0
+
+    if len(unit) == 1:
+        stats = telemetry_service.RequestStats()
+        stats.queue_wait = queue_wait
+        test_cases, error = _generate_requirement_safely(
+            client, unit[0], options, default_ids[0], on_test_case, stats
+        )
+        return [(test_cases, error, stats)]
+
+    pack_stats = telemetry_service.RequestStats()
+    pack_stats.queue_wait = queue_wait
+
+    try:
+        packed = _generate_for_packed_requirements(client, unit, options, default_ids, on_test_case, pack_stats)
+    except Exception:
+        packed = {}
+
+    results = []
+    for requirement, default_id, stats in zip(unit, default_ids, pack_stats.split(len(unit))):
+        req_id = requirement.get("requirement_id", default_id)
+
+        if packed.get(req_id):
+            # A truncated pack may have cut this requirement's test cases short
+            test_cases = _top_up_test_cases(client, requirement, options, req_id, packed[req_id], on_test_case, stats)
+            results.append((test_cases, None, stats))
+        else:
+            # Fall back to a dedicated request for anything the pack missed
+            test_cases, error = _generate_requirement_safely(
+                client, requirement, options, default_id, on_test_case, stats
+            )
+            results.append((test_cases, error, stats))
+
+    return results
+
+def _generate_requirement_safely(client, requirement, options, default_id, on_test_case=None, stats=None):
+    """
+    Generate test cases for one requirement without raising.
+
+    Errors are returned as messages so they can be reported from the main
+    Streamlit thread.
+
+    Args:
+        client (openai.OpenAI): OpenAI client
+        requirement (dict): Requirement to generate test cases for
+        options (dict): Generation options (see _get_generation_options)
+        default_id (str): Requirement ID to use if the requirement has none
+        on_test_case (callable, optional): Called with each test case as it is streamed
+        stats (RequestStats, optional): Receives the cost of the requests made
+
+    Returns:
+        tuple: (test_cases, error) where error is None on success
+    """
+    req_id = requirement.get("requirement_id", default_id)
+
+    try:
+        test_cases = _generate_for_requirement(client, requirement, options, default_id, on_test_case, stats)
+        return test_cases, None
+
+    except json.JSONDecodeError:
+        return [], f"Invalid JSON response for {req_id}"
+
+    except Exception as e:
+        return [], f"Error generating test cases for {req_id}: {str(e)}"
+
+def _generate_for_requirement(client, requirement, options, default_id="REQ", on_test_case=None, stats=None):
+    """
+    Call the OpenAI API and parse the test cases for a single requirement.
+
+    When on_test_case is given the completion is streamed and each test case
+    is passed to it as soon as it is complete. A damaged response (for example
+    one that was truncated) is repaired and every complete test case in it is
+    kept; only the test cases still missing are then requested again.
+
+    Args:
+        client (openai.OpenAI): OpenAI client
+        requirement (dict): Requirement to generate test cases for
+        options (dict): Generation options (see _get_generation_options)
+        default_id (str, optional): Requirement ID to use if the requirement has none
+        on_test_case (callable, optional): Called with each test case as it is streamed
+        stats (RequestStats, optional): Receives the cost of the requests made
+
+    Returns:
+        list: Generated test cases tagged with the requirement ID
+
+    Raises:
+        json.JSONDecodeError: If the model response cannot be decoded or repaired
+    """
+    req_id = requirement.get("requirement_id", default_id)
+
+    # Very long descriptions are generated chunk by chunk
+    chunks = _split_description(requirement.get("description", ""), settings.CHUNK_MAX_TOKENS)
+    if len(chunks) > 1:
+        return _generate_for_chunks(client, requirement, chunks, options, req_id, on_test_case, stats)
+
+    test_cases = _request_test_cases(
+        client, requirement, options, req_id, options["num_test_cases"], on_test_case, stats
+    )
+
+    return _top_up_test_cases(client, requirement, options, req_id, test_cases, on_test_case, stats)
+
+def _generate_for_chunks(client, requirement, chunks, options, req_id, on_test_case=None, stats=None):
+    """
+    Generate test cases for a long requirement one chunk at a time.
+
+    The requested number of test cases is shared out over the chunks (at
+    least one per chunk). The merged test cases are renumbered under the
+    original requirement ID, and streamed per chunk once each is complete.
+
+    Args:
+        client (openai.OpenAI): OpenAI client
+        requirement (dict): Requirement to generate test cases for
+        chunks (list): Parts of the requirement description
+        options (dict): Generation options (see _get_generation_options)
+        req_id (str): Requirement ID
+        on_test_case (callable, optional): Called with each test case once its chunk is done
+        stats (RequestStats, optional): Receives the cost of the requests made
+
+    Returns:
+        list: Test cases for the whole requirement
+
+    Raises:
+        json.JSONDecodeError: If no chunk produced usable test cases
+    """
+    num_test_cases = options["num_test_cases"]
+    safe_req_id = ''.join(c for c in req_id if c.isalnum())
+    test_cases = []
+    error = None
+
+    for number, chunk in enumerate(chunks):
+        chunk_options = dict(
+            options,
+            num_test_cases=max(1, num_test_cases // len(chunks) + (1 if number < num_test_cases % len(chunks) else 0))
+        )
+        chunk_requirement = dict(
+            requirement,
+            description=f"Part {number + 1} of {len(chunks)} of a longer requirement:\n\n{chunk}"
+        )
+
+        try:
+            chunk_test_cases = _request_test_cases(
+                client, chunk_requirement, chunk_options, req_id, chunk_options["num_test_cases"], None, stats
+            )
+            chunk_test_cases = _top_up_test_cases(
+                client, chunk_requirement, chunk_options, req_id, chunk_test_cases, None, stats
+            )
+        except json.JSONDecodeError as e:
+            # Keep going, the other chunks may still succeed
+            error = e
+            continue
+
+        for tc in chunk_test_cases:
+            tc["test_case_id"] = f"TC-{safe_req_id}-{len(test_cases) + 1:03d}"
+            test_cases.append(tc)
+            if on_test_case:
+                on_test_case(dict(tc))
+
+    if not test_cases and error is not None:
+        raise error
+
+    return test_cases
+
+def _split_description(description, max_tokens):
+    """
+    Split a requirement description into chunks of at most max_tokens.
+
+    Chunks follow paragraph boundaries where possible, then sentence
+    boundaries; only text without any break is cut between words.
+
+    Args:
+        description (str): Requirement description
+        max_tokens (int): Maximum estimated tokens per chunk
+
+    Returns:
+        list: Chunks of the description (a single item if it is short enough)
+    """
+    if _estimate_tokens(description) <= max_tokens:
+        return [description]
+
+    pieces = []
+    for paragraph in re.split(r"\n\s*\n", description):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+
+        if _estimate_tokens(paragraph) <= max_tokens:
+            pieces.append(paragraph)
+            continue
+
+        for sentence in re.split(r"(?<=[.!?;:])\s+|\n", paragraph):
+            # Cut run-on text between words
+            pieces.extend(textwrap.wrap(sentence, width=max_tokens * 4))
+
+    # Greedily fill each chunk with whole pieces
+    chunks = []
+    current = []
+    current_tokens = 0
+
+    for piece in pieces:
+        piece_tokens = _estimate_tokens(piece)
+
+        if current and current_tokens + piece_tokens > max_tokens:
+            chunks.append("\n\n".join(current))
+            current = []
+            current_tokens = 0
+
+        current.append(piece)
+        current_tokens += piece_tokens
+
+    if current:
+        chunks.append("\n\n".join(current))
+
+    return chunks
+
+def _request_test_cases(client, requirement, options, req_id, num_test_cases, on_test_case=None,
+                        stats=None, existing_test_cases=None):
+    """
+    Request test cases for a requirement and parse them from the response.
+
+    Args:
+        client (openai.OpenAI): OpenAI client
+        requirement (dict): Requirement to generate test cases for
+        options (dict): Generation options (see _get_generation_options)
+        req_id (str): Requirement ID
+        num_test_cases (int): Number of test cases to request
+        on_test_case (callable, optional): Called with each test case as it is streamed
+        stats (RequestStats, optional): Receives the cost of the request
+        existing_test_cases (list, optional): Test cases the new ones must not repeat
+
+    Returns:
+        list: At most num_test_cases test cases tagged with the requirement
+              ID, with IDs that do not clash with existing_test_cases
+
+    Raises:
+        json.JSONDecodeError: If no test case could be recovered from the response
+    """
+    output_format = options["output_format"]
+    existing_test_cases = existing_test_cases or []
+
+    # Only stream test cases from the first array in the response
+    streamed_key = []
+    streamed = []
+
+    def on_object(key, tc):
+        if not streamed_key:
+            streamed_key.append(key)
+        if key == streamed_key[0] and len(streamed) < num_test_cases:
+            # Numbered as in the final list, so the live view shows the same IDs
+            tc = _normalize_test_case(dict(tc), req_id, output_format)
+            _renumber_test_cases([tc], req_id, existing_test_cases + streamed)
+            streamed.append(tc)
+            on_test_case(dict(tc))
+
+    content = _request_completion(
+        client,
+        num_test_cases * settings.EST_TOKENS_PER_TEST_CASE,
+        on_object if on_test_case else None,
+        stats,
+        model=options["model"],
+        **build_generation_request(requirement, num_test_cases, output_format, req_id, existing_test_cases)
+    )
+
+    test_cases = [
+        _normalize_test_case(tc, req_id, output_format)
+        for tc in _parse_test_cases(_decode_response(content, stats)) if isinstance(tc, dict)
+    ]
+
+    return _renumber_test_cases(test_cases[:num_test_cases], req_id, existing_test_cases)
+
+def _top_up_test_cases(client, requirement, options, req_id, test_cases, on_test_case=None, stats=None):
+    """
+    Request the test cases missing from a partial response.
+
+    Only the missing count is requested, with the test cases already received
+    listed so they are not repeated. A failing top-up request keeps the test
+    cases already received.
+
+    Args:
+        client (openai.OpenAI): OpenAI client
+        requirement (dict): Requirement to generate test cases for
+        options (dict): Generation options (see _get_generation_options)
+        req_id (str): Requirement ID
+        test_cases (list): Test cases received so far
+        on_test_case (callable, optional): Called with each test case as it is streamed
+        stats (RequestStats, optional): Receives the cost of the request
+
+    Returns:
+        list: The test cases received so far plus the new ones
+    """
+    missing = options["num_test_cases"] - len(test_cases)
+    if not test_cases or missing <= 0:
+        return test_cases
+
+    try:
+        more = _request_test_cases(
+            client, requirement, options, req_id, missing, on_test_case, stats, test_cases
+        )
+    except Exception:
+        return test_cases
+
+    return test_cases + more
+
+def _decode_response(content, stats=None):
+    """
+    Decode a JSON model response, repairing it if necessary.
+
+    Args:
+        content (str): Response text
+        stats (RequestStats, optional): Counts the responses that needed repair
+
+    Returns:
+        Decoded JSON value
+
+    Raises:
+        json.JSONDecodeError: If nothing usable could be recovered
+    """
+    try:
+        return json.loads(content)
+    except json.JSONDecodeError:
+        if stats is not None:
+            stats.parse_failures += 1
+
+    # Keep every test case that was complete
+    return repair_json(content)
+
+def _renumber_test_cases(test_cases, req_id, existing_test_cases):
+    """
+    Give additional test cases IDs that do not clash with the existing ones.
+
+    The n-th test case gets the same ID whether the list is renumbered at
+    once or one test case at a time as it is streamed.
+
+    Args:
+        test_cases (list): Additional test cases
+        req_id (str): Requirement ID
+        existing_test_cases (list): Test cases they are added to
+
+    Returns:
+        list: The additional test cases, with clashing IDs replaced
+    """
+    safe_req_id = ''.join(c for c in req_id if c.isalnum())
+    used = {tc.get("test_case_id") for tc in existing_test_cases}
+
+    for position, tc in enumerate(test_cases, len(existing_test_cases) + 1):
+        if tc.get("test_case_id") and tc["test_case_id"] not in used:
+            used.add(tc["test_case_id"])
+            continue
+
+        number = position
+        while f"TC-{safe_req_id}-{number:03d}" in used:
+            number += 1
+
+        tc["test_case_id"] = f"TC-{safe_req_id}-{number:03d}"
+        used.add(tc["test_case_id"])
+
+    return test_cases
+
+def build_generation_request(requirement, num_test_cases=3, output_format="standard", req_id=None,
+                             existing_test_cases=None):
+    """
+    Build the chat completion arguments for generating one requirement's test cases.
 
-            # Create prompts
-            prompt = f"""
-            Create {openai_config.get('num_test_cases', 3)} detailed test cases for this Linux requirement:
+    Args:
+        requirement (dict): Requirement to generate test cases for
+        num_test_cases (int, optional): Number of test cases to generate
+        output_format (str, optional): One of settings.OUTPUT_FORMATS
+        req_id (str, optional): Requirement ID (defaults to the requirement's own)
+        existing_test_cases (list, optional): Test cases already generated,
+            which the new ones must not repeat
 
-            {req.get('description', '')}
+    Returns:
+        dict: messages, response_format and max_completion_tokens arguments
+    """
+    req_id = req_id or requirement.get("requirement_id", "REQ")
 
-            Each test case should have:
-            1. A test case ID like TC-{safe_req_id}-001
-            2. A title
-            3. Preconditions
-            4. Test steps
-            5. Verification commands (Linux commands to run for verification)
-            6. Expected results
-            7. Pass criteria (clear conditions that must be met for the test to pass)
-            8. Priority (High/Medium/Low)
-            9. Type (Security/Configuration/etc.)
+    if output_format == "structured":
+        response_format = {
+            "type": "json_schema",
+            "json_schema": {
+                "name": "test_cases",
+                "strict": True,
+                "schema": test_case_model.compact_test_case_schema()
+            }
+        }
+    else:
+        response_format = {"type": "json_object"}
 
-            Return only a JSON array of test cases.
-            """
+    # The instructions are identical for every requirement of a run, so they go
+    # first where the provider can cache them; the requirement itself comes last
+    prompt = _build_requirement_prompt(requirement, req_id)
+    if existing_test_cases:
+        prompt += _build_existing_test_cases_note(req_id, existing_test_cases)
 
-            try:
-                # Simple prompt approach
-                response = client.chat.completions.create(
-                    model=openai_config.get("model", "gpt-4"),
-                    messages=[
-                        {"role": "system", "content": "You are a Linux system testing expert."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    max_completion_tokens=20000,
-                    response_format={"type": "json_object"}
-                )
+    return {
+        "messages": [
+            {"role": "system", "content": _build_instructions(num_test_cases, output_format)},
+            {"role": "user", "content": prompt}
+        ],
+        "max_completion_tokens": _completion_token_limit(num_test_cases * settings.EST_TOKENS_PER_TEST_CASE),
+        "response_format": response_format
+    }
 
-                # Get the response content
-                content = response.choices[0].message.content
+def _build_instructions(num_test_cases, output_format="standard"):
+    """
+    Build the system message for single-requirement requests.
 
-                # Parse JSON
-                try:
-                    data = json.loads(content)
+    The message contains nothing specific to a requirement, so every request
+    of a run starts with the same text and can reuse the provider's prompt
+    cache.
 
-                    # Find test cases in the response
-                    test_cases = []
+    Args:
+        num_test_cases (int): Number of test cases to generate
+        output_format (str, optional): One of settings.OUTPUT_FORMATS
 
-                    # Try to get test cases from the response
-                    if isinstance(data, list):
-                        test_cases = data
-                    elif isinstance(data, dict):
-                        # Look for any array in the response
-                        for key, value in data.items():
-                            if isinstance(value, list):
-                                test_cases = value
-                                break
+    Returns:
+        str: System message text
+    """
+    if output_format in ("compact", "structured"):
+        return f"""{_SYSTEM_ROLE}
 
-                    # Add requirement ID to each test case
-                    for tc in test_cases:
-                        if isinstance(tc, dict):
-                            tc["requirement_id"] = req_id
+    Create {num_test_cases} test cases for the Linux requirement given by the user.
 
-                    all_test_cases.extend(test_cases)
+    {_COMPACT_FIELDS.format(test_case_id="test case ID in the form given with the requirement")}
 
-                except json.JSONDecodeError:
-                    st.error(f"Invalid JSON response for {req_id}")
-                    continue
+    Return only a JSON object {{"tc": [...]}} with the test cases.
+    """
 
-            except Exception as e:
-                st.error(f"Error generating test cases for {req_id}: {str(e)}")
+    return f"""{_SYSTEM_ROLE}
 
-            # Update progress
-            progress_bar.progress((i+1)/len(requirement))
+    Create {num_test_cases} detailed test cases for the Linux requirement given by the user.
 
-        # Clean up progress indicators
-        progress_bar.empty()
-        status_text.empty()
+    {_STANDARD_FIELDS.format(test_case_id="test case ID in the form given with the requirement")}
 
-        return all_test_cases
+    Return only a JSON object {{"test_cases": [...]}} with the test cases.
+    """
 
-    # Single requirement generation path
-    if not requirement:
-        st.warning("No requirement provided.")
-        return []
+def _build_requirement_prompt(requirement, req_id):
+    """
+    Build the user message holding the requirement to generate test cases for.
 
-    # Initialize OpenAI client
-    client = openai.OpenAI(api_key=openai_config.get("api_key"))
+    Args:
+        requirement (dict): Requirement to generate test cases for
+        req_id (str): Requirement ID
 
+    Returns:
+        str: User message text
+    """
     # Create a safe requirement ID for use in test case IDs
     # Keep only alphanumeric characters
-    safe_req_id = ''.join(c for c in requirement.get("requirement_id", "REQ").split() if c.isalnum())
+    safe_req_id = ''.join(c for c in req_id if c.isalnum())
 
-    # Create prompts
-    prompt = f"""
-    Create {num_test_cases} detailed test cases for this Linux requirement:
+    return f"""Requirement {req_id} (test case IDs like TC-{safe_req_id}-001):
 
     {requirement.get('description', '')}
+    """
+
+def _build_existing_test_cases_note(req_id, existing_test_cases):
+    """
+    Build the prompt addition asking for test cases beyond the existing ones.
+
+    Args:
+        req_id (str): Requirement ID
+        existing_test_cases (list): Test cases already generated
+
+    Returns:
+        str: Text to append to the generation prompt
+    """
+    safe_req_id = ''.join(c for c in req_id if c.isalnum())
+    existing = "\n".join(
+        f"    - {tc.get('test_case_id', '')}: {tc.get('title', '')}" for tc in existing_test_cases
+    )
+
+    return f"""
+    These test cases already exist, do not repeat them:
+{existing}
+
+    Number the new test cases from TC-{safe_req_id}-{len(existing_test_cases) + 1:03d}.
+    """
+
+_SYSTEM_ROLE = "You are a Linux system testing expert."
 
-    Each test case should have:
-    1. A test case ID like TC-{safe_req_id}-001
+# Field list for standard prompts
+_STANDARD_FIELDS = """Each test case should have:
+    1. A {test_case_id}
     2. A title
     3. Preconditions
     4. Test steps
@@ -150,54 +1551,568 @@ def generate_test_cases(requirement=None, openai_config=None, num_test_cases=3):
     6. Expected results
     7. Pass criteria (clear conditions that must be met for the test to pass)
     8. Priority (High/Medium/Low)
-    9. Type (Security/Configuration/etc.)
+    9. Type (Security/Configuration/etc.)"""
 
-    Return only a JSON array of test cases.
+# Field list for compact prompts; keys match models.test_case.COMPACT_TEST_CASE_KEYS
+_COMPACT_FIELDS = f"""Use exactly these keys for each test case and be terse, no prose outside the fields:
+    id: {{test_case_id}}
+    t: title
+    pre: preconditions, one sentence
+    s: test steps, at most {test_case_model.COMPACT_MAX_STEPS} short imperative steps
+    c: verification commands, at most {test_case_model.COMPACT_MAX_COMMANDS} Linux commands
+    er: expected results, one sentence
+    pc: pass criteria, one sentence
+    p: priority, H, M or L
+    ty: type (Security/Configuration/etc.)"""
+
+def _normalize_test_case(tc, req_id, output_format):
     """
+    Bring a generated test case into the standard dictionary shape.
 
-    try:
-        # Simple prompt approach
-        response = client.chat.completions.create(
-            model=openai_config.get("model", "gpt-4"),
-            messages=[
-                {"role": "system", "content": "You are a Linux system testing expert."},
-                {"role": "user", "content": prompt}
-            ],
-            max_completion_tokens=20000,
-            response_format={"type": "json_object"}
+    Args:
+        tc (dict): Test case as returned by the model
+        req_id (str): Requirement ID to tag the test case with
+        output_format (str): Output format the test case was requested in
+
+    Returns:
+        dict: Test case with full field names and the requirement ID
+    """
+    if output_format in ("compact", "structured"):
+        tc = test_case_model.expand_compact_test_case(tc)
+
+    tc["requirement_id"] = req_id
+    return tc
+
+def _generate_for_packed_requirements(client, requirements, options, default_ids, on_test_case=None, stats=None):
+    """
+    Generate test cases for several short requirements in a single request.
+
+    Packed requests always use a JSON object response keyed by requirement
+    ID; the structured output format falls back to compact keys here.
+
+    Args:
+        client (openai.OpenAI): OpenAI client
+        requirements (list): Requirements to generate test cases for
+        options (dict): Generation options (see _get_generation_options)
+        default_ids (list): Requirement IDs to use for requirements without one
+        on_test_case (callable, optional): Called with each test case as it is streamed
+        stats (RequestStats, optional): Receives the cost of the request
+
+    Returns:
+        dict: Test cases keyed by requirement ID, tagged with that ID
+
+    Raises:
+        json.JSONDecodeError: If the model response cannot be decoded or repaired
+    """
+    req_ids = [req.get("requirement_id", default_id) for req, default_id in zip(requirements, default_ids)]
+    output_format = options["output_format"]
+
+    # Create prompts
+    instructions = _build_packed_instructions(options["num_test_cases"], output_format)
+    prompt = _build_packed_prompt(requirements, req_ids)
+
+    # Route streamed test cases to their requirement by the array key
+    ids_by_key = {_normalize_requirement_key(req_id): req_id for req_id in req_ids}
+    streamed = {req_id: [] for req_id in req_ids}
+
+    def on_object(key, tc):
+        req_id = ids_by_key.get(_normalize_requirement_key(key))
+        if req_id:
+            # Numbered as in the final lists, so the live view shows the same IDs
+            tc = _normalize_test_case(dict(tc), req_id, output_format)
+            _renumber_test_cases([tc], req_id, streamed[req_id])
+            streamed[req_id].append(tc)
+            on_test_case(dict(tc))
+
+    content = _request_completion(
+        client,
+        len(requirements) * options["num_test_cases"] * settings.EST_TOKENS_PER_TEST_CASE,
+        on_object if on_test_case else None,
+        stats,
+        model=options["model"],
+        messages=[
+            {"role": "system", "content": instructions},
+            {"role": "user", "content": prompt}
+        ],
+        max_completion_tokens=_completion_token_limit(
+            len(requirements) * options["num_test_cases"] * settings.EST_TOKENS_PER_TEST_CASE
+        ),
+        response_format={"type": "json_object"}
+    )
+
+    # Split the response back out by requirement
+    return _parse_packed_test_cases(_decode_response(content, stats), req_ids, output_format)
+
+def _build_packed_instructions(num_test_cases, output_format="standard"):
+    """
+    Build the system message for packed requests.
+
+    Like _build_instructions, the message is the same for every packed
+    request of a run.
+
+    Args:
+        num_test_cases (int): Number of test cases per requirement
+        output_format (str, optional): One of settings.OUTPUT_FORMATS
+
+    Returns:
+        str: System message text
+    """
+    test_case_id = "test case ID as shown next to its requirement"
+    if output_format in ("compact", "structured"):
+        fields = _COMPACT_FIELDS.format(test_case_id=test_case_id)
+    else:
+        fields = _STANDARD_FIELDS.format(test_case_id=test_case_id)
+
+    return f"""{_SYSTEM_ROLE}
+
+    Create {num_test_cases} detailed test cases for EACH of the Linux requirements given by the user.
+
+    {fields}
+
+    Return only a JSON object whose keys are the requirement IDs shown in square
+    brackets (without the brackets) and whose values are JSON arrays of the test
+    cases for that requirement.
+    """
+
+def _build_packed_prompt(requirements, req_ids):
+    """
+    Build the user message listing the requirements of a packed request.
+
+    Args:
+        requirements (list): Requirements to generate test cases for
+        req_ids (list): Requirement IDs, in the same order as requirements
+
+    Returns:
+        str: User message text
+    """
+    requirement_lines = []
+    for req, req_id in zip(requirements, req_ids):
+        safe_req_id = ''.join(c for c in req_id if c.isalnum())
+        requirement_lines.append(
+            f"[{req_id}] (test case IDs like TC-{safe_req_id}-001)\n    {req.get('description', '')}"
         )
 
-        # Get the response content
-        content = response.choices[0].message.content
+    return "\n\n    ".join(requirement_lines) + "\n"
 
-        # Parse JSON
-        try:
-            data = json.loads(content)
-
-            # Find test cases in the response
-            test_cases = []
-
-            # Try to get test cases from the response
-            if isinstance(data, list):
-                test_cases = data
-            elif isinstance(data, dict):
-                # Look for any array in the response
-                for key, value in data.items():
-                    if isinstance(value, list):
-                        test_cases = value
-                        break
-
-            # Add requirement ID to each test case
-            for tc in test_cases:
-                if isinstance(tc, dict):
-                    tc["requirement_id"] = requirement.get("requirement_id")
-
-            return test_cases
-
-        except json.JSONDecodeError:
-            st.error(f"Invalid JSON response for {requirement.get('requirement_id')}")
-            return []
+def _parse_packed_test_cases(data, req_ids, output_format="standard"):
+    """
+    Split a packed response into test cases per requirement.
+
+    Args:
+        data: Decoded JSON response
+        req_ids (list): Requirement IDs that were requested
+        output_format (str, optional): Output format the test cases were requested in
+
+    Returns:
+        dict: Test cases keyed by requirement ID, tagged with that ID
+    """
+    if not isinstance(data, dict):
+        return {}
+
+    # Some models wrap the mapping in a single top-level key
+    if len(data) == 1 and not any(key in data for key in req_ids):
+        inner = next(iter(data.values()))
+        if isinstance(inner, dict):
+            data = inner
+
+    by_key = {_normalize_requirement_key(key): value for key, value in data.items()}
+
+    packed = {}
+    for req_id in req_ids:
+        test_cases = _parse_test_cases(by_key.get(_normalize_requirement_key(req_id)))
+
+        # Add requirement ID to each test case
+        packed[req_id] = _renumber_test_cases([
+            _normalize_test_case(tc, req_id, output_format)
+            for tc in test_cases if isinstance(tc, dict)
+        ], req_id, [])
+
+    return packed
+
+def _normalize_requirement_key(key):
+    """
+    Normalize a requirement ID used as a key in a packed response.
+
+    Keys are matched leniently (case, whitespace and brackets).
+
+    Args:
+        key (str): Key as returned by the model
+
+    Returns:
+        str: Normalized key
+    """
+    return str(key).strip().strip("[]").strip().lower()
+
+def _pack_requirements(requirements, indices, num_test_cases, pack_size):
+    """
+    Group requirements into units of work that share a single request.
+
+    Only short requirements are packed, and each pack stays within the
+    request token budget and the completion token limit. Long requirements get a unit of
+    their own.
+
+    Args:
+        requirements (list): All requirements
+        indices (list): Indices of the requirements to group
+        num_test_cases (int): Number of test cases per requirement
+        pack_size (int): Maximum number of requirements per pack (1 disables packing)
+
+    Returns:
+        list: Units, each a list of requirement indices
+    """
+    if pack_size <= 1:
+        return [[i] for i in indices]
+
+    completion_per_requirement = num_test_cases * settings.EST_TOKENS_PER_TEST_CASE
+    # Keep the expected output of a pack within the completion token limit
+    max_pack_completion = settings.MAX_TOKENS / settings.COMPLETION_TOKEN_HEADROOM
+
+    units = []
+    pack = []
+    pack_tokens = 0
+
+    for i in indices:
+        description_tokens = _estimate_tokens(requirements[i].get("description", ""))
+
+        # Long requirements are not worth packing
+        if description_tokens > settings.PACK_MAX_DESCRIPTION_TOKENS:
+            units.append([i])
+            continue
+
+        request_tokens = description_tokens + completion_per_requirement
+
+        # Start a new pack once the current one is full
+        if pack and (
+            len(pack) >= pack_size
+            or pack_tokens + request_tokens > settings.PACK_TOKEN_BUDGET
+            or (len(pack) + 1) * completion_per_requirement > max_pack_completion
+        ):
+            units.append(pack)
+            pack = []
+            pack_tokens = 0
+
+        pack.append(i)
+        pack_tokens += request_tokens
+
+    if pack:
+        units.append(pack)
+
+    return units
+
+def _get_generation_options(openai_config, num_test_cases):
+    """
+    Collect the options that shape each generation request.
+
+    Args:
+        openai_config (dict): Configuration for OpenAI API
+        num_test_cases (int): Number of test cases per requirement
+
+    Returns:
+        dict: model, num_test_cases and output_format
+    """
+    output_format = openai_config.get("output_format", settings.DEFAULT_OUTPUT_FORMAT)
+    if output_format not in settings.OUTPUT_FORMATS:
+        output_format = settings.DEFAULT_OUTPUT_FORMAT
+
+    return {
+        "model": openai_config.get("model", "gpt-4"),
+        "num_test_cases": num_test_cases,
+        "output_format": output_format
+    }
+
+def _get_pack_size(openai_config):
+    """
+    Determine how many requirements may share a single request.
+
+    Args:
+        openai_config (dict): Configuration for OpenAI API
+
+    Returns:
+        int: Maximum requirements per request (1 disables packing)
+    """
+    try:
+        pack_size = int(openai_config.get("pack_size", 1))
+    except (TypeError, ValueError):
+        pack_size = 1
+
+    return max(1, min(pack_size, settings.PACK_MAX_REQUIREMENTS))
+
+def _completion_token_limit(expected_completion_tokens):
+    """
+    Size max_completion_tokens from the expected output.
+
+    Args:
+        expected_completion_tokens (int): Expected size of the completion
+
+    Returns:
+        int: Completion token limit, at most settings.MAX_TOKENS
+    """
+    limit = max(settings.MIN_COMPLETION_TOKENS, int(expected_completion_tokens * settings.COMPLETION_TOKEN_HEADROOM))
+    return min(limit, settings.MAX_TOKENS)
+
+def _estimate_tokens(text):
+    """
+    Roughly estimate the number of tokens in a piece of text.
+
+    Args:
+        text (str): Text to estimate
+
+    Returns:
+        int: Estimated token count (about four characters per token)
+    """
+    return len(text or "") // 4 + 1
+
+def _parse_test_cases(data):
+    """
+    Find the list of test cases in a decoded JSON response.
+
+    Args:
+        data: Decoded JSON response
+
+    Returns:
+        list: Test cases found in the response
+    """
+    # Try to get test cases from the response
+    if isinstance(data, list):
+        return data
+
+    if isinstance(data, dict):
+        # Look for any array in the response
+        for key, value in data.items():
+            if isinstance(value, list):
+                return value
+
+    return []
+
+def _get_max_concurrency(openai_config, num_requirements):
+    """
+    Determine how many generation requests may be in flight at once.
+
+    Args:
+        openai_config (dict): Configuration for OpenAI API
+        num_requirements (int): Number of requirements to generate for
+
+    Returns:
+        int: Number of worker threads to use (at least 1)
+    """
+    max_concurrency = openai_config.get("max_concurrency", settings.DEFAULT_GENERATION_CONCURRENCY)
+
+    try:
+        max_concurrency = int(max_concurrency)
+    except (TypeError, ValueError):
+        max_concurrency = settings.DEFAULT_GENERATION_CONCURRENCY
+
+    max_concurrency = min(max_concurrency, settings.MAX_GENERATION_CONCURRENCY)
+
+    return max(1, min(max_concurrency, num_requirements))
+
+def _get_cache(openai_config):
+    """
+    Get the test case cache if caching is enabled for this request.
+
+    Args:
+        openai_config (dict): Configuration for OpenAI API
+
+    Returns:
+        TestCaseCache: Shared cache, or None if caching is disabled or unavailable
+    """
+    if not openai_config.get("use_cache", settings.CACHE_ENABLED):
+        return None
+
+    try:
+        return cache_service.get_cache()
+    except Exception as e:
+        st.warning(f"Test case cache unavailable: {str(e)}")
+        return None
+
+def _get_template_mode(openai_config):
+    """
+    Determine how the offline template library is used for this request.
+
+    Args:
+        openai_config (dict): Configuration for OpenAI API
+
+    Returns:
+        str: One of settings.TEMPLATE_MODES
+    """
+    template_mode = openai_config.get("template_mode", settings.DEFAULT_TEMPLATE_MODE)
+    if template_mode not in settings.TEMPLATE_MODES:
+        template_mode = settings.DEFAULT_TEMPLATE_MODE
+
+    return template_mode
+
+def _get_template_test_cases(template_mode, requirement, num_test_cases, default_id="REQ"):
+    """
+    Generate test cases for a requirement from the offline template library.
+
+    Args:
+        template_mode (str): Template mode from _get_template_mode
+        requirement (dict): Requirement to generate test cases for
+        num_test_cases (int): Maximum number of test cases
+        default_id (str, optional): Requirement ID to use if the requirement has none
+
+    Returns:
+        list: Template test cases, or None if templates are off or none applies
+    """
+    if template_mode == "off":
+        return None
+
+    try:
+        return template_service.generate_test_cases(requirement, num_test_cases, default_id)
+    except Exception:
+        return None
 
+def _get_retrieval_index(openai_config):
+    """
+    Get the index of past test cases if reusing them is enabled for this request.
+
+    Args:
+        openai_config (dict): Configuration for OpenAI API
+
+    Returns:
+        TestCaseIndex: Shared index, or None if retrieval is disabled or unavailable
+    """
+    if not openai_config.get("use_retrieval", settings.RETRIEVAL_ENABLED):
+        return None
+
+    try:
+        return retrieval_service.get_index()
     except Exception as e:
-        st.error(f"Error generating test cases: {str(e)}")
-        return []
\ No newline at end of file
+        st.warning(f"Past test case index unavailable: {str(e)}")
+        return None
+
+def _get_retrieved_test_cases(past_index, requirement, num_test_cases, default_id="REQ"):
+    """
+    Look up the test cases of a past requirement similar to a requirement.
+
+    Only past requirements with at least num_test_cases test cases qualify;
+    the first num_test_cases of them are copied over.
+
+    Args:
+        past_index (TestCaseIndex): Index of past test cases
+        requirement (dict): Requirement to look up
+        num_test_cases (int): Number of test cases requested
+        default_id (str, optional): Requirement ID to use if the requirement has none
+
+    Returns:
+        list: Past test cases tagged with the requirement ID, or None on a miss
+    """
+    req_id = requirement.get("requirement_id", default_id)
+
+    try:
+        test_cases, source_req_id, _ = past_index.find(str(requirement.get("description", "")), num_test_cases)
+    except Exception:
+        return None
+
+    if test_cases is None:
+        return None
+
+    return _retag_test_cases(test_cases[:num_test_cases], source_req_id, req_id)
+
+def _add_to_retrieval_index(past_index, requirement, test_cases):
+    """
+    Add generated test cases to the index of past test cases.
+
+    Args:
+        past_index (TestCaseIndex): Index of past test cases, or None if disabled
+        requirement (dict): Requirement the test cases were generated for
+        test_cases (list): Generated test cases
+    """
+    if past_index is None:
+        return
+
+    try:
+        past_index.add(requirement, test_cases)
+    except Exception:
+        # An index write failure must never fail generation
+        pass
+
+def _cache_key(requirement, options):
+    """
+    Build the cache key of a requirement's test cases.
+
+    Args:
+        requirement (dict): Requirement
+        options (dict): Generation options (see _get_generation_options)
+
+    Returns:
+        str: Cache key
+    """
+    return cache_service.make_cache_key(
+        options["model"], requirement.get("description", ""), options["num_test_cases"], options["output_format"]
+    )
+
+def _get_cached_test_cases(cache, requirement, options, default_id="REQ"):
+    """
+    Look up cached test cases for a requirement.
+
+    Args:
+        cache (TestCaseCache): Test case cache
+        requirement (dict): Requirement to look up
+        options (dict): Generation options (see _get_generation_options)
+        default_id (str, optional): Requirement ID to use if the requirement has none
+
+    Returns:
+        list: Cached test cases tagged with the requirement ID, or None on a miss
+    """
+    req_id = requirement.get("requirement_id", default_id)
+    key = _cache_key(requirement, options)
+
+    try:
+        test_cases, source_req_id = cache.get(key)
+    except Exception:
+        return None
+
+    if test_cases is None:
+        return None
+
+    return _retag_test_cases(test_cases, source_req_id, req_id)
+
+def _put_cached_test_cases(cache, requirement, options, test_cases):
+    """
+    Store generated test cases for a requirement in the cache.
+
+    Args:
+        cache (TestCaseCache): Test case cache
+        requirement (dict): Requirement the test cases were generated for
+        options (dict): Generation options (see _get_generation_options)
+        test_cases (list): Generated test cases
+    """
+    key = _cache_key(requirement, options)
+
+    try:
+        cache.put(key, test_cases, requirement.get("requirement_id"))
+    except Exception:
+        # A cache write failure must never fail generation
+        pass
+
+def _retag_test_cases(test_cases, source_req_id, req_id):
+    """
+    Copy test cases generated for one requirement over to another requirement.
+
+    The requirement ID is replaced and test case IDs of the form
+    TC-<source>-NNN are renamed to TC-<target>-NNN.
+
+    Args:
+        test_cases (list): Test cases to copy
+        source_req_id (str): Requirement the test cases were generated for
+        req_id (str): Requirement to assign the copies to
+
+    Returns:
+        list: Retagged copies of the test cases
+    """
+    source_prefix = f"TC-{''.join(c for c in (source_req_id or '') if c.isalnum())}-"
+    target_prefix = f"TC-{''.join(c for c in (req_id or '') if c.isalnum())}-"
+
+    retagged = copy.deepcopy(test_cases)
+    for tc in retagged:
+        if not isinstance(tc, dict):
+            continue
+
+        tc["requirement_id"] = req_id
+
+        test_case_id = str(tc.get("test_case_id", ""))
+        if source_req_id and test_case_id.startswith(source_prefix):
+            tc["test_case_id"] = target_prefix + test_case_id[len(source_prefix):]
+
+    return retagged
@@ -0,0 +1,147 @@
+"""
+Single-round-trip execution of test scripts.
+This module packs the test scripts of a suite into one compressed bundle,
+sends it to the remote system over the stdin of a single command, and reads
+back one JSON line per test as the remote runner finishes them.
+"""
+
+import gzip
+import json
+import shlex
+from config import settings
+
+# Runs on the remote system; kept compatible with Python 3.5+
+_RUNNER = r'''
+import os, sys, json, gzip, time, shutil, tempfile, threading, subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+jobs, timeout, max_output = int(sys.argv[1]), float(sys.argv[2]), int(sys.argv[3])
+bundle = json.loads(gzip.decompress(sys.stdin.buffer.read()).decode("utf-8"))
+workdir = tempfile.mkdtemp(prefix="test-bundle-")
+lock = threading.Lock()
+
+def decode(data):
+    # Keep the end, where a failing test reports why, as stream_service does
+    text = data.decode("utf-8", "replace")
+    if len(text) <= max_output:
+        return text
+    dropped = len(text) - max_output
+    return "[... %d characters dropped ...]\n%s" % (dropped, text[dropped:])
+
+def run(test):
+    path = os.path.join(workdir, test["file"])
+    with open(path, "w") as f:
+        f.write(test["code"])
+    started = time.time()
+    try:
+        process = subprocess.Popen([sys.executable, path], stdout=subprocess.PIPE, stderr=subprocess.PIPE, cwd=workdir)
+        try:
+            out, err = process.communicate(timeout=timeout)
+            code = process.returncode
+        except subprocess.TimeoutExpired:
+            process.kill()
+            out, err = process.communicate()
+            code, err = -1, err + ("\nTimed out after %d seconds" % timeout).encode()
+    except Exception as e:
+        code, out, err = -1, b"", str(e).encode()
+    line = json.dumps({"index": test["index"], "exit_status": code, "stdout": decode(out),
+                       "stderr": decode(err), "duration": time.time() - started})
+    with lock:
+        sys.stdout.write(line + "\n")
+        sys.stdout.flush()
+
+try:
+    with ThreadPoolExecutor(max(1, jobs)) as executor:
+        list(executor.map(run, bundle["tests"]))
+finally:
+    shutil.rmtree(workdir, ignore_errors=True)
+'''
+
+def build_bundle(scripts):
+    """
+    Pack test scripts into one compressed bundle.
+
+    Args:
+        scripts (list): (file_name, python_code) tuples, in test order
+
+    Returns:
+        bytes: Gzip-compressed JSON bundle
+    """
+    tests = [
+        {"index": index, "file": file_name, "code": python_code}
+        for index, (file_name, python_code) in enumerate(scripts)
+    ]
+    return gzip.compress(json.dumps({"tests": tests}).encode("utf-8"))
+
+def runner_command(jobs, timeout=settings.BUNDLE_TEST_TIMEOUT, max_output=settings.REMOTE_MAX_OUTPUT):
+    """
+    Build the remote command running a bundle read from stdin.
+
+    Args:
+        jobs (int): Tests the runner executes at once
+        timeout (float, optional): Seconds before the runner stops a test
+        max_output (int, optional): Characters of stdout and stderr kept per
+            test (the end is kept)
+
+    Returns:
+        str: Shell command
+    """
+    return f"python3 -c {shlex.quote(_RUNNER)} {int(jobs)} {float(timeout)} {int(max_output)}"
+
+def run_bundle(ssh_client, scripts, jobs, timeout=settings.BUNDLE_TEST_TIMEOUT):
+    """
+    Run test scripts on the remote system with one command.
+
+    The bundle is sent over the command's stdin, so uploading and running
+    take a single channel. Never touches the UI.
+
+    Args:
+        ssh_client (paramiko.SSHClient): Open SSH client connection
+        scripts (list): (file_name, python_code) tuples, in test order
+        jobs (int): Tests the remote runner executes at once
+        timeout (float, optional): Seconds before the runner stops a test
+
+    Yields:
+        tuple: (index, result) for each test as it finishes, where result
+               has exit_status, output, error and duration; tests the
+               runner never reported come last with exit status -1
+    """
+    stdin, stdout, stderr = ssh_client.exec_command(runner_command(jobs, timeout))
+    reported = set()
+
+    try:
+        try:
+            stdin.write(build_bundle(scripts))
+            stdin.flush()
+            stdin.channel.shutdown_write()
+        except OSError:
+            # The runner exited before reading the bundle; its stderr says why
+            pass
+
+        for line in stdout:
+            try:
+                report = json.loads(line)
+            except ValueError:
+                continue
+
+            reported.add(report["index"])
+            yield report["index"], {
+                "exit_status": report["exit_status"],
+                "output": report["stdout"],
+                "error": report["stderr"],
+                "duration": report["duration"]
+            }
+
+        runner_error = stderr.read().decode("utf-8", "replace").strip()
+    finally:
+        stdout.channel.close()
+
+    # The runner died or could not start (no python3, out of disk, ...)
+    for index in range(len(scripts)):
+        if index not in reported:
+            yield index, {
+                "exit_status": -1,
+                "output": "",
+                "error": runner_error or "The remote runner did not report this test",
+                "duration": 0.0
+            }
@@ -0,0 +1,239 @@
+"""
+Persistent cache for generated test cases.
+This module stores generated test cases on disk in a SQLite database so that
+unchanged requirements do not need to be regenerated through the OpenAI API.
+"""
+
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from contextlib import closing
+import streamlit as st
+from config import settings
+
+class TestCaseCache:
+    """
+    Content-addressed, SQLite-backed cache of generated test cases.
+
+    Entries are keyed by a hash of everything that influences the generated
+    output (model, prompt template version, requirement description and number
+    of test cases). Entries are evicted by age and, once the cache grows past
+    its size limit, least recently used first.
+    """
+
+    def __init__(self, cache_dir=settings.CACHE_DIR, max_entries=settings.CACHE_MAX_ENTRIES,
+                 max_age_days=settings.CACHE_MAX_AGE_DAYS):
+        """
+        Initialize the cache and create the database if needed.
+
+        Args:
+            cache_dir (str): Directory holding the cache database
+            max_entries (int): Maximum number of entries to keep
+            max_age_days (float): Maximum age of an entry in days
+        """
+        os.makedirs(cache_dir, exist_ok=True)
+        self.db_path = os.path.join(cache_dir, "test_cases.sqlite3")
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_days * 24 * 60 * 60
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS test_cases (
+                    cache_key TEXT PRIMARY KEY,
+                    requirement_id TEXT,
+                    test_cases TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_accessed_at ON test_cases (accessed_at)")
+
+    def _connect(self):
+        """
+        Open a new database connection.
+
+        A connection per operation keeps the cache safe to use from the
+        generation worker threads.
+
+        Returns:
+            sqlite3.Connection: Database connection
+        """
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def get(self, cache_key):
+        """
+        Look up cached test cases.
+
+        Args:
+            cache_key (str): Key returned by make_cache_key
+
+        Returns:
+            tuple: (test_cases, requirement_id) on a hit, or (None, None) on a miss
+        """
+        now = time.time()
+
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute(
+                "SELECT test_cases, requirement_id, created_at FROM test_cases WHERE cache_key = ?",
+                (cache_key,)
+            ).fetchone()
+
+            # Treat expired entries as misses
+            if row and now - row[2] > self.max_age_seconds:
+                conn.execute("DELETE FROM test_cases WHERE cache_key = ?", (cache_key,))
+                row = None
+
+            if row:
+                conn.execute("UPDATE test_cases SET accessed_at = ? WHERE cache_key = ?", (now, cache_key))
+
+        with self._lock:
+            if row:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if not row:
+            return None, None
+
+        return json.loads(row[0]), row[1]
+
+    def contains(self, cache_key):
+        """
+        Check whether test cases are cached, without counting a lookup.
+
+        Args:
+            cache_key (str): Key returned by make_cache_key
+
+        Returns:
+            bool: True if an unexpired entry exists
+        """
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute(
+                "SELECT created_at FROM test_cases WHERE cache_key = ?",
+                (cache_key,)
+            ).fetchone()
+
+        return bool(row) and time.time() - row[0] <= self.max_age_seconds
+
+    def put(self, cache_key, test_cases, requirement_id=None):
+        """
+        Store generated test cases.
+
+        Args:
+            cache_key (str): Key returned by make_cache_key
+            test_cases (list): Test cases to store
+            requirement_id (str, optional): Requirement the test cases were generated for
+        """
+        # Never cache empty results, they are usually failures
+        if not test_cases:
+            return
+
+        now = time.time()
+
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO test_cases VALUES (?, ?, ?, ?, ?)",
+                (cache_key, requirement_id, json.dumps(test_cases), now, now)
+            )
+
+        self.evict()
+
+    def evict(self):
+        """
+        Remove expired entries and trim the cache to its maximum size.
+
+        Returns:
+            int: Number of entries removed
+        """
+        cutoff = time.time() - self.max_age_seconds
+
+        with closing(self._connect()) as conn, conn:
+            removed = conn.execute("DELETE FROM test_cases WHERE created_at < ?", (cutoff,)).rowcount
+
+            # Drop the least recently used entries beyond the size limit
+            count = conn.execute("SELECT COUNT(*) FROM test_cases").fetchone()[0]
+            if count > self.max_entries:
+                removed += conn.execute(
+                    """
+                    DELETE FROM test_cases WHERE cache_key IN (
+                        SELECT cache_key FROM test_cases ORDER BY accessed_at ASC LIMIT ?
+                    )
+                    """,
+                    (count - self.max_entries,)
+                ).rowcount
+
+        return removed
+
+    def clear(self):
+        """
+        Remove all entries and reset the hit/miss counters.
+        """
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM test_cases")
+
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """
+        Get cache statistics.
+
+        Returns:
+            dict: Entry count, hits, misses and hit rate
+        """
+        with closing(self._connect()) as conn, conn:
+            entries = conn.execute("SELECT COUNT(*) FROM test_cases").fetchone()[0]
+
+        with self._lock:
+            hits, misses = self.hits, self.misses
+
+        lookups = hits + misses
+
+        return {
+            "entries": entries,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": (hits / lookups * 100) if lookups > 0 else 0.0
+        }
+
+def make_cache_key(model, description, num_test_cases, output_format=settings.DEFAULT_OUTPUT_FORMAT,
+                   prompt_version=settings.PROMPT_TEMPLATE_VERSION):
+    """
+    Build the cache key for a generation request.
+
+    Args:
+        model (str): Model name
+        description (str): Requirement description
+        num_test_cases (int): Number of test cases requested
+        output_format (str, optional): Output format the test cases are requested in
+        prompt_version (str, optional): Version of the prompt template
+
+    Returns:
+        str: Hex digest identifying the request
+    """
+    payload = json.dumps(
+        [model, prompt_version, output_format, (description or "").strip(), int(num_test_cases)],
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+@st.cache_resource
+def get_cache():
+    """
+    Get the process-wide test case cache.
+
+    Returns:
+        TestCaseCache: Shared cache instance
+    """
+    return TestCaseCache()
@@ -0,0 +1,260 @@
+"""
+Test execution across a fleet of hosts.
+This module runs the same test cases on every host of an inventory at once,
+bounded by a limit on hosts worked on at once, a limit on test cases running
+across the fleet and a channel limit per host.
+"""
+
+import queue
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+import streamlit as st
+from config import settings
+from services import ssh_pool_service, ssh_service
+
+def build_host_configs(hosts, group_credentials):
+    """
+    Build the SSH configuration of every inventory host.
+
+    Args:
+        hosts (list): Hosts from file_parser.parse_inventory
+        group_credentials (dict): Group name -> dict with username, auth_type,
+            password and private_key; a username set in the inventory wins
+
+    Returns:
+        list: SSH configurations, each with the host name and group added
+    """
+    configs = []
+
+    for host in hosts:
+        credentials = group_credentials.get(host["group"], {})
+        configs.append({
+            "name": host["name"],
+            "group": host["group"],
+            "hostname": host["hostname"],
+            "port": host["port"],
+            "username": host.get("username") or credentials.get("username", ""),
+            "auth_type": credentials.get("auth_type", "password"),
+            "password": credentials.get("password", ""),
+            "private_key": credentials.get("private_key", "")
+        })
+
+    return configs
+
+@contextmanager
+def _open_connection(pool, ssh_config):
+    """
+    Use a pooled connection to a host, or a new one without a pool.
+
+    Args:
+        pool (SSHConnectionPool): Connection pool, or None
+        ssh_config (dict): SSH configuration of the host
+
+    Yields:
+        paramiko.SSHClient: Connected client
+    """
+    if pool is not None:
+        with pool.connection(ssh_config) as ssh_client:
+            yield ssh_client
+        return
+
+    ssh_client = ssh_pool_service.open_client(ssh_config)
+    try:
+        yield ssh_client
+    finally:
+        ssh_client.close()
+
+def _run_host(pool, ssh_config, test_cases, sessions_per_host, slots, mode, events):
+    """
+    Run the test cases on one host (runs in a worker thread).
+
+    Progress is reported through the events queue as ("connected", host),
+    ("result", host, index, result), ("error", host, message) and
+    ("done", host) tuples.
+
+    Args:
+        pool (SSHConnectionPool): Connection pool, or None
+        ssh_config (dict): SSH configuration of the host
+        test_cases (list): Test cases to run
+        sessions_per_host (int): Test cases to run at once on the host
+        slots (threading.Semaphore): Limit on test cases running across the fleet
+        mode (str): Execution mode, see ssh_service.run_test_cases
+        events (queue.Queue): Queue to report progress to
+    """
+    host = ssh_config["name"]
+
+    try:
+        with _open_connection(pool, ssh_config) as ssh_client:
+            events.put(("connected", host))
+            for i, result in ssh_service.run_test_cases(ssh_client, test_cases, sessions_per_host, slots, mode):
+                events.put(("result", host, i, result))
+    except Exception as e:
+        events.put(("error", host, str(e)))
+    finally:
+        events.put(("done", host))
+
+def _not_run_result(test_case, index, ssh_config, error):
+    """
+    Build the result of a test case that could not run on a host.
+
+    Args:
+        test_case (dict): Test case
+        index (int): Position of the test case in the suite
+        ssh_config (dict): SSH configuration of the host
+        error (str): Why it did not run
+
+    Returns:
+        dict: Test execution result
+    """
+    return {
+        "test_case_id": test_case.get("test_case_id", f"TC-{index+1}"),
+        "title": test_case.get("title", ""),
+        "requirement_id": test_case.get("requirement_id", ""),
+        "host": ssh_config["name"],
+        "group": ssh_config["group"],
+        "exit_status": -1,
+        "output": "",
+        "error": error,
+        "overall_status": "Not Run",
+        "notes": f"Connection error: {error}"
+    }
+
+def summarize_hosts(fleet_results, host_configs=None, states=None):
+    """
+    Summarize fleet results per host.
+
+    Args:
+        fleet_results (dict): (host, test case index) -> result
+        host_configs (list, optional): SSH configurations, to list hosts
+            without results too, in inventory order
+        states (dict, optional): Host -> state text to show
+
+    Returns:
+        pandas.DataFrame: One row per host with its group, state and counts
+    """
+    rows = {}
+
+    for config in host_configs or []:
+        rows[config["name"]] = {"Host": config["name"], "Group": config["group"], "Passed": 0, "Failed": 0, "Not Run": 0}
+
+    for (host, _), result in fleet_results.items():
+        row = rows.setdefault(host, {"Host": host, "Group": result.get("group", ""), "Passed": 0, "Failed": 0, "Not Run": 0})
+        status = result.get("overall_status", "Not Run")
+        column = {"Pass": "Passed", "Fail": "Failed"}.get(status, "Not Run")
+        row[column] += 1
+
+    if states is not None:
+        for host, row in rows.items():
+            row["State"] = states.get(host, "waiting")
+
+    return pd.DataFrame(list(rows.values()))
+
+def execute_fleet(test_cases, host_configs, max_hosts=settings.FLEET_MAX_HOSTS,
+                  max_concurrency=settings.FLEET_MAX_CONCURRENCY,
+                  sessions_per_host=settings.FLEET_SESSIONS_PER_HOST, mode=settings.DEFAULT_EXECUTION_MODE):
+    """
+    Execute test cases on every host of a fleet.
+
+    Args:
+        test_cases (list): List of test case dictionaries
+        host_configs (list): SSH configurations from build_host_configs
+        max_hosts (int, optional): Hosts connected and running at once
+        max_concurrency (int, optional): Test cases running at once across the fleet
+        sessions_per_host (int, optional): Test cases running at once on one host,
+            lowered automatically to the host's MaxSessions in parallel mode
+        mode (str, optional): Execution mode, see ssh_service.run_test_cases
+
+    Returns:
+        dict: (host, test case index) -> test execution result, with host and
+              group added, in inventory and suite order
+    """
+    fleet_results = {}
+
+    if not test_cases:
+        st.warning("No test cases to execute")
+        return fleet_results
+
+    host_configs = [config for config in host_configs if config.get("hostname") and config.get("username")]
+    if not host_configs:
+        st.error("The inventory has no host with a hostname and username")
+        return fleet_results
+
+    pool = ssh_pool_service.get_pool() if settings.SSH_POOL_ENABLED else None
+    slots = threading.BoundedSemaphore(max(1, int(max_concurrency)))
+    events = queue.Queue()
+    configs = {config["name"]: config for config in host_configs}
+    states = {}
+    completed = {name: 0 for name in configs}
+    total = len(test_cases) * len(host_configs)
+    finished = 0
+
+    progress_bar = st.progress(0)
+    status_text = st.empty()
+    host_table = st.empty()
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, min(int(max_hosts), len(host_configs)))) as executor:
+            for config in host_configs:
+                executor.submit(_run_host, pool, config, test_cases, sessions_per_host, slots, mode, events)
+
+            hosts_left = len(host_configs)
+
+            # Workers never touch Streamlit; progress is reported from here
+            while hosts_left:
+                try:
+                    event = events.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+
+                kind, host = event[0], event[1]
+                config = configs[host]
+
+                if kind == "connected":
+                    states[host] = "running"
+                elif kind == "result":
+                    _, _, i, result = event
+                    result["host"], result["group"] = host, config["group"]
+                    fleet_results[(host, i)] = result
+                    completed[host] += 1
+                    finished += 1
+                    states[host] = f"running ({completed[host]}/{len(test_cases)})"
+                elif kind == "error":
+                    states[host] = f"failed: {event[2]}"
+                elif kind == "done":
+                    hosts_left -= 1
+                    if not states.get(host, "").startswith("failed"):
+                        states[host] = "done"
+
+                    # Test cases that never ran on the host are reported as such
+                    for i, test_case in enumerate(test_cases):
+                        if (host, i) not in fleet_results:
+                            fleet_results[(host, i)] = _not_run_result(test_case, i, config, states[host])
+                            finished += 1
+
+                progress_bar.progress(min(finished / total, 1.0))
+                status_text.text(
+                    f"Executed {finished}/{total} test cases on {len(host_configs)} hosts "
+                    f"({len(host_configs) - hosts_left} hosts finished)"
+                )
+
+                # Redraw the host table once the queue is drained
+                if events.empty():
+                    host_table.dataframe(summarize_hosts(fleet_results, host_configs, states), use_container_width=True)
+
+        failed_hosts = sum(1 for state in states.values() if state.startswith("failed"))
+        st.success(f"Executed {len(test_cases)} test cases on {len(host_configs) - failed_hosts} hosts")
+        if failed_hosts:
+            st.warning(f"{failed_hosts} hosts could not be reached; their test cases are marked Not Run")
+
+    except Exception as e:
+        st.error(f"Error during fleet execution: {str(e)}")
+
+    finally:
+        progress_bar.empty()
+        status_text.empty()
+        host_table.empty()
+
+    order = {config["name"]: position for position, config in enumerate(host_configs)}
+    return dict(sorted(fleet_results.items(), key=lambda item: (order[item[0][0]], item[0][1])))
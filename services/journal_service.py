@@ -0,0 +1,239 @@
+"""
+Durable journals for test case generation runs.
+This module records the results of a generation run requirement by requirement
+in an append-only file, so an interrupted run can be resumed without paying to
+regenerate the requirements that were already finished.
+"""
+
+import os
+import json
+import time
+import uuid
+import hashlib
+import threading
+from config import settings
+from utils import helpers
+
+class RunJournal:
+    """
+    Append-only JSON Lines journal for one generation run.
+
+    The first line describes the run. Every requirement that completes is
+    appended (and flushed to disk) as its own line, and a final line marks the
+    run as complete. A torn last line left by a crash is ignored on reading.
+    """
+
+    def __init__(self, path):
+        """
+        Initialize a journal backed by the given file.
+
+        Args:
+            path (str): Path of the journal file
+        """
+        self.path = path
+        self.run_id = os.path.splitext(os.path.basename(path))[0]
+        self._lock = threading.Lock()
+
+    @classmethod
+    def create(cls, model, num_test_cases, total, owner=None, runs_dir=settings.RUNS_DIR):
+        """
+        Start a new run journal.
+
+        Args:
+            model (str): Model used for the run
+            num_test_cases (int): Number of test cases per requirement
+            total (int): Number of requirements in the run
+            owner (str, optional): Owner of the run, see owner_id
+            runs_dir (str, optional): Directory holding run journals
+
+        Returns:
+            RunJournal: Journal for the new run
+        """
+        os.makedirs(runs_dir, exist_ok=True)
+        run_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+        journal = cls(os.path.join(runs_dir, f"{run_id}.jsonl"))
+        journal._append({
+            "type": "run",
+            "run_id": run_id,
+            "owner": owner,
+            "created_at": time.time(),
+            "model": model,
+            "num_test_cases": num_test_cases,
+            "total": total
+        })
+
+        _prune_runs(runs_dir)
+        return journal
+
+    @classmethod
+    def open(cls, run_id, runs_dir=settings.RUNS_DIR):
+        """
+        Open an existing run journal.
+
+        Args:
+            run_id (str): ID of the run
+            runs_dir (str, optional): Directory holding run journals
+
+        Returns:
+            RunJournal: Journal for the run, or None if it does not exist
+        """
+        path = os.path.join(runs_dir, f"{os.path.basename(run_id)}.jsonl")
+        if not os.path.exists(path):
+            return None
+        return cls(path)
+
+    def record(self, requirement, test_cases):
+        """
+        Record the test cases generated for a requirement.
+
+        Args:
+            requirement (dict): Requirement that was completed
+            test_cases (list): Test cases generated for it
+        """
+        self._append({
+            "type": "requirement",
+            "requirement_id": requirement.get("requirement_id"),
+            "fingerprint": helpers.requirement_fingerprint(requirement),
+            "test_cases": test_cases
+        })
+
+    def finish(self):
+        """
+        Mark the run as complete.
+        """
+        self._append({"type": "complete", "completed_at": time.time()})
+
+    def read(self):
+        """
+        Read the journal.
+
+        Returns:
+            dict: Run metadata plus 'completed' (test cases keyed by
+                (requirement_id, fingerprint)) and 'finished' (bool)
+        """
+        info = {"run_id": self.run_id, "completed": {}, "finished": False}
+
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Torn write from an interrupted run
+                        continue
+
+                    if entry.get("type") == "run":
+                        info.update({k: v for k, v in entry.items() if k != "type"})
+                    elif entry.get("type") == "requirement":
+                        key = (entry.get("requirement_id"), entry.get("fingerprint"))
+                        info["completed"][key] = entry.get("test_cases", [])
+                    elif entry.get("type") == "complete":
+                        info["finished"] = True
+        except OSError:
+            pass
+
+        return info
+
+    def _append(self, entry):
+        """
+        Append an entry and force it to disk.
+
+        Args:
+            entry (dict): Entry to append
+        """
+        line = json.dumps(entry) + "\n"
+
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+def owner_id(api_key):
+    """
+    Identify the owner of a run by the API key it is generated with.
+
+    Runs are shared by the sessions using the same API key, which pay for
+    them, and survive a reload of the page; the key itself is not stored.
+
+    Args:
+        api_key (str): OpenAI API key
+
+    Returns:
+        str: Owner identifier
+    """
+    return hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:16]
+
+def find_resumable_run(model, num_test_cases, owner, runs_dir=settings.RUNS_DIR,
+                       idle_after=settings.RUNS_RESUME_IDLE_AFTER):
+    """
+    Find the most recent interrupted run of an owner with the same generation settings.
+
+    Journals written to recently belong to runs that may still be going on
+    and are skipped.
+
+    Args:
+        model (str): Model name
+        num_test_cases (int): Number of test cases per requirement
+        owner (str): Owner of the run, see owner_id
+        runs_dir (str, optional): Directory holding run journals
+        idle_after (float, optional): Seconds without writes after which a
+            run counts as interrupted
+
+    Returns:
+        dict: Journal contents (see RunJournal.read), or None if there is no
+              interrupted run with at least one completed requirement
+    """
+    for path in _list_runs(runs_dir):
+        try:
+            if time.time() - os.path.getmtime(path) < idle_after:
+                continue
+        except OSError:
+            continue
+
+        info = RunJournal(path).read()
+
+        if info.get("owner") != owner:
+            continue
+
+        if info["finished"] or not info["completed"]:
+            continue
+
+        if info.get("model") == model and info.get("num_test_cases") == num_test_cases:
+            return info
+
+    return None
+
+def _list_runs(runs_dir):
+    """
+    List run journal files, newest first.
+
+    Args:
+        runs_dir (str): Directory holding run journals
+
+    Returns:
+        list: Paths of the journal files
+    """
+    if not os.path.isdir(runs_dir):
+        return []
+
+    paths = [
+        os.path.join(runs_dir, name)
+        for name in os.listdir(runs_dir)
+        if name.endswith(".jsonl")
+    ]
+    return sorted(paths, key=os.path.getmtime, reverse=True)
+
+def _prune_runs(runs_dir):
+    """
+    Delete the oldest journals beyond the configured number to keep.
+
+    Args:
+        runs_dir (str): Directory holding run journals
+    """
+    for path in _list_runs(runs_dir)[settings.RUNS_KEEP:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
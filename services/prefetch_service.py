@@ -0,0 +1,190 @@
+"""
+Background generation of test cases.
+This module starts generating test cases in a background thread as soon as
+requirements are loaded, storing them in the test case cache, so that a later
+generation run mostly finds its results there.
+"""
+
+import copy
+import threading
+import streamlit as st
+from config import settings
+from services import ai_service, cache_service, retrieval_service
+from utils import helpers
+
+class PrefetchJob:
+    """
+    Background thread generating test cases into the cache.
+
+    The job never touches Streamlit; the UI reads its progress through
+    status().
+    """
+
+    def __init__(self, requirements, openai_config, cache, past_index=None, queue_id="background"):
+        """
+        Prepare a job.
+
+        Args:
+            requirements (list): Requirements to generate test cases for
+            openai_config (dict): Configuration for OpenAI API
+            cache (TestCaseCache): Cache to store the test cases in
+            past_index (TestCaseIndex, optional): Index of past test cases to reuse and add them to
+            queue_id (str, optional): Identifier of the job in the fair-share queue
+        """
+        # Copies, so later edits in the session cannot race with the thread
+        self.requirements = copy.deepcopy(requirements)
+        self.openai_config = dict(openai_config)
+        self.cache = cache
+        self.past_index = past_index
+        self.queue_id = queue_id
+        self.done = 0
+        self.total = None
+        self.failed = 0
+        self.generated = 0
+        self.error = None
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="test-case-prefetch", daemon=True)
+
+    def start(self):
+        """
+        Start generating in the background.
+        """
+        self._thread.start()
+
+    def _run(self):
+        """
+        Generate the test cases (runs in the background thread).
+        """
+        try:
+            generated = ai_service.prefetch_test_cases(
+                self.requirements,
+                self.openai_config,
+                self.cache,
+                self.past_index,
+                cancelled=self._cancelled,
+                on_progress=self._on_progress,
+                queue_id=self.queue_id
+            )
+            with self._lock:
+                self.generated = generated
+        except Exception as e:
+            with self._lock:
+                self.error = str(e)
+
+    def _on_progress(self, done, total, failed):
+        """
+        Record progress reported by ai_service.prefetch_test_cases.
+
+        Args:
+            done (int): Requirements completed so far
+            total (int): Requirements to generate
+            failed (int): Requirements that failed so far
+        """
+        with self._lock:
+            self.done, self.total, self.failed = done, total, failed
+
+    def cancel(self, wait=False, timeout=settings.PREFETCH_STOP_TIMEOUT):
+        """
+        Stop sending new requests.
+
+        Args:
+            wait (bool, optional): Wait for the requests in flight to finish
+            timeout (float, optional): Maximum time to wait in seconds
+        """
+        if not self.running:
+            return
+
+        self._cancelled.set()
+        if wait:
+            self._thread.join(timeout)
+
+    @property
+    def running(self):
+        """
+        bool: True while the background thread is alive.
+        """
+        return self._thread.is_alive()
+
+    def status(self):
+        """
+        Get the progress of the job.
+
+        Returns:
+            dict: done, total (None until known), failed, generated, error,
+                  running and cancelled
+        """
+        with self._lock:
+            return {
+                "done": self.done,
+                "total": self.total,
+                "failed": self.failed,
+                "generated": self.generated,
+                "error": self.error,
+                "running": self.running,
+                "cancelled": self._cancelled.is_set()
+            }
+
+def start_prefetch(requirements, openai_config):
+    """
+    Start background generation for the requirements of this session.
+
+    A job already running for the session is cancelled first. Requires an
+    API key and the test case cache.
+
+    Args:
+        requirements (list): Requirements to generate test cases for
+        openai_config (dict): Configuration for OpenAI API, with the generation options
+
+    Returns:
+        PrefetchJob: The started job, or None if it could not be started
+    """
+    stop_prefetch()
+
+    if not requirements or not openai_config.get("api_key"):
+        return None
+
+    if not openai_config.get("use_cache", settings.CACHE_ENABLED):
+        st.warning("Background generation needs the test case cache; enable it in the Test Cases tab.")
+        return None
+
+    try:
+        cache = cache_service.get_cache()
+    except Exception as e:
+        st.warning(f"Test case cache unavailable, background generation not started: {str(e)}")
+        return None
+
+    past_index = None
+    if openai_config.get("use_retrieval", settings.RETRIEVAL_ENABLED):
+        try:
+            past_index = retrieval_service.get_index()
+        except Exception:
+            past_index = None
+
+    # Background work takes its turns separately from the session's own runs
+    queue_id = f"{helpers.get_session_id()}/background"
+    job = PrefetchJob(requirements, openai_config, cache, past_index, queue_id)
+    job.start()
+    st.session_state.prefetch_job = job
+    return job
+
+def stop_prefetch(wait=False):
+    """
+    Cancel the background generation of this session, if any.
+
+    Args:
+        wait (bool, optional): Wait for its requests in flight so their
+            results are in the cache before returning
+    """
+    job = st.session_state.get("prefetch_job")
+    if job is not None:
+        job.cancel(wait=wait)
+
+def get_prefetch_job():
+    """
+    Get the background generation job of this session.
+
+    Returns:
+        PrefetchJob: The latest job, or None if none was started
+    """
+    return st.session_state.get("prefetch_job")
@@ -0,0 +1,186 @@
+"""
+Fair-share queue for generation work.
+This module shares the generation capacity of one API key between all
+Streamlit sessions of the process, so a session generating for thousands of
+requirements cannot starve the others.
+"""
+
+import time
+import hashlib
+import threading
+from collections import deque
+from config import settings
+
+class FairShareQueue:
+    """
+    Weighted round-robin admission of work from several sessions.
+
+    At most max_concurrency units of work run at once across all sessions.
+    Whenever a slot frees up, it goes to the next session in rotation that
+    has work waiting. A session may take up to its weight in consecutive
+    turns before the rotation moves on. Within a session, work runs in the
+    order it was queued.
+    """
+
+    def __init__(self, max_concurrency=settings.GLOBAL_GENERATION_CONCURRENCY):
+        """
+        Initialize an empty queue.
+
+        Args:
+            max_concurrency (int): Units of work allowed to run at once
+        """
+        self.max_concurrency = max(1, int(max_concurrency))
+        self._cond = threading.Condition()
+        self._active = 0
+        self._running = {}
+        self._waiting = {}
+        self._weights = {}
+        self._credits = {}
+        self._rotation = deque()
+        self._granted = set()
+        self._last_used = time.monotonic()
+
+    def acquire(self, queue_id, weight=1):
+        """
+        Wait for a slot.
+
+        Args:
+            queue_id (str): Identifier of the session (or job) the work belongs to
+            weight (int, optional): Consecutive turns the session may take per round
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        ticket = object()
+        start = time.monotonic()
+
+        with self._cond:
+            if queue_id not in self._waiting:
+                self._waiting[queue_id] = deque()
+            if queue_id not in self._rotation:
+                self._rotation.append(queue_id)
+                self._credits[queue_id] = max(1, int(weight))
+            self._weights[queue_id] = max(1, int(weight))
+            self._waiting[queue_id].append(ticket)
+            self._last_used = time.monotonic()
+
+            self._dispatch()
+            while ticket not in self._granted:
+                self._cond.wait()
+            self._granted.discard(ticket)
+
+        return time.monotonic() - start
+
+    def release(self, queue_id):
+        """
+        Give back a slot taken with acquire().
+
+        Args:
+            queue_id (str): Identifier passed to acquire()
+        """
+        with self._cond:
+            self._active -= 1
+            self._running[queue_id] -= 1
+            if not self._running[queue_id]:
+                del self._running[queue_id]
+            self._last_used = time.monotonic()
+            self._dispatch()
+
+    def _dispatch(self):
+        """
+        Hand free slots to waiting work in weighted round-robin order
+        (caller holds the lock).
+        """
+        granted = False
+
+        while self._active < self.max_concurrency and self._rotation:
+            queue_id = self._rotation[0]
+            waiting = self._waiting.get(queue_id)
+
+            # Sessions leave the rotation when they have nothing waiting;
+            # acquire() sets the weight again when they come back
+            if not waiting:
+                self._rotation.popleft()
+                self._waiting.pop(queue_id, None)
+                self._credits.pop(queue_id, None)
+                self._weights.pop(queue_id, None)
+                continue
+
+            self._granted.add(waiting.popleft())
+            self._active += 1
+            self._running[queue_id] = self._running.get(queue_id, 0) + 1
+            granted = True
+
+            # Move on once the session has used up its turns for this round
+            self._credits[queue_id] -= 1
+            if self._credits[queue_id] <= 0 or not waiting:
+                self._rotation.rotate(-1)
+                self._credits[queue_id] = self._weights.get(queue_id, 1)
+
+        if granted:
+            self._cond.notify_all()
+
+    def status(self, queue_id=None):
+        """
+        Describe the state of the queue.
+
+        Args:
+            queue_id (str, optional): Session to report the position of
+
+        Returns:
+            dict: active, capacity, sessions and waiting in total, plus the
+                  waiting and running work of queue_id and the number of
+                  sessions ahead of it in the rotation
+        """
+        with self._cond:
+            waiting = {key: len(tickets) for key, tickets in self._waiting.items() if tickets}
+            rotation = [key for key in self._rotation if key in waiting]
+
+            return {
+                "active": self._active,
+                "capacity": self.max_concurrency,
+                "sessions": len(set(waiting) | set(self._running)),
+                "waiting_total": sum(waiting.values()),
+                "waiting": waiting.get(queue_id, 0),
+                "running": self._running.get(queue_id, 0),
+                "ahead": rotation.index(queue_id) if queue_id in rotation else 0
+            }
+
+    def idle_for(self):
+        """
+        Time since the queue was last used.
+
+        Returns:
+            float: Seconds since the last acquire() or release(), or 0.0 while
+                   work is running or waiting
+        """
+        with self._cond:
+            if self._active or any(self._waiting.values()):
+                return 0.0
+            return time.monotonic() - self._last_used
+
+_queues = {}
+_queues_lock = threading.Lock()
+
+def get_queue(api_key):
+    """
+    Get the process-wide fair-share queue for an API key.
+
+    Queues of other API keys left unused for FAIR_SHARE_IDLE_AFTER seconds
+    are dropped.
+
+    Args:
+        api_key (str): OpenAI API key
+
+    Returns:
+        FairShareQueue: Shared queue
+    """
+    key = hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()
+
+    with _queues_lock:
+        for other in [other for other, queue in _queues.items() if other != key and queue.idle_for() > settings.FAIR_SHARE_IDLE_AFTER]:
+            del _queues[other]
+
+        if key not in _queues:
+            _queues[key] = FairShareQueue()
+        return _queues[key]
@@ -319,6 +319,8 @@ def _convert_results_to_df(test_results, test_cases):
             "Command Output": command_output,
             "Notes": result.get("notes", "")
         }
+        if result.get("host"):
+            row = {"Host": result["host"], **row}
         data.append(row)
     
     return pd.DataFrame(data)
@@ -0,0 +1,360 @@
+"""
+Retrieval of previously generated test cases.
+This module keeps a local full-text index of every requirement test cases were
+generated for, so that a new requirement worded like a past one can reuse the
+past test cases instead of calling the OpenAI API again.
+"""
+
+import os
+import json
+import math
+import time
+import heapq
+import hashlib
+import sqlite3
+import threading
+from contextlib import closing
+from collections import Counter
+import streamlit as st
+from config import settings
+from utils import similarity
+
+# BM25 parameters
+_BM25_K1 = 1.5
+_BM25_B = 0.75
+
+class TestCaseIndex:
+    """
+    BM25 index of past requirements and the test cases generated for them.
+
+    Requirements and test cases are stored in a SQLite database; the inverted
+    index over the requirement texts is rebuilt in memory when the index is
+    opened. Candidates are ranked with BM25 and accepted when the TF-IDF
+    cosine similarity of the two requirement texts reaches the threshold.
+    """
+
+    def __init__(self, index_dir=settings.CACHE_DIR, max_documents=settings.RETRIEVAL_MAX_DOCUMENTS):
+        """
+        Open the index and create the database if needed.
+
+        Args:
+            index_dir (str): Directory holding the index database
+            max_documents (int): Maximum number of requirements to keep
+        """
+        os.makedirs(index_dir, exist_ok=True)
+        self.db_path = os.path.join(index_dir, "past_test_cases.sqlite3")
+        self.max_documents = max_documents
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._postings = {}
+        self._terms = {}
+        self._lengths = {}
+        self._numbers = {}
+        self._polarities = {}
+        self._doc_ids = {}
+        self._total_length = 0
+
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS documents (
+                    doc_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    description_key TEXT UNIQUE NOT NULL,
+                    requirement_id TEXT,
+                    description TEXT NOT NULL,
+                    test_cases TEXT NOT NULL,
+                    test_case_count INTEGER NOT NULL,
+                    created_at REAL NOT NULL
+                )
+                """
+            )
+
+            self._evict(conn)
+            rows = conn.execute("SELECT doc_id, description_key, description, test_case_count FROM documents").fetchall()
+
+        for doc_id, description_key, description, test_case_count in rows:
+            self._index(doc_id, description_key, description, test_case_count)
+
+    def _connect(self):
+        """
+        Open a new database connection.
+
+        Returns:
+            sqlite3.Connection: Database connection
+        """
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _evict(self, conn):
+        """
+        Delete the oldest requirements beyond the size limit.
+
+        Args:
+            conn (sqlite3.Connection): Open database connection
+
+        Returns:
+            list: (doc_id, description_key) tuples of the deleted requirements
+        """
+        count = conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+        if count <= self.max_documents:
+            return []
+
+        rows = conn.execute(
+            "SELECT doc_id, description_key FROM documents ORDER BY doc_id ASC LIMIT ?",
+            (count - self.max_documents,)
+        ).fetchall()
+        conn.executemany("DELETE FROM documents WHERE doc_id = ?", [(doc_id,) for doc_id, _ in rows])
+        return rows
+
+    def _index(self, doc_id, description_key, description, test_case_count):
+        """
+        Add a stored requirement to the in-memory index.
+
+        Args:
+            doc_id (int): Database ID of the requirement
+            description_key (str): Hash of the requirement description
+            description (str): Requirement description
+            test_case_count (int): Number of test cases stored for it
+        """
+        terms = Counter(similarity.words(description))
+
+        for term, frequency in terms.items():
+            self._postings.setdefault(term, {})[doc_id] = frequency
+
+        self._terms[doc_id] = (terms, test_case_count)
+        self._numbers[doc_id] = similarity.numeric_tokens(description)
+        self._polarities[doc_id] = similarity.polarity_tokens(description)
+        self._doc_ids[description_key] = doc_id
+        self._lengths[doc_id] = sum(terms.values())
+        self._total_length += self._lengths[doc_id]
+
+    def _unindex(self, doc_id, description_key):
+        """
+        Remove a deleted requirement from the in-memory index (caller holds the lock).
+
+        Args:
+            doc_id (int): Database ID of the requirement
+            description_key (str): Hash of the requirement description
+        """
+        terms, _ = self._terms.pop(doc_id, (Counter(), 0))
+
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[term]
+
+        self._numbers.pop(doc_id, None)
+        self._polarities.pop(doc_id, None)
+        self._doc_ids.pop(description_key, None)
+        self._total_length -= self._lengths.pop(doc_id, 0)
+
+    def add(self, requirement, test_cases):
+        """
+        Store the test cases generated for a requirement.
+
+        A requirement with the same description replaces the stored test
+        cases. Beyond max_documents requirements the oldest ones are dropped.
+
+        Args:
+            requirement (dict): Requirement the test cases were generated for
+            test_cases (list): Generated test cases
+        """
+        description = str(requirement.get("description", "")).strip()
+
+        # Empty results are usually failures and empty descriptions match nothing
+        if not test_cases or not description:
+            return
+
+        description_key = hashlib.sha256(description.encode("utf-8")).hexdigest()
+
+        with self._lock:
+            with closing(self._connect()) as conn, conn:
+                conn.execute(
+                    """
+                    INSERT INTO documents
+                        (description_key, requirement_id, description, test_cases, test_case_count, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (description_key) DO UPDATE SET
+                        requirement_id = excluded.requirement_id,
+                        test_cases = excluded.test_cases,
+                        test_case_count = excluded.test_case_count
+                    """,
+                    (description_key, requirement.get("requirement_id"), description,
+                     json.dumps(test_cases), len(test_cases), time.time())
+                )
+                doc_id = conn.execute(
+                    "SELECT doc_id FROM documents WHERE description_key = ?", (description_key,)
+                ).fetchone()[0]
+                evicted = self._evict(conn)
+
+            if description_key in self._doc_ids:
+                terms, _ = self._terms[doc_id]
+                self._terms[doc_id] = (terms, len(test_cases))
+            else:
+                self._index(doc_id, description_key, description, len(test_cases))
+
+            for evicted_id, evicted_key in evicted:
+                self._unindex(evicted_id, evicted_key)
+
+    def search(self, description, limit=settings.RETRIEVAL_CANDIDATES):
+        """
+        Rank stored requirements against a requirement description with BM25.
+
+        Args:
+            description (str): Requirement description
+            limit (int, optional): Maximum number of results
+
+        Returns:
+            list: (doc_id, score) tuples, best first
+        """
+        query = set(similarity.words(description))
+
+        with self._lock:
+            count = len(self._terms)
+            if not query or not count:
+                return []
+
+            average_length = self._total_length / count
+            scores = {}
+
+            for term in query:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, frequency in postings.items():
+                    norm = _BM25_K1 * (1 - _BM25_B + _BM25_B * self._lengths[doc_id] / average_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * frequency * (_BM25_K1 + 1) / (frequency + norm)
+
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+    def find(self, description, min_test_cases=1, threshold=settings.RETRIEVAL_SIMILARITY_THRESHOLD):
+        """
+        Find the test cases of the past requirement most similar to a description.
+
+        Requirements whose numbers differ (for example file modes 0640 and
+        0600) or whose polarity differs (enabled and disabled, allow and deny,
+        a negation) never match.
+
+        Args:
+            description (str): Requirement description
+            min_test_cases (int, optional): Minimum number of stored test cases
+            threshold (float, optional): Minimum TF-IDF cosine similarity
+
+        Returns:
+            tuple: (test_cases, requirement_id, similarity) on a hit, or
+                   (None, None, 0.0) on a miss
+        """
+        query = Counter(similarity.words(description))
+        numbers = similarity.numeric_tokens(description)
+        polarity = similarity.polarity_tokens(description)
+        best, best_similarity = None, 0.0
+
+        for doc_id, _ in self.search(description):
+            with self._lock:
+                # Dropped by add() since the search
+                if doc_id not in self._terms:
+                    continue
+                terms, test_case_count = self._terms[doc_id]
+                if test_case_count < min_test_cases or self._numbers[doc_id] != numbers:
+                    continue
+                if self._polarities[doc_id] != polarity:
+                    continue
+                score = self._cosine(query, terms)
+
+            if score >= threshold and score > best_similarity:
+                best, best_similarity = doc_id, score
+
+        with self._lock:
+            if best is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if best is None:
+            return None, None, 0.0
+
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute("SELECT test_cases, requirement_id FROM documents WHERE doc_id = ?", (best,)).fetchone()
+
+        if not row:
+            return None, None, 0.0
+
+        return json.loads(row[0]), row[1], best_similarity
+
+    def _cosine(self, a, b):
+        """
+        TF-IDF cosine similarity of two term counts (caller holds the lock).
+
+        Args:
+            a (Counter): Term counts of the first text
+            b (Counter): Term counts of the second text
+
+        Returns:
+            float: Similarity between 0 and 1
+        """
+        count = len(self._terms) + 1
+
+        def weights(terms):
+            return {
+                term: (1 + math.log(frequency)) * math.log(1 + count / (1 + len(self._postings.get(term, ()))))
+                for term, frequency in terms.items()
+            }
+
+        wa, wb = weights(a), weights(b)
+        dot = sum(weight * wb.get(term, 0.0) for term, weight in wa.items())
+        norm = math.sqrt(sum(w * w for w in wa.values())) * math.sqrt(sum(w * w for w in wb.values()))
+        return dot / norm if norm else 0.0
+
+    def clear(self):
+        """
+        Remove all stored requirements and reset the hit/miss counters.
+        """
+        with self._lock:
+            with closing(self._connect()) as conn, conn:
+                conn.execute("DELETE FROM documents")
+
+            self._postings.clear()
+            self._terms.clear()
+            self._lengths.clear()
+            self._numbers.clear()
+            self._polarities.clear()
+            self._doc_ids.clear()
+            self._total_length = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """
+        Get index statistics.
+
+        Returns:
+            dict: Indexed requirement count, hits, misses and hit rate
+        """
+        with self._lock:
+            entries, hits, misses = len(self._terms), self.hits, self.misses
+
+        lookups = hits + misses
+
+        return {
+            "entries": entries,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": (hits / lookups * 100) if lookups > 0 else 0.0
+        }
+
+@st.cache_resource
+def get_index():
+    """
+    Get the process-wide index of past test cases.
+
+    Returns:
+        TestCaseIndex: Shared index instance
+    """
+    return TestCaseIndex()
@@ -0,0 +1,434 @@
+"""
+Pooled SSH connections.
+This module keeps SSH connections open between test executions, keyed by host,
+port, user and credentials, so running a test does not pay for a TCP connect,
+key exchange and authentication every time.
+"""
+
+import io
+import time
+import hashlib
+import threading
+from contextlib import contextmanager
+import paramiko
+import streamlit as st
+from config import settings
+
+# Key types tried, in order, when loading a private key
+_KEY_CLASSES = [
+    getattr(paramiko, name) for name in ("RSAKey", "ECDSAKey", "Ed25519Key", "DSSKey")
+    if hasattr(paramiko, name)
+]
+
+def uses_private_key(ssh_config):
+    """
+    Check whether an SSH configuration authenticates with a private key.
+
+    Args:
+        ssh_config (dict): SSH connection configuration
+
+    Returns:
+        bool: True for key authentication
+    """
+    return ssh_config.get("auth_type") in ("key", "private key") and bool(ssh_config.get("private_key"))
+
+def load_private_key(key_text):
+    """
+    Load a private key from its text, without writing it to disk.
+
+    Args:
+        key_text (str): Private key in PEM or OpenSSH format
+
+    Returns:
+        paramiko.PKey: Loaded key
+
+    Raises:
+        paramiko.SSHException: If the key is not in a supported format
+    """
+    errors = []
+
+    for key_class in _KEY_CLASSES:
+        try:
+            return key_class.from_private_key(io.StringIO(key_text))
+        except (paramiko.SSHException, ValueError) as e:
+            errors.append(f"{key_class.__name__}: {str(e)}")
+
+    raise paramiko.SSHException(f"Unsupported private key ({'; '.join(errors)})")
+
+def connection_key(ssh_config):
+    """
+    Get the pool key of an SSH configuration.
+
+    Credentials are only kept as a hash, so connections opened with a changed
+    password or key are never reused.
+
+    Args:
+        ssh_config (dict): SSH connection configuration
+
+    Returns:
+        tuple: (hostname, port, username, credential fingerprint)
+    """
+    credentials = "\0".join([
+        "key" if uses_private_key(ssh_config) else "password",
+        str(ssh_config.get("password") or ""),
+        str(ssh_config.get("private_key") or "")
+    ])
+    fingerprint = hashlib.sha256(credentials.encode("utf-8")).hexdigest()
+
+    return (
+        str(ssh_config.get("hostname", "")).strip(),
+        int(ssh_config.get("port") or settings.SSH_DEFAULT_PORT),
+        str(ssh_config.get("username", "")).strip(),
+        fingerprint
+    )
+
+def open_client(ssh_config):
+    """
+    Open a new SSH connection.
+
+    Args:
+        ssh_config (dict): SSH connection configuration
+
+    Returns:
+        paramiko.SSHClient: Connected client with keepalives enabled
+    """
+    hostname, port, username, _ = connection_key(ssh_config)
+    client = paramiko.SSHClient()
+    client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+
+    credentials = {"pkey": load_private_key(ssh_config["private_key"])} if uses_private_key(ssh_config) \
+        else {"password": ssh_config.get("password")}
+
+    try:
+        client.connect(
+            hostname=hostname,
+            port=port,
+            username=username,
+            timeout=settings.SSH_TIMEOUT,
+            allow_agent=False,
+            look_for_keys=False,
+            **credentials
+        )
+    except Exception:
+        client.close()
+        raise
+
+    client.get_transport().set_keepalive(settings.SSH_KEEPALIVE_INTERVAL)
+    return client
+
+class _PooledConnection:
+    """
+    An open connection and its usage.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.users = 0
+        self.uses = 0
+        self.discarded = False
+        self.opened_at = time.time()
+        self.last_used = time.monotonic()
+
+    @property
+    def active(self):
+        transport = self.client.get_transport()
+        return transport is not None and transport.is_active()
+
+class SSHConnectionPool:
+    """
+    Process-wide pool of open SSH connections.
+
+    A connection can be used by several threads at once, since paramiko
+    multiplexes channels over one transport. Connections unused for longer
+    than the idle timeout are closed by a background thread; connections
+    unused for a while are probed before reuse and reopened if they died.
+    """
+
+    def __init__(self, max_connections=settings.SSH_POOL_MAX_CONNECTIONS,
+                 idle_timeout=settings.SSH_POOL_IDLE_TIMEOUT,
+                 health_check_after=settings.SSH_POOL_HEALTH_CHECK_AFTER):
+        """
+        Initialize an empty pool and start its eviction thread.
+
+        Args:
+            max_connections (int): Open connections to keep at most
+            idle_timeout (float): Seconds before an unused connection is closed
+            health_check_after (float): Seconds unused before a connection is probed on reuse
+        """
+        self.max_connections = max(1, int(max_connections))
+        self.idle_timeout = idle_timeout
+        self.health_check_after = health_check_after
+        self.connects = 0
+        self.reuses = 0
+        self._lock = threading.Lock()
+        self._connections = {}
+        self._connecting = {}
+        self._reaper = threading.Thread(target=self._evict_forever, name="ssh-pool-reaper", daemon=True)
+        self._reaper.start()
+
+    @contextmanager
+    def connection(self, ssh_config):
+        """
+        Use a pooled connection, opening one if needed.
+
+        The connection is dropped from the pool when it breaks while in use,
+        so the next use reconnects.
+
+        Args:
+            ssh_config (dict): SSH connection configuration
+
+        Yields:
+            paramiko.SSHClient: Connected client; do not close it
+        """
+        key = connection_key(ssh_config)
+        entry = self._checkout(key, ssh_config)
+
+        try:
+            yield entry.client
+        except (paramiko.SSHException, EOFError, OSError):
+            if not entry.active:
+                self._discard(key, entry)
+            raise
+        finally:
+            with self._lock:
+                entry.users -= 1
+                entry.last_used = time.monotonic()
+                unused = entry.discarded and not entry.users
+
+            # The last user of a discarded connection closes it
+            if unused:
+                entry.client.close()
+
+    def _checkout(self, key, ssh_config):
+        """
+        Get a healthy connection for a key and mark it in use.
+
+        Args:
+            key (tuple): Pool key from connection_key()
+            ssh_config (dict): SSH connection configuration
+
+        Returns:
+            _PooledConnection: Connection in use by the caller
+        """
+        # One connect per key at a time; other keys connect in parallel. The
+        # per-key lock is dropped once no thread is waiting for it.
+        with self._lock:
+            connecting = self._connecting.setdefault(key, [threading.Lock(), 0])
+            connecting[1] += 1
+
+        try:
+            entry, evicted = self._checkout_locked(key, ssh_config, connecting[0])
+        finally:
+            with self._lock:
+                connecting[1] -= 1
+                if not connecting[1]:
+                    del self._connecting[key]
+
+        for stale in evicted:
+            stale.client.close()
+
+        return entry
+
+    def _checkout_locked(self, key, ssh_config, connecting):
+        """
+        Reuse or open the connection of a key under its per-key lock.
+
+        Args:
+            key (tuple): Pool key from connection_key()
+            ssh_config (dict): SSH connection configuration
+            connecting (threading.Lock): Per-key connect lock
+
+        Returns:
+            tuple: (connection in use by the caller, evicted connections to close)
+        """
+        with connecting:
+            with self._lock:
+                entry = self._connections.get(key)
+                if entry is not None:
+                    entry.users += 1
+
+            if entry is not None:
+                if self._healthy(entry):
+                    with self._lock:
+                        entry.uses += 1
+                        self.reuses += 1
+                    return entry, []
+
+                with self._lock:
+                    entry.users -= 1
+                self._discard(key, entry)
+
+            client = open_client(ssh_config)
+            entry = _PooledConnection(client)
+            entry.users = entry.uses = 1
+
+            with self._lock:
+                self.connects += 1
+                self._connections[key] = entry
+                evicted = self._over_capacity()
+
+        return entry, evicted
+
+    def _healthy(self, entry):
+        """
+        Check that a connection still works.
+
+        Recently used connections only need a live transport; others must
+        also open a channel, which detects peers that went away silently.
+
+        Args:
+            entry (_PooledConnection): Connection to check
+
+        Returns:
+            bool: True if the connection can be used
+        """
+        if not entry.active:
+            return False
+
+        if entry.users > 1 or time.monotonic() - entry.last_used < self.health_check_after:
+            return True
+
+        try:
+            channel = entry.client.get_transport().open_session(timeout=settings.SSH_TIMEOUT)
+            channel.close()
+            return True
+        except Exception:
+            return False
+
+    def _over_capacity(self):
+        """
+        Remove the least recently used idle connections beyond the size limit
+        (caller holds the lock).
+
+        Returns:
+            list: Removed connections, to be closed by the caller
+        """
+        idle = sorted(
+            ((key, entry) for key, entry in self._connections.items() if not entry.users),
+            key=lambda item: item[1].last_used
+        )
+        evicted = []
+
+        while len(self._connections) > self.max_connections and idle:
+            key, entry = idle.pop(0)
+            del self._connections[key]
+            evicted.append(entry)
+
+        return evicted
+
+    def _discard(self, key, entry):
+        """
+        Remove a connection from the pool and close it once unused.
+
+        A connection still in use is closed by its last user.
+
+        Args:
+            key (tuple): Pool key of the connection
+            entry (_PooledConnection): Connection to remove
+        """
+        with self._lock:
+            if self._connections.get(key) is entry:
+                del self._connections[key]
+            entry.discarded = True
+            users = entry.users
+
+        # Threads still using a broken connection will fail on their own
+        if not users:
+            entry.client.close()
+
+    def evict_idle(self):
+        """
+        Close connections that are unused for longer than the idle timeout
+        or whose transport died.
+
+        Returns:
+            int: Number of connections closed
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            stale = [
+                (key, entry) for key, entry in self._connections.items()
+                if not entry.users and (now - entry.last_used > self.idle_timeout or not entry.active)
+            ]
+            for key, _ in stale:
+                del self._connections[key]
+
+        for _, entry in stale:
+            entry.client.close()
+
+        return len(stale)
+
+    def _evict_forever(self):
+        """
+        Evict idle connections periodically (runs in the eviction thread).
+        """
+        interval = max(1.0, min(self.idle_timeout, settings.SSH_KEEPALIVE_INTERVAL))
+
+        while True:
+            time.sleep(interval)
+            try:
+                self.evict_idle()
+            except Exception:
+                pass
+
+    def close(self, ssh_config=None):
+        """
+        Close the pooled connection of a configuration, or all of them.
+
+        Args:
+            ssh_config (dict, optional): SSH connection configuration
+
+        Returns:
+            int: Number of connections closed
+        """
+        key = connection_key(ssh_config) if ssh_config else None
+
+        with self._lock:
+            closing = [
+                (k, entry) for k, entry in self._connections.items()
+                if key is None or k == key
+            ]
+            for k, _ in closing:
+                del self._connections[k]
+
+        for _, entry in closing:
+            entry.client.close()
+
+        return len(closing)
+
+    def status(self, ssh_config=None):
+        """
+        Describe the pool.
+
+        Args:
+            ssh_config (dict, optional): SSH configuration to report the connection of
+
+        Returns:
+            dict: open connections, connects and reuses so far, and whether
+                  ssh_config has an open connection with its age in seconds
+                  and number of uses
+        """
+        key = connection_key(ssh_config) if ssh_config else None
+
+        with self._lock:
+            entry = self._connections.get(key) if key else None
+
+            return {
+                "open": len(self._connections),
+                "connects": self.connects,
+                "reuses": self.reuses,
+                "connected": entry is not None and entry.active,
+                "age": time.time() - entry.opened_at if entry else 0.0,
+                "uses": entry.uses if entry else 0
+            }
+
+@st.cache_resource
+def get_pool():
+    """
+    Get the process-wide SSH connection pool.
+
+    Returns:
+        SSHConnectionPool: Shared pool instance
+    """
+    return SSHConnectionPool()
@@ -4,13 +4,19 @@ This module handles establishing SSH connections to remote systems and executing
 commands to run test cases.
 """
 
-import os
 import re
+import sys
 import time
-import tempfile
+import uuid
+import threading
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import paramiko
 import streamlit as st
 from config import settings
+from services import agent_service, bundle_service, ssh_pool_service, stream_service, template_service
+
+_NO_LOCK = nullcontext()
 
 class SSHConnection:
     """
@@ -22,50 +28,12 @@ class SSHConnection:
         """Initialize with SSH configuration."""
         self.ssh_config = ssh_config
         self.client = None
-        self.temp_dir = None
-        self.key_path = None
     
     def __enter__(self):
         """Establish SSH connection and return client."""
-        self.client = paramiko.SSHClient()
-        self.client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        
         try:
-            # Handle private key if needed
-            if self.ssh_config["auth_type"] == "key" and self.ssh_config["private_key"]:
-                # Create temporary directory
-                self.temp_dir = tempfile.TemporaryDirectory()
-                
-                # Write key to temporary file
-                self.key_path = os.path.join(self.temp_dir.name, "id_rsa")
-                with open(self.key_path, 'w') as f:
-                    f.write(self.ssh_config["private_key"])
-                
-                # Set proper permissions for private key
-                os.chmod(self.key_path, 0o600)
-                
-                # Connect with key
-                key = paramiko.RSAKey.from_private_key_file(self.key_path)
-                self.client.connect(
-                    hostname=self.ssh_config["hostname"],
-                    port=int(self.ssh_config["port"]),
-                    username=self.ssh_config["username"],
-                    pkey=key,
-                    timeout=20,
-                    allow_agent=False,
-                    look_for_keys=False
-                )
-            else:
-                # Connect with password
-                self.client.connect(
-                    hostname=self.ssh_config["hostname"],
-                    port=int(self.ssh_config["port"]),
-                    username=self.ssh_config["username"],
-                    password=self.ssh_config["password"],
-                    timeout=20,
-                    allow_agent=False,
-                    look_for_keys=False
-                )
+            # Private keys are loaded in memory, never written to disk
+            self.client = ssh_pool_service.open_client(self.ssh_config)
             
             st.success(f"Connected to {self.ssh_config['hostname']} as {self.ssh_config['username']}")
             return self.client
@@ -84,9 +52,22 @@ class SSHConnection:
         """Close SSH connection and clean up resources."""
         if self.client:
             self.client.close()
-        
-        if self.temp_dir:
-            self.temp_dir.cleanup()
+
+def _connection(ssh_config):
+    """
+    Get a connection context for an SSH configuration.
+    
+    Uses the shared connection pool unless it is disabled.
+    
+    Args:
+        ssh_config (dict): SSH connection configuration
+    
+    Returns:
+        Context manager yielding a paramiko.SSHClient
+    """
+    if settings.SSH_POOL_ENABLED:
+        return ssh_pool_service.get_pool().connection(ssh_config)
+    return SSHConnection(ssh_config)
 
 def generate_python_code(test_case):
     """
@@ -108,29 +89,7 @@ def generate_python_code(test_case):
     test_type = test_case.get("type", "Functional")
     
     # Define default commands based on the test case title
-    default_commands = []
-    
-    # If the test is about file permissions
-    if "permission" in title.lower() or "permission" in description.lower():
-        if "/etc/passwd" in title.lower() or "/etc/passwd" in description.lower():
-            default_commands.append("ls -l /etc/passwd")
-        elif "/etc/shadow" in title.lower() or "/etc/shadow" in description.lower():
-            default_commands.append("ls -l /etc/shadow")
-        elif "/etc/ssh/sshd_config" in title.lower() or "/etc/ssh/sshd_config" in description.lower():
-            default_commands.append("ls -l /etc/ssh/sshd_config")
-        else:
-            default_commands.append("ls -la /etc")
-    # If the test is about firewall
-    elif "firewall" in title.lower() or "firewall" in description.lower() or "ufw" in title.lower():
-        default_commands.append("sudo ufw status")
-    # If the test is about system status
-    elif "system" in title.lower() or "status" in title.lower():
-        default_commands.append("uname -a")
-        default_commands.append("uptime")
-    # General security checks
-    else:
-        default_commands.append("uname -a")
-        default_commands.append("ls -la /etc")
+    default_commands = template_service.default_commands(title, description)
     
     # Get commands from the test case if they exist
     # First check for verification_commands field
@@ -285,45 +244,123 @@ def execute_python_code(ssh_client, test_case_id, python_code):
     Returns:
         dict: Test execution result
     """
-    # Create unique filename based on test case ID
+    remote_filename = _remote_filename(test_case_id)
+    st.write(f"Executing Python test: {remote_filename}")
+    
+    # Output is shown live while the test runs, then replaced by the full result
+    live_output = st.empty()
+    result = _run_python_code(ssh_client, remote_filename, python_code, on_output=_live_output_writer(live_output))
+    live_output.empty()
+    traceback = result.pop("traceback", None)
+    
+    if traceback:
+        st.error(f"Error executing Python test: {result['error']}")
+        st.error(traceback)
+        return result
+    
+    st.write(f"Python test exit status: {result['exit_status']}")
+    if result["output"]:
+        st.write("Output:")
+        st.code(result["output"])
+    if result["error"]:
+        st.write("Error:")
+        st.code(result["error"])
+    
+    return result
+
+def _live_output_writer(placeholder):
+    """
+    Build an output callback showing the end of the output in a placeholder.
+    
+    Redraws are limited to one per LIVE_OUTPUT_INTERVAL seconds.
+    
+    Args:
+        placeholder: Streamlit placeholder from st.empty()
+    
+    Returns:
+        callable: Callback for stream_service.read_channel
+    """
+    state = {"text": "", "shown_at": 0.0}
+    
+    def write(stream, text):
+        state["text"] = (state["text"] + text)[-settings.LIVE_OUTPUT_CHARS:]
+        now = time.monotonic()
+        if now - state["shown_at"] >= settings.LIVE_OUTPUT_INTERVAL:
+            state["shown_at"] = now
+            placeholder.code(state["text"])
+    
+    return write
+
+def _remote_filename(test_case_id, index=1, run_token=None):
+    """
+    Get the remote path a test script is uploaded to.
+    
+    The position of the test case and a token of the run are part of the
+    name, so test cases with the same ID, and runs of other sessions on the
+    same host, never share a script file.
+    
+    Args:
+        test_case_id (str): Test case ID
+        index (int, optional): Position of the test case in the run
+        run_token (str, optional): Token of the run, a new one if not given
+    
+    Returns:
+        str: Path of the script on the remote system
+    """
     safe_test_id = ''.join(c for c in test_case_id if c.isalnum() or c in '-_')
-    remote_filename = f"/tmp/test_{safe_test_id}.py"
+    run_token = run_token or uuid.uuid4().hex[:8]
+    return f"/tmp/test_{safe_test_id}_{index}_{run_token}.py"
+
+def _run_python_code(ssh_client, remote_filename, python_code, sftp=None, sftp_lock=None,
+                     raise_channel_errors=False, on_output=None):
+    """
+    Upload and run a test script without touching the UI.
+    
+    Safe to call from worker threads; several calls can share one
+    connection and one SFTP session. The script is deleted afterwards.
+    
+    Args:
+        ssh_client (paramiko.SSHClient): SSH client connection
+        remote_filename (str): Remote path to upload the script to, see _remote_filename
+        python_code (str): Python code to execute
+        sftp (paramiko.SFTPClient, optional): Open SFTP session to upload with
+        sftp_lock (threading.Lock, optional): Lock serializing uses of a shared
+            SFTP session, whose client cannot wait for replies from several threads
+        raise_channel_errors (bool, optional): Raise paramiko.ChannelException
+            when the server refuses a channel instead of failing the test
+        on_output (callable, optional): Called with (stream, text) as output
+            arrives, see stream_service.read_channel
+    
+    Returns:
+        dict: Test execution result
+    """
+    own_sftp = sftp is None
     
     try:
-        # Create SFTP client
-        sftp = ssh_client.open_sftp()
+        if own_sftp:
+            sftp = ssh_client.open_sftp()
         
-        # Write Python file to remote system
-        with sftp.file(remote_filename, "w") as remote_file:
-            remote_file.write(python_code)
-        
-        # Close SFTP session
-        sftp.close()
-        
-        # Make the script executable
-        chmod_cmd = f"chmod +x {remote_filename}"
-        ssh_client.exec_command(chmod_cmd)
-        
-        # Execute the Python script
-        st.write(f"Executing Python test: {remote_filename}")
-        stdin, stdout, stderr = ssh_client.exec_command(f"python3 {remote_filename}")
-        
-        # Wait for execution to complete
-        exit_status = stdout.channel.recv_exit_status()
-        
-        # Get output and error
-        output = stdout.read().decode('utf-8')
-        error = stderr.read().decode('utf-8')
+        try:
+            # Write the script and make it executable in the same SFTP session
+            with sftp_lock or _NO_LOCK:
+                with sftp.file(remote_filename, "w") as remote_file:
+                    remote_file.write(python_code)
+                sftp.chmod(remote_filename, 0o755)
+            
+            stdin, stdout, stderr = ssh_client.exec_command(f"python3 {remote_filename}")
+            
+            try:
+                # Drain output while the test runs, then get the exit status
+                streamed = stream_service.read_channel(stdout.channel, on_output=on_output)
+            finally:
+                stdout.channel.close()
+        finally:
+            _remove_remote_file(sftp, sftp_lock, remote_filename)
+            if own_sftp:
+                sftp.close()
         
-        st.write(f"Python test exit status: {exit_status}")
-        if output:
-            st.write("Output:")
-            st.code(output)
-        if error:
-            st.write("Error:")
-            st.code(error)
+        exit_status, output, error = streamed["exit_status"], streamed["output"], streamed["error"]
         
-        # Return execution result
         return {
             "exit_status": exit_status,
             "output": output,
@@ -332,20 +369,53 @@ def execute_python_code(ssh_client, test_case_id, python_code):
             "notes": error if exit_status != 0 else "",
             "python_code": python_code
         }
-        
-    except Exception as e:
-        st.error(f"Error executing Python test: {str(e)}")
-        import traceback
-        st.error(traceback.format_exc())
-        
-        return {
-            "exit_status": -1,
-            "output": "",
-            "error": str(e),
-            "overall_status": "Fail",
-            "notes": f"Error: {str(e)}",
-            "python_code": python_code
-        }
+    
+    except paramiko.ChannelException:
+        if raise_channel_errors:
+            raise
+        return _failed_execution(python_code)
+    
+    except Exception:
+        return _failed_execution(python_code)
+
+def _remove_remote_file(sftp, sftp_lock, remote_filename):
+    """
+    Delete an uploaded script, ignoring errors.
+    
+    Args:
+        sftp (paramiko.SFTPClient): Open SFTP session
+        sftp_lock (threading.Lock): Lock serializing uses of the SFTP session, or None
+        remote_filename (str): Remote path of the script
+    """
+    try:
+        with sftp_lock or _NO_LOCK:
+            sftp.remove(remote_filename)
+    except Exception:
+        pass
+
+def _failed_execution(python_code):
+    """
+    Build the result of a test script that could not be run, from the
+    exception being handled.
+    
+    Args:
+        python_code (str): Python code that was to be executed
+    
+    Returns:
+        dict: Test execution result, with the formatted traceback
+    """
+    import traceback
+    e = sys.exc_info()[1]
+    
+    return {
+        "exit_status": -1,
+        "output": "",
+        "error": str(e),
+        "overall_status": "Fail",
+        "notes": f"Error: {str(e)}",
+        "python_code": python_code,
+        "traceback": traceback.format_exc()
+    }
 
 def execute_single_test_case(test_case, ssh_config, custom_code=None):
     """
@@ -369,8 +439,8 @@ def execute_single_test_case(test_case, ssh_config, custom_code=None):
         }
     
     try:
-        # Connect to the remote system
-        with SSHConnection(ssh_config) as ssh_client:
+        # Connect to the remote system, reusing a pooled connection if there is one
+        with _connection(ssh_config) as ssh_client:
             # Get test case ID
             test_id = test_case.get("test_case_id", "Unknown")
             
@@ -397,7 +467,7 @@ def execute_single_test_case(test_case, ssh_config, custom_code=None):
             "notes": f"Connection error: {str(e)}"
         }
 
-def execute_command(ssh_client, command, timeout=settings.DEFAULT_TIMEOUT):
+def execute_command(ssh_client, command, timeout=settings.DEFAULT_TIMEOUT, on_output=None):
     """
     Execute a command on the remote system via SSH.
     
@@ -405,6 +475,8 @@ def execute_command(ssh_client, command, timeout=settings.DEFAULT_TIMEOUT):
         ssh_client (paramiko.SSHClient): An open SSH client connection
         command (str): The command to execute
         timeout (int): Command execution timeout in seconds
+        on_output (callable, optional): Called with (stream, text) as output
+            arrives, see stream_service.read_channel
     
     Returns:
         dict: Command execution results including:
@@ -417,18 +489,17 @@ def execute_command(ssh_client, command, timeout=settings.DEFAULT_TIMEOUT):
         # Execute command
         stdin, stdout, stderr = ssh_client.exec_command(command, timeout=timeout)
         
-        # Wait for command to finish and get exit status
-        exit_status = stdout.channel.recv_exit_status()
-        
-        # Get output and error
-        output = stdout.read().decode('utf-8')
-        error = stderr.read().decode('utf-8')
+        try:
+            # Drain output while the command runs, then get the exit status
+            streamed = stream_service.read_channel(stdout.channel, timeout=timeout, on_output=on_output)
+        finally:
+            stdout.channel.close()
         
         return {
             "command": command,
-            "exit_status": exit_status,
-            "output": output,
-            "error": error
+            "exit_status": streamed["exit_status"],
+            "output": streamed["output"],
+            "error": streamed["error"]
         }
     
     except Exception as e:
@@ -439,19 +510,256 @@ def execute_command(ssh_client, command, timeout=settings.DEFAULT_TIMEOUT):
             "error": f"Error executing command: {str(e)}"
         }
 
-def execute_test_cases(test_cases, ssh_config):
+class _SessionLimiter:
+    """
+    Limit on the channels test workers open at once on one connection.
+    
+    Starts at the configured number of parallel sessions and shrinks when
+    the server refuses a channel, which is how its MaxSessions shows.
+    """
+    
+    def __init__(self, limit):
+        """
+        Initialize the limiter.
+        
+        Args:
+            limit (int): Channels allowed at first
+        """
+        self.limit = max(1, int(limit))
+        self.active = 0
+        self._cond = threading.Condition()
+    
+    def acquire(self):
+        """Wait for a free channel slot."""
+        with self._cond:
+            while self.active >= self.limit:
+                self._cond.wait()
+            self.active += 1
+    
+    def release(self):
+        """Give back a slot taken with acquire()."""
+        with self._cond:
+            self.active -= 1
+            self._cond.notify_all()
+    
+    def refused(self):
+        """
+        Lower the limit after the server refused a channel to a holder of a slot.
+        
+        Returns:
+            bool: True if other channels were open, so the refusal was the
+                  server's session limit and the caller should retry
+        """
+        with self._cond:
+            if self.active <= 1:
+                return False
+            self.limit = min(self.limit, self.active - 1)
+            return True
+
+def _run_test_case_on_channel(ssh_client, sftp, sftp_lock, limiter, slots, test_case, remote_filename):
+    """
+    Run one test case over its own channel (runs in a worker thread).
+    
+    Args:
+        ssh_client (paramiko.SSHClient): Shared SSH client connection
+        sftp (paramiko.SFTPClient): Shared SFTP session
+        sftp_lock (threading.Lock): Lock serializing uses of the SFTP session
+        limiter (_SessionLimiter): Channel limit of the connection
+        slots (threading.Semaphore): Limit shared with other connections, or None
+        test_case (dict): Test case to execute
+        remote_filename (str): Remote path to upload the script to
+    
+    Returns:
+        dict: Test execution result
+    """
+    python_code = test_case.get("python_code") or generate_python_code(test_case)
+    
+    while True:
+        limiter.acquire()
+        try:
+            with slots or _NO_LOCK:
+                return _run_python_code(ssh_client, remote_filename, python_code, sftp, sftp_lock, raise_channel_errors=True)
+        except paramiko.ChannelException:
+            if not limiter.refused():
+                return _failed_execution(python_code)
+        finally:
+            limiter.release()
+
+def _with_test_case_details(result, test_case, test_id, command):
+    """
+    Add the test case details to an execution result.
+    
+    Args:
+        result (dict): Result from _run_python_code
+        test_case (dict): Executed test case
+        test_id (str): Test case ID
+        command (str): Command that ran the script
+    
+    Returns:
+        dict: The result
+    """
+    result.pop("traceback", None)
+    result["test_case_id"] = test_id
+    result["title"] = test_case.get("title", "")
+    result["requirement_id"] = test_case.get("requirement_id", "")
+    result["commands_executed"] = [{
+        "command": command,
+        "exit_status": result["exit_status"],
+        "output": result["output"],
+        "error": result["error"]
+    }]
+    return result
+
+def run_test_cases(ssh_client, test_cases, max_sessions=settings.SSH_PARALLEL_SESSIONS, slots=None,
+                   mode=settings.DEFAULT_EXECUTION_MODE):
+    """
+    Run test cases in parallel over one connection.
+    
+    In 'parallel' mode each test case is uploaded and run on its own
+    channel. In 'bundle' mode all scripts go to the remote system in one
+    compressed bundle and a single remote runner executes them. In 'agent'
+    mode they run inside the resident agent of the connection.
+    Never touches the UI, so it can be used from worker threads.
+    
+    Args:
+        ssh_client (paramiko.SSHClient): Open SSH client connection
+        test_cases (list): List of test case dictionaries
+        max_sessions (int, optional): Test cases to run at once; in parallel
+            mode lowered automatically to what the server's MaxSessions allows
+        slots (threading.Semaphore, optional): Limit on test cases running
+            at once shared with other connections (a bundle takes one slot)
+        mode (str, optional): 'parallel', 'bundle' or 'agent'
+    
+    Yields:
+        tuple: (index, result) for each test case as it finishes
+    """
+    test_ids = [test_case.get("test_case_id", f"TC-{i+1}") for i, test_case in enumerate(test_cases)]
+    run_token = uuid.uuid4().hex[:8]
+    remote_filenames = [_remote_filename(test_id, i + 1, run_token) for i, test_id in enumerate(test_ids)]
+    
+    if mode == "bundle":
+        yield from _run_bundled(ssh_client, test_cases, test_ids, remote_filenames, max_sessions, slots)
+        return
+    
+    if mode == "agent":
+        yield from _run_with_agent(ssh_client, test_cases, test_ids, remote_filenames, max_sessions, slots)
+        return
+    
+    # One SFTP session for all uploads, its channel counts against MaxSessions
+    sftp = ssh_client.open_sftp()
+    sftp_lock = threading.Lock()
+    limiter = _SessionLimiter(max_sessions)
+    
+    try:
+        with ThreadPoolExecutor(max_workers=limiter.limit) as executor:
+            futures = {
+                executor.submit(
+                    _run_test_case_on_channel, ssh_client, sftp, sftp_lock, limiter, slots, test_case, remote_filename
+                ): i
+                for i, (test_case, remote_filename) in enumerate(zip(test_cases, remote_filenames))
+            }
+            
+            for future in as_completed(futures):
+                i = futures[future]
+                yield i, _with_test_case_details(
+                    future.result(), test_cases[i], test_ids[i], f"python3 {remote_filenames[i]}"
+                )
+    finally:
+        sftp.close()
+
+def _run_bundled(ssh_client, test_cases, test_ids, remote_filenames, jobs, slots):
+    """
+    Run test cases through a single remote runner.
+    
+    Args:
+        ssh_client (paramiko.SSHClient): Open SSH client connection
+        test_cases (list): List of test case dictionaries
+        test_ids (list): Test case IDs, in the same order
+        remote_filenames (list): Script names from _remote_filename, in the same order
+        jobs (int): Test cases the runner executes at once
+        slots (threading.Semaphore): Limit shared with other connections, or None
+    
+    Yields:
+        tuple: (index, result) for each test case as it finishes
+    """
+    python_codes = [test_case.get("python_code") or generate_python_code(test_case) for test_case in test_cases]
+    file_names = [remote_filename.rsplit("/", 1)[-1] for remote_filename in remote_filenames]
+    
+    with slots or _NO_LOCK:
+        for i, report in bundle_service.run_bundle(ssh_client, list(zip(file_names, python_codes)), jobs):
+            exit_status = report["exit_status"]
+            result = {
+                "exit_status": exit_status,
+                "output": report["output"],
+                "error": report["error"],
+                "overall_status": "Pass" if exit_status == 0 else "Fail",
+                "notes": report["error"] if exit_status != 0 else "",
+                "python_code": python_codes[i],
+                "duration": report["duration"]
+            }
+            yield i, _with_test_case_details(result, test_cases[i], test_ids[i], f"python3 {file_names[i]} (bundle)")
+
+def _run_with_agent(ssh_client, test_cases, test_ids, remote_filenames, jobs, slots):
+    """
+    Run test cases inside the resident agent of the connection.
+    
+    Args:
+        ssh_client (paramiko.SSHClient): Open SSH client connection
+        test_cases (list): List of test case dictionaries
+        test_ids (list): Test case IDs, in the same order
+        remote_filenames (list): Script names from _remote_filename, in the same order
+        jobs (int): Test cases the agent runs at once (when it is started)
+        slots (threading.Semaphore): Limit shared with other connections, or None
+    
+    Yields:
+        tuple: (index, result) for each test case as it finishes
+    """
+    agent = agent_service.get_agent(ssh_client, jobs)
+    
+    def run(i):
+        python_code = test_cases[i].get("python_code") or generate_python_code(test_cases[i])
+        file_name = remote_filenames[i].rsplit("/", 1)[-1]
+        
+        with slots or _NO_LOCK:
+            report = agent.run_script(python_code, file_name)
+        
+        exit_status = report["exit_status"]
+        result = {
+            "exit_status": exit_status,
+            "output": report["output"],
+            "error": report["error"],
+            "overall_status": "Pass" if exit_status == 0 else "Fail",
+            "notes": report["error"] if exit_status != 0 else "",
+            "python_code": python_code,
+            "duration": report["duration"]
+        }
+        return _with_test_case_details(result, test_cases[i], test_ids[i], f"{file_name} (agent)")
+    
+    # The agent queues what it cannot run yet, so requests only wait for their answers here
+    with ThreadPoolExecutor(max_workers=max(1, agent.jobs)) as executor:
+        futures = {executor.submit(run, i): i for i in range(len(test_cases))}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+def execute_test_cases(test_cases, ssh_config, max_sessions=settings.SSH_PARALLEL_SESSIONS,
+                       mode=settings.DEFAULT_EXECUTION_MODE):
     """
     Execute a list of test cases on a remote system.
     
     This function:
     1. Establishes an SSH connection to the remote system
-    2. Iterates through the test cases
-    3. Executes each test case as a Python script
-    4. Collects and structures the results
+    2. Runs the test cases in parallel as Python scripts, each on its own
+       channel of the same connection or all through one remote runner
+    3. Collects and structures the results in test case order
     
     Args:
         test_cases (list): List of test case dictionaries
         ssh_config (dict): SSH connection configuration
+        max_sessions (int, optional): Test cases to run at once; in parallel
+            mode lowered automatically to what the server's MaxSessions allows
+        mode (str, optional): 'parallel' (a channel per test case),
+            'bundle' (one upload and one remote runner for all test cases) or
+            'agent' (the resident agent of the connection)
     
     Returns:
         list: Test execution results
@@ -471,38 +779,16 @@ def execute_test_cases(test_cases, ssh_config):
         # Set up progress tracking
         progress_bar = st.progress(0)
         status_text = st.empty()
+        results = [None] * len(test_cases)
         
-        # Use the class-based context manager
-        with SSHConnection(ssh_config) as ssh_client:
+        with _connection(ssh_config) as ssh_client:
             st.success("SSH connection established successfully")
             
-            for i, test_case in enumerate(test_cases):
-                # Get test case ID
-                test_id = test_case.get("test_case_id", f"TC-{i+1}")
-                status_text.text(f"Executing test case {test_id} ({i+1}/{len(test_cases)})")
-                
-                # Generate Python code
-                python_code = test_case.get("python_code") or generate_python_code(test_case)
-                
-                # Execute the Python code
-                result = execute_python_code(ssh_client, test_id, python_code)
-                
-                # Add test case details to result
-                result["test_case_id"] = test_id
-                result["title"] = test_case.get("title", "")
-                result["requirement_id"] = test_case.get("requirement_id", "")
-                result["commands_executed"] = [{
-                    "command": f"python3 /tmp/test_{test_id}.py",
-                    "exit_status": result["exit_status"],
-                    "output": result["output"],
-                    "error": result["error"]
-                }]
-                
-                results.append(result)
-                progress_bar.progress((i+1)/len(test_cases))
-                
-                # Small delay to prevent overloading the SSH connection
-                time.sleep(0.5)
+            # Workers never touch Streamlit; progress is reported from here
+            for completed, (i, result) in enumerate(run_test_cases(ssh_client, test_cases, max_sessions, mode=mode), 1):
+                results[i] = result
+                progress_bar.progress(completed / len(test_cases))
+                status_text.text(f"Executed {completed}/{len(test_cases)} test cases ({result['test_case_id']} finished)")
             
             st.success(f"Executed {len(test_cases)} test cases")
     
@@ -518,7 +804,7 @@ def execute_test_cases(test_cases, ssh_config):
         if 'status_text' in locals():
             status_text.empty()
     
-    return results
+    return [result for result in results if result is not None]
 
 def _extract_commands(test_case):
     """
@@ -532,34 +818,11 @@ def _extract_commands(test_case):
     Returns:
         list: Commands to execute
     """
-    # Get title and description for smart defaults
-    title = test_case.get("title", "").lower()
-    description = test_case.get("description", "").lower()
-    
     # Define default commands based on the test case title/description
-    default_commands = []
-    
-    # If the test is about file permissions
-    if "permission" in title or "permission" in description:
-        if "/etc/passwd" in title or "/etc/passwd" in description:
-            default_commands.append("ls -l /etc/passwd")
-        elif "/etc/shadow" in title or "/etc/shadow" in description:
-            default_commands.append("ls -l /etc/shadow")
-        elif "/etc/ssh/sshd_config" in title or "/etc/ssh/sshd_config" in description:
-            default_commands.append("ls -l /etc/ssh/sshd_config")
-        else:
-            default_commands.append("ls -la /etc")
-    # If the test is about firewall
-    elif "firewall" in title or "firewall" in description or "ufw" in title:
-        default_commands.append("sudo ufw status")
-    # If the test is about system status
-    elif "system" in title or "status" in title:
-        default_commands.append("uname -a")
-        default_commands.append("uptime")
-    # General security checks
-    else:
-        default_commands.append("uname -a")
-        default_commands.append("ls -la /etc")
+    default_commands = template_service.default_commands(
+        test_case.get("title", ""),
+        test_case.get("description", "")
+    )
     
     # Check for all possible command field names
     commands = []
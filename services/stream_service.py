@@ -0,0 +1,156 @@
+"""
+Streaming capture of remote command output.
+This module reads the stdout and stderr of an SSH channel as the data arrives,
+so a noisy command can neither stall on a full channel window nor fill the
+memory, and optionally hands each chunk to a callback for live display.
+"""
+
+import time
+import codecs
+import select
+from collections import deque
+from config import settings
+
+class OutputBuffer:
+    """
+    Bounded buffer of the decoded text of one output stream.
+
+    Bytes are decoded incrementally as UTF-8, with invalid sequences
+    replaced, so a character split between two reads is still decoded
+    correctly. Once the buffer is full, the oldest text is dropped: the end
+    of the output, where test scripts report their result, is always kept.
+    """
+
+    def __init__(self, max_chars=settings.SSH_OUTPUT_BUFFER):
+        """
+        Initialize an empty buffer.
+
+        Args:
+            max_chars (int): Characters to keep
+        """
+        self.max_chars = max(1, int(max_chars))
+        self.total_bytes = 0
+        self.dropped_chars = 0
+        self._chunks = deque()
+        self._size = 0
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    def feed(self, data, final=False):
+        """
+        Add received bytes.
+
+        Args:
+            data (bytes): Received bytes
+            final (bool, optional): True at the end of the stream, to flush
+                an incomplete character
+
+        Returns:
+            str: The newly decoded text
+        """
+        self.total_bytes += len(data)
+        text = self._decoder.decode(data, final)
+        if not text:
+            return text
+
+        self._chunks.append(text)
+        self._size += len(text)
+
+        while self._size > self.max_chars:
+            excess = self._size - self.max_chars
+            first = self._chunks[0]
+            if len(first) <= excess:
+                self._chunks.popleft()
+                dropped = len(first)
+            else:
+                self._chunks[0] = first[excess:]
+                dropped = excess
+            self._size -= dropped
+            self.dropped_chars += dropped
+
+        return text
+
+    def getvalue(self):
+        """
+        Get the kept text.
+
+        Returns:
+            str: The end of the output, preceded by a note if text was dropped
+        """
+        text = "".join(self._chunks)
+        if self.dropped_chars:
+            return f"[... {self.dropped_chars} characters dropped ...]\n{text}"
+        return text
+
+def read_channel(channel, timeout=None, on_output=None, max_chars=settings.SSH_OUTPUT_BUFFER):
+    """
+    Read stdout and stderr of a command until it exits.
+
+    Both streams are drained as data arrives, before waiting for the exit
+    status, so the remote side never blocks on a full channel window.
+
+    Args:
+        channel (paramiko.Channel): Channel the command runs on
+        timeout (float, optional): Seconds before the channel is closed and
+            the command reported as timed out
+        on_output (callable, optional): Called with ('stdout' or 'stderr', text)
+            for every decoded chunk, in the calling thread
+        max_chars (int, optional): Characters kept per stream
+
+    Returns:
+        dict: exit_status (-1 on timeout), output, error and timed_out
+    """
+    stdout, stderr = OutputBuffer(max_chars), OutputBuffer(max_chars)
+    deadline = time.monotonic() + timeout if timeout else None
+    timed_out = False
+
+    def drain(ready, receive, buffer, name):
+        received = False
+        while ready():
+            data = receive(settings.SSH_READ_CHUNK)
+            if not data:
+                break
+            text = buffer.feed(data)
+            received = True
+            if on_output and text:
+                on_output(name, text)
+        return received
+
+    while True:
+        received = drain(channel.recv_stderr_ready, channel.recv_stderr, stderr, "stderr")
+        received = drain(channel.recv_ready, channel.recv, stdout, "stdout") or received
+
+        # End of file covers both streams; the loop above emptied them
+        if channel.eof_received or channel.closed:
+            if not channel.recv_ready() and not channel.recv_stderr_ready():
+                break
+            continue
+
+        if deadline is not None and time.monotonic() > deadline:
+            timed_out = True
+            break
+
+        if not received:
+            # Wakes up on stdout data; stderr is checked at least every 50 ms
+            select.select([channel], [], [], 0.05)
+
+    for buffer, name in ((stdout, "stdout"), (stderr, "stderr")):
+        text = buffer.feed(b"", final=True)
+        if on_output and text:
+            on_output(name, text)
+
+    if timed_out:
+        channel.close()
+        exit_status = -1
+    else:
+        exit_status = channel.recv_exit_status()
+
+    error = stderr.getvalue()
+    if timed_out:
+        error += f"\nTimed out after {timeout} seconds"
+
+    return {
+        "exit_status": exit_status,
+        "output": stdout.getvalue(),
+        "error": error,
+        "timed_out": timed_out
+    }
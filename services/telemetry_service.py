@@ -0,0 +1,244 @@
+"""
+Telemetry for test case generation runs.
+This module records how long each requirement waited and took to generate,
+how many tokens it used and how often it had to be retried, so slow runs can
+be explained and the model and concurrency settings tuned.
+"""
+
+import json
+import time
+import threading
+import statistics
+from config import settings
+
+class RequestStats:
+    """
+    Cost of the API requests made for one requirement (or one packed request).
+
+    A stats object is only ever updated by the worker thread generating the
+    requirement, so it needs no locking.
+    """
+
+    def __init__(self):
+        """Initialize empty stats."""
+        self.queue_wait = 0.0
+        self.latency = 0.0
+        self.requests = 0
+        self.retries = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cached_tokens = 0
+        self.parse_failures = 0
+
+    def add_usage(self, usage):
+        """
+        Add the token usage reported by the API.
+
+        Args:
+            usage: ``usage`` object of a chat completion (or stream chunk)
+        """
+        if usage is None:
+            return
+
+        self.prompt_tokens += getattr(usage, "prompt_tokens", 0) or 0
+        self.completion_tokens += getattr(usage, "completion_tokens", 0) or 0
+
+        details = getattr(usage, "prompt_tokens_details", None)
+        if isinstance(details, dict):
+            self.cached_tokens += details.get("cached_tokens", 0) or 0
+        else:
+            self.cached_tokens += getattr(details, "cached_tokens", 0) or 0
+
+    def merge(self, other):
+        """
+        Add the stats of another request.
+
+        Args:
+            other (RequestStats): Stats to add
+        """
+        for name, value in vars(other).items():
+            setattr(self, name, getattr(self, name) + value)
+
+    def split(self, count):
+        """
+        Share the stats of a packed request between its requirements.
+
+        Every requirement waited and took as long as the request itself. Tokens
+        are split evenly, and the request, retry and parse failure counters are
+        charged to the first requirement so that totals stay correct.
+
+        Args:
+            count (int): Number of requirements in the request
+
+        Returns:
+            list: One RequestStats per requirement
+        """
+        shares = []
+
+        for index in range(count):
+            share = RequestStats()
+            share.queue_wait = self.queue_wait
+            share.latency = self.latency
+
+            for name in ("prompt_tokens", "completion_tokens", "cached_tokens"):
+                total = getattr(self, name)
+                setattr(share, name, total // count + (1 if index < total % count else 0))
+
+            if index == 0:
+                share.requests = self.requests
+                share.retries = self.retries
+                share.parse_failures = self.parse_failures
+
+            shares.append(share)
+
+        return shares
+
+    def as_dict(self):
+        """
+        Get the stats as a dictionary.
+
+        Returns:
+            dict: Stats, with times rounded to milliseconds
+        """
+        data = dict(vars(self))
+        data["queue_wait"] = round(self.queue_wait, 3)
+        data["latency"] = round(self.latency, 3)
+        return data
+
+class GenerationTelemetry:
+    """
+    Per-requirement telemetry of one generation run.
+
+    Records are kept in memory and, when a log file is configured, appended
+    to it as JSON Lines.
+    """
+
+    def __init__(self, model, log_path=settings.TELEMETRY_LOG_FILE):
+        """
+        Start collecting telemetry for a run.
+
+        Args:
+            model (str): Model used for the run
+            log_path (str, optional): JSON Lines file to append records to
+        """
+        self.model = model
+        self.log_path = log_path
+        self.started_at = time.time()
+        self.finished_at = None
+        self._records = []
+        self._lock = threading.Lock()
+
+    def record(self, requirement_id, source, stats=None, test_cases=0, error=None, pack_size=1):
+        """
+        Record the outcome of one requirement.
+
+        Args:
+            requirement_id (str): Requirement ID
+            source (str): Where the test cases came from ('api', 'cache', 'journal',
+                'retrieved', 'template' or 'duplicate')
+            stats (RequestStats, optional): Cost of the API requests made for it
+            test_cases (int, optional): Number of test cases obtained
+            error (str, optional): Error message if generation failed
+            pack_size (int, optional): Number of requirements sharing the request
+        """
+        entry = {
+            "timestamp": time.time(),
+            "model": self.model,
+            "requirement_id": requirement_id,
+            "source": source,
+            "pack_size": pack_size,
+            "test_cases": test_cases,
+            "error": error
+        }
+        entry.update((stats or RequestStats()).as_dict())
+
+        with self._lock:
+            self._records.append(entry)
+
+        if self.log_path:
+            try:
+                with open(self.log_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry) + "\n")
+            except OSError:
+                # The log file is optional, never fail generation over it
+                pass
+
+    def finish(self):
+        """
+        Mark the run as finished.
+        """
+        self.finished_at = time.time()
+
+    def records(self):
+        """
+        Get the records collected so far.
+
+        Returns:
+            list: Record dictionaries, in completion order
+        """
+        with self._lock:
+            return list(self._records)
+
+    def summary(self, slowest=settings.TELEMETRY_SLOWEST_COUNT):
+        """
+        Summarize the run.
+
+        Args:
+            slowest (int, optional): Number of slowest requirements to include
+
+        Returns:
+            dict: Totals, throughput and latency figures, plus the slowest
+                  requirements generated through the API. The time saved by
+                  reusing past test cases is estimated from the mean latency.
+        """
+        records = self.records()
+        generated = [r for r in records if r["source"] == "api"]
+        latencies = [r["latency"] for r in generated]
+        elapsed = (self.finished_at or time.time()) - self.started_at
+        prompt_tokens = sum(r["prompt_tokens"] for r in records)
+        cached_tokens = sum(r["cached_tokens"] for r in records)
+        retrieved = sum(1 for r in records if r["source"] == "retrieved")
+
+        return {
+            "model": self.model,
+            "requirements": len(records),
+            "generated": len(generated),
+            "cached": sum(1 for r in records if r["source"] == "cache"),
+            "resumed": sum(1 for r in records if r["source"] == "journal"),
+            "deduplicated": sum(1 for r in records if r["source"] == "duplicate"),
+            "retrieved": retrieved,
+            "templated": sum(1 for r in records if r["source"] == "template"),
+            "estimated_time_saved": retrieved * statistics.mean(latencies) if latencies else 0.0,
+            "failed": sum(1 for r in records if r["error"]),
+            "elapsed": elapsed,
+            "throughput": len(records) / elapsed if elapsed > 0 else 0.0,
+            "requests": sum(r["requests"] for r in records),
+            "retries": sum(r["retries"] for r in records),
+            "parse_failures": sum(r["parse_failures"] for r in records),
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": sum(r["completion_tokens"] for r in records),
+            "cached_tokens": cached_tokens,
+            "prompt_cache_rate": (cached_tokens / prompt_tokens * 100) if prompt_tokens > 0 else 0.0,
+            "mean_latency": statistics.mean(latencies) if latencies else 0.0,
+            "p95_latency": _percentile(latencies, 0.95),
+            "mean_queue_wait": statistics.mean(r["queue_wait"] for r in generated) if generated else 0.0,
+            "slowest": sorted(generated, key=lambda r: r["latency"] + r["queue_wait"], reverse=True)[:slowest]
+        }
+
+def _percentile(values, fraction):
+    """
+    Nearest-rank percentile.
+
+    Args:
+        values (list): Values
+        fraction (float): Percentile as a fraction (0.95 for p95)
+
+    Returns:
+        float: Percentile value, or 0.0 for no values
+    """
+    if not values:
+        return 0.0
+
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))
+    return ordered[index]
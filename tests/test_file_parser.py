@@ -0,0 +1,79 @@
+import pytest
+
+# file_parser needs the application's UI dependencies
+pytest.importorskip("pandas")
+pytest.importorskip("streamlit")
+pytest.importorskip("cryptography")
+
+from utils import file_parser, helpers
+
+def _requirement(req_id, description):
+    return {"requirement_id": req_id, "description": description}
+
+def test_diff_requirements_classifies_changes():
+    previous = [_requirement("REQ-1", "Disable root login"), _requirement("REQ-2", "Enable auditd"),
+                _requirement("REQ-3", "Remove telnet")]
+    fingerprints = {req["requirement_id"]: helpers.requirement_fingerprint(req) for req in previous}
+    current = [_requirement("REQ-1", "Disable   root login"), _requirement("REQ-2", "Enable auditd at boot"),
+               _requirement("REQ-4", "Install aide")]
+
+    assert file_parser.diff_requirements(fingerprints, current) == {
+        "added": ["REQ-4"],
+        "modified": ["REQ-2"],
+        "unchanged": ["REQ-1"],
+        "removed": ["REQ-3"]
+    }
+
+def test_diff_requirements_without_previous_run_adds_everything():
+    changes = file_parser.diff_requirements({}, [_requirement("REQ-1", "Disable root login")])
+
+    assert changes["added"] == ["REQ-1"]
+    assert not changes["modified"] and not changes["unchanged"] and not changes["removed"]
+
+def test_mark_near_duplicates_points_to_the_first_requirement():
+    requirements = [
+        _requirement("REQ-1", "Ensure that remote root login over SSH is disabled on all production servers"),
+        _requirement("REQ-2", "Ensure that remote root login over SSH is disabled on all production servers worldwide"),
+        _requirement("REQ-3", "Ensure that remote root login over SSH is enabled on all production servers"),
+        dict(_requirement("REQ-4", "Install aide"), duplicate_of="REQ-1")
+    ]
+
+    assert file_parser.mark_near_duplicates(requirements) == 1
+    assert requirements[1]["duplicate_of"] == "REQ-1"
+    assert "duplicate_of" not in requirements[2]
+    assert "duplicate_of" not in requirements[3]
+
+def test_parse_inventory_groups_ports_and_variables():
+    inventory = """
+    bastion.example.com
+    [web]
+    web[01:03].example.com   # three hosts
+    app ansible_host=10.0.0.5 ansible_port=2222 ansible_user=deploy
+    [db]
+    10.0.1.7:2200 user=postgres
+    [db:vars]
+    username=admin
+    """
+
+    hosts = file_parser.parse_inventory(inventory)
+
+    assert [(host["name"], host["group"]) for host in hosts] == [
+        ("bastion.example.com", "ungrouped"),
+        ("web01.example.com", "web"), ("web02.example.com", "web"), ("web03.example.com", "web"),
+        ("app", "web"),
+        ("10.0.1.7:2200", "db")
+    ]
+    assert hosts[1] == {"name": "web01.example.com", "hostname": "web01.example.com", "port": "22",
+                        "username": None, "group": "web"}
+    assert (hosts[4]["hostname"], hosts[4]["port"], hosts[4]["username"]) == ("10.0.0.5", "2222", "deploy")
+    assert (hosts[5]["hostname"], hosts[5]["port"], hosts[5]["username"]) == ("10.0.1.7", "2200", "postgres")
+
+def test_parse_inventory_group_vars_fill_unset_values():
+    hosts = file_parser.parse_inventory("[db]\ndb1\ndb2 username=dba\n[db:vars]\nansible_user=admin\nansible_port=2022\n")
+
+    assert [(host["username"], host["port"]) for host in hosts] == [("admin", "2022"), ("dba", "2022")]
+
+def test_parse_inventory_keeps_first_of_duplicate_hosts():
+    hosts = file_parser.parse_inventory("[a]\nweb1\n[b]\nweb1\n")
+
+    assert [(host["name"], host["group"]) for host in hosts] == [("web1", "a")]
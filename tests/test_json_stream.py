@@ -0,0 +1,43 @@
+import json
+import pytest
+from utils.json_stream import IncrementalJSONArrayParser, repair_json
+
+RESPONSE = json.dumps({
+    "test_cases": [
+        {"test_case_id": "TC-1", "title": "Braces } and [ in a \"string\""},
+        {"test_case_id": "TC-2", "steps": [{"step": 1}, {"step": 2}]}
+    ]
+})
+
+def test_parser_yields_objects_split_over_chunks():
+    parser = IncrementalJSONArrayParser()
+    completed = []
+    for char in RESPONSE:
+        completed.extend(parser.feed(char))
+
+    assert completed == [("test_cases", obj) for obj in json.loads(RESPONSE)["test_cases"]]
+    assert parser.objects_parsed == 2
+
+def test_parser_yields_object_as_soon_as_it_is_complete():
+    parser = IncrementalJSONArrayParser()
+    first_end = RESPONSE.index("},") + 1
+
+    assert parser.feed(RESPONSE[:first_end - 1]) == []
+    assert [obj["test_case_id"] for _, obj in parser.feed(RESPONSE[first_end - 1:first_end])] == ["TC-1"]
+
+def test_parser_top_level_array_has_no_key():
+    parser = IncrementalJSONArrayParser()
+
+    assert parser.feed('[{"a": 1}, {"b": 2}]') == [(None, {"a": 1}), (None, {"b": 2})]
+
+def test_repair_strips_code_fence_and_trailing_commas():
+    assert repair_json('```json\n{"test_cases": [{"a": 1},],}\n```') == {"test_cases": [{"a": 1}]}
+
+def test_repair_keeps_complete_objects_of_truncated_response():
+    truncated = RESPONSE[:RESPONSE.index('"steps"')]
+
+    assert repair_json(truncated) == {"test_cases": [json.loads(RESPONSE)["test_cases"][0]]}
+
+def test_repair_raises_without_usable_json():
+    with pytest.raises(json.JSONDecodeError):
+        repair_json("no json here")
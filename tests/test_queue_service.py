@@ -0,0 +1,80 @@
+import time
+import threading
+from services import queue_service
+
+def _wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.001)
+
+def _queue_work(queue, queue_id, order, threads, weight=1):
+    def work():
+        queue.acquire(queue_id, weight)
+        order.append(queue_id)
+        queue.release(queue_id)
+
+    waiting = queue.status(queue_id)["waiting"]
+    thread = threading.Thread(target=work, daemon=True)
+    thread.start()
+    threads.append(thread)
+    _wait_until(lambda: queue.status(queue_id)["waiting"] == waiting + 1)
+
+def _run(queue_ids, weights=None):
+    queue = queue_service.FairShareQueue(max_concurrency=1)
+    queue.acquire("holder")
+    order, threads = [], []
+
+    for queue_id in queue_ids:
+        _queue_work(queue, queue_id, order, threads, (weights or {}).get(queue_id, 1))
+
+    queue.release("holder")
+    for thread in threads:
+        thread.join(5)
+
+    return order, queue
+
+def test_sessions_take_turns():
+    order, queue = _run(["A", "A", "A", "B", "B", "B"])
+
+    assert order == ["A", "B", "A", "B", "A", "B"]
+    assert queue.status()["active"] == 0
+
+def test_weight_gives_consecutive_turns():
+    order, _ = _run(["A", "A", "A", "B", "B", "B"], {"A": 2})
+
+    assert order == ["A", "A", "B", "A", "B", "B"]
+
+def test_concurrency_is_bounded():
+    queue = queue_service.FairShareQueue(max_concurrency=2)
+    queue.acquire("A")
+    queue.acquire("B")
+    order, threads = [], []
+
+    _queue_work(queue, "C", order, threads)
+    assert queue.status("C") == {
+        "active": 2, "capacity": 2, "sessions": 3, "waiting_total": 1, "waiting": 1, "running": 0, "ahead": 0
+    }
+
+    queue.release("A")
+    threads[0].join(5)
+    assert order == ["C"]
+
+def test_get_queue_is_shared_per_api_key():
+    assert queue_service.get_queue("key-1") is queue_service.get_queue("key-1")
+    assert queue_service.get_queue("key-1") is not queue_service.get_queue("key-2")
+
+def test_drained_sessions_leave_no_state():
+    _, queue = _run(["A", "B", "A"], {"A": 2})
+
+    assert queue._weights == {} and queue._credits == {} and queue._waiting == {}
+    assert list(queue._rotation) == []
+
+def test_get_queue_drops_idle_queues(monkeypatch):
+    old = queue_service.get_queue("key-idle")
+    monkeypatch.setattr(queue_service.settings, "FAIR_SHARE_IDLE_AFTER", 0)
+    time.sleep(0.01)
+
+    queue_service.get_queue("key-other")
+
+    assert queue_service.get_queue("key-idle") is not old
@@ -0,0 +1,51 @@
+import pytest
+
+# retrieval_service caches its shared index with Streamlit
+pytest.importorskip("streamlit")
+
+from services import retrieval_service
+
+TEST_CASES = [{"test_case_id": "TC-REQ1-001", "title": "Verify root login is refused"}]
+
+@pytest.fixture
+def index(tmp_path):
+    index = retrieval_service.TestCaseIndex(str(tmp_path))
+    index.add({"requirement_id": "REQ-1", "description": "Ensure SSH root login is disabled"}, TEST_CASES)
+    index.add({"requirement_id": "REQ-2", "description": "Ensure the aide package is installed"}, TEST_CASES)
+    return index
+
+def test_find_reuses_similar_requirement(index):
+    test_cases, requirement_id, score = index.find("Ensure that SSH root login is disabled")
+
+    assert test_cases == TEST_CASES
+    assert requirement_id == "REQ-1"
+    assert score >= 0.8
+
+def test_find_rejects_opposite_polarity(index):
+    assert index.find("Ensure SSH root login is enabled", threshold=0.0) == (None, None, 0.0)
+    assert index.find("Ensure SSH root login is not disabled", threshold=0.0) == (None, None, 0.0)
+
+def test_find_rejects_different_numbers(tmp_path):
+    index = retrieval_service.TestCaseIndex(str(tmp_path))
+    index.add({"requirement_id": "REQ-1", "description": "Set sshd_config permissions to 0600"}, TEST_CASES)
+
+    assert index.find("Set sshd_config permissions to 0640", threshold=0.0) == (None, None, 0.0)
+
+def test_index_is_persistent(index, tmp_path):
+    reopened = retrieval_service.TestCaseIndex(str(tmp_path))
+
+    assert reopened.find("Ensure SSH root login is disabled")[1] == "REQ-1"
+    assert reopened.stats()["entries"] == 2
+
+def test_add_drops_oldest_beyond_limit(tmp_path):
+    index = retrieval_service.TestCaseIndex(str(tmp_path), max_documents=2)
+    index.add({"requirement_id": "REQ-1", "description": "Ensure SSH root login is disabled"}, TEST_CASES)
+    index.add({"requirement_id": "REQ-2", "description": "Ensure the aide package is installed"}, TEST_CASES)
+    index.add({"requirement_id": "REQ-3", "description": "Ensure auditd service is running"}, TEST_CASES)
+
+    assert index.stats()["entries"] == 2
+    assert index.find("Ensure SSH root login is disabled") == (None, None, 0.0)
+    assert index.find("Ensure auditd service is running")[1] == "REQ-3"
+    assert "root" not in index._postings
+    assert index._total_length == sum(index._lengths.values())
+    assert retrieval_service.TestCaseIndex(str(tmp_path), max_documents=2).stats()["entries"] == 2
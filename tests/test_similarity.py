@@ -0,0 +1,41 @@
+from config import settings
+from utils import similarity
+
+DISABLED = "Ensure that remote root login over SSH is disabled on all production servers in every data centre"
+ENABLED = DISABLED.replace("disabled", "enabled")
+NEAR_DUPLICATE = DISABLED + " worldwide"
+
+def test_shingles_and_jaccard():
+    assert similarity.shingles("Root login, disabled!", size=2) == {"root login", "login disabled"}
+    assert similarity.shingles("Root", size=2) == {"root"}
+    assert similarity.jaccard({"a", "b"}, {"b", "c"}) == 1 / 3
+
+def test_polarity_tokens():
+    assert similarity.polarity_tokens(DISABLED) == {"disabled"}
+    assert similarity.polarity_tokens("Root login is not disabled") == {"not", "disabled"}
+    assert similarity.polarity_tokens("Users can't log in") == {"not"}
+    assert similarity.polarity_tokens("Logs must be world-readable") != similarity.polarity_tokens("Logs must be world-writable")
+
+def test_finds_near_duplicates():
+    texts = [DISABLED, "Install the aide package", NEAR_DUPLICATE]
+
+    assert similarity.find_near_duplicates(texts) == [[0, 2]]
+
+def test_opposite_polarity_is_not_a_near_duplicate():
+    # Worded alike enough to pass the similarity threshold on its own
+    assert similarity.jaccard(similarity.shingles(DISABLED), similarity.shingles(ENABLED)) >= settings.DEDUP_SIMILARITY_THRESHOLD
+
+    assert similarity.find_near_duplicates([DISABLED, ENABLED]) == []
+    assert similarity.find_near_duplicates([DISABLED, DISABLED.replace("is disabled", "is not disabled")]) == []
+
+def test_different_numbers_are_not_near_duplicates():
+    mode_0640 = "Ensure permissions on /etc/ssh/sshd_config are set to 0640 for the root user and group"
+
+    assert similarity.find_near_duplicates([mode_0640, mode_0640.replace("0640", "0600")]) == []
+
+def test_exact_duplicates_are_grouped_with_the_first():
+    texts = ["", "Enable auditd"] + ["Disable  telnet"] * 1000 + ["disable telnet."]
+
+    groups = similarity.find_near_duplicates(texts)
+
+    assert groups == [list(range(2, len(texts)))]
@@ -0,0 +1,25 @@
+from services import template_service
+
+def test_sshd_option_expects_hardened_value():
+    name, test_cases = template_service.match_template("Ensure SSH X11 forwarding is disabled")
+
+    assert name == "sshd_option"
+    assert "x11forwarding no" in test_cases[0]["verification_commands"][0]
+
+def test_sshd_option_skips_opposite_polarity():
+    assert template_service.match_template("Ensure X11 forwarding is enabled for admins over SSH") == (None, None)
+    assert template_service.match_template("Ensure SSH root login is permitted") == (None, None)
+    assert template_service.match_template("Ensure SSH root login is not permitted")[0] == "sshd_option"
+
+def test_sshd_option_limit_ignores_section_number():
+    name, test_cases = template_service.match_template("5.2.7 Ensure SSH MaxAuthTries is set to 4 or less")
+
+    assert name == "sshd_option"
+    assert "-le 4 " in test_cases[0]["verification_commands"][0]
+    assert test_cases[0]["title"].endswith("MaxAuthTries is 4 or less")
+
+def test_sshd_option_limit_falls_back_to_default():
+    name, test_cases = template_service.match_template("5.2.16 Ensure SSH LoginGraceTime is set to one minute or less")
+
+    assert name == "sshd_option"
+    assert "-le 60 " in test_cases[0]["verification_commands"][0]
@@ -0,0 +1,265 @@
+"""
+Benchmark test case generation throughput.
+
+Runs ai_service.generate_test_cases on the same requirements in sequential,
+concurrent and packed mode and reports requirements per second, p50/p99
+request latency and how many requirements ended up with test cases despite
+injected failures. By default the requests go to the local mock server
+(tools/mock_openai_server.py), started in-process with the given latency and
+fault settings, so no API quota is used.
+
+Usage:
+    python tools/benchmark_generation.py [--requirements 50] [--concurrency 8]
+        [--pack-size 5] [--modes sequential concurrent packed] [--stream]
+        [--rate-limit-rate 0.05] [--malformed-rate 0.02] [--base-url URL]
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+import argparse
+import threading
+import statistics
+import urllib.request
+from pathlib import Path
+
+# Add the project root to path so we can import modules
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# The mock server has no quota, so don't let the client-side rate limiter be
+# the bottleneck, and keep benchmark runs out of the app's run journals
+os.environ.setdefault("OPENAI_REQUESTS_PER_MINUTE", "1000000")
+os.environ.setdefault("OPENAI_TOKENS_PER_MINUTE", "1000000000")
+os.environ.setdefault("AI_TESTING_TOOL_RUNS_DIR", os.path.join(tempfile.gettempdir(), "ai-testing-tool-benchmark-runs"))
+
+from streamlit import logger as st_logger
+from config import settings
+from services import ai_service
+from tools import mock_openai_server
+
+MODES = ["sequential", "concurrent", "packed"]
+
+def make_requirements(count):
+    """
+    Build synthetic requirements.
+
+    Args:
+        count (int): Number of requirements
+
+    Returns:
+        list: Requirements
+    """
+    services = ["sshd", "auditd", "chronyd", "rsyslog", "firewalld", "cron"]
+    return [
+        {
+            "requirement_id": f"REQ-{i:03d}",
+            "description": f"The {services[i % len(services)]} service must be enabled, running and "
+                           f"configured according to hardening rule {i}."
+        }
+        for i in range(1, count + 1)
+    ]
+
+def load_requirements(path, count):
+    """
+    Load requirements from a JSON file, or build synthetic ones.
+
+    Args:
+        path (str): Path to a JSON list of requirements, or None
+        count (int): Number of synthetic requirements
+
+    Returns:
+        list: Requirements
+    """
+    if not path:
+        return make_requirements(count)
+
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+class LatencyRecorder:
+    """
+    Records the latency of every completion request made by ai_service.
+    """
+
+    def __init__(self):
+        """Initialize an empty recorder."""
+        self.latencies = []
+        self.failures = 0
+        self._lock = threading.Lock()
+        self._original = None
+
+    def __enter__(self):
+        """Start timing ai_service completion requests."""
+        self._original = ai_service._request_completion
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return self._original(*args, **kwargs)
+            except Exception:
+                with self._lock:
+                    self.failures += 1
+                raise
+            finally:
+                with self._lock:
+                    self.latencies.append(time.perf_counter() - start)
+
+        ai_service._request_completion = timed
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Stop timing."""
+        ai_service._request_completion = self._original
+
+def fetch_server_stats(base_url):
+    """
+    Read the request counters of the mock server.
+
+    Args:
+        base_url (str): API base URL of the mock server
+
+    Returns:
+        dict: Counters, or an empty dict if the server does not provide them
+    """
+    root = base_url.rstrip("/")
+    if root.endswith("/v1"):
+        root = root[:-3]
+
+    try:
+        with urllib.request.urlopen(f"{root}/stats", timeout=5) as response:
+            return json.loads(response.read())
+    except (OSError, ValueError):
+        return {}
+
+def percentile(values, fraction):
+    """
+    Nearest-rank percentile.
+
+    Args:
+        values (list): Values
+        fraction (float): Percentile as a fraction (0.99 for p99)
+
+    Returns:
+        float: Percentile value, or 0.0 for no values
+    """
+    if not values:
+        return 0.0
+
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))
+    return ordered[index]
+
+def run_mode(mode, requirements, args, base_url):
+    """
+    Generate test cases for all requirements in one mode.
+
+    Args:
+        mode (str): One of MODES
+        requirements (list): Requirements to generate for
+        args (argparse.Namespace): Benchmark arguments
+        base_url (str): API base URL
+
+    Returns:
+        dict: Measurements for the mode
+    """
+    openai_config = {
+        "api_key": args.api_key,
+        "base_url": base_url,
+        "model": args.model,
+        "num_test_cases": args.num_test_cases,
+        "max_concurrency": 1 if mode == "sequential" else args.concurrency,
+        "pack_size": args.pack_size if mode == "packed" else 1,
+        "stream": args.stream,
+        "output_format": args.output_format,
+        # Measure the API path only: no reuse between modes or runs
+        "use_cache": False,
+        "use_retrieval": False,
+        "template_mode": "off",
+        "dedupe": False
+    }
+
+    before = fetch_server_stats(base_url)
+
+    with LatencyRecorder() as recorder:
+        start = time.perf_counter()
+        test_cases = ai_service.generate_test_cases(requirements, openai_config)
+        elapsed = time.perf_counter() - start
+
+    after = fetch_server_stats(base_url)
+    server = {key: after.get(key, 0) - before.get(key, 0) for key in after}
+
+    covered = {tc.get("requirement_id") for tc in test_cases}
+    succeeded = sum(1 for req in requirements if req.get("requirement_id") in covered)
+
+    return {
+        "elapsed": elapsed,
+        "throughput": len(requirements) / elapsed if elapsed > 0 else 0.0,
+        "requests": len(recorder.latencies),
+        "failed_requests": recorder.failures,
+        "p50": percentile(recorder.latencies, 0.50),
+        "p99": percentile(recorder.latencies, 0.99),
+        "mean": statistics.mean(recorder.latencies) if recorder.latencies else 0.0,
+        "succeeded": succeeded,
+        "test_cases": len(test_cases),
+        "server": server
+    }
+
+def main():
+    """
+    Parse arguments, run the benchmark and print the results.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark test case generation throughput")
+    parser.add_argument("--base-url", default=None, help="Use this OpenAI-compatible API instead of the built-in mock")
+    parser.add_argument("--api-key", default=os.environ.get("OPENAI_API_KEY", "mock-key"), help="API key")
+    parser.add_argument("--model", default=settings.DEFAULT_MODEL, help="Model name")
+    parser.add_argument("--requirements", type=int, default=50, help="Number of synthetic requirements")
+    parser.add_argument("--requirements-file", default=None, help="JSON file with a list of requirements")
+    parser.add_argument("--num-test-cases", type=int, default=settings.DEFAULT_TEST_CASES_PER_REQ)
+    parser.add_argument("--concurrency", type=int, default=settings.DEFAULT_GENERATION_CONCURRENCY)
+    parser.add_argument("--pack-size", type=int, default=5, help="Requirements per request in packed mode")
+    parser.add_argument("--output-format", default=settings.DEFAULT_OUTPUT_FORMAT, choices=settings.OUTPUT_FORMATS)
+    parser.add_argument("--stream", action="store_true", help="Stream completions")
+    parser.add_argument("--modes", nargs="+", default=MODES, choices=MODES)
+    mock_openai_server.add_behavior_arguments(parser)
+    args = parser.parse_args()
+
+    # Streamlit warns about the missing script context on every UI call
+    st_logger.set_log_level("error")
+
+    server = None
+    base_url = args.base_url
+    if not base_url:
+        server = mock_openai_server.start_server(mock_openai_server.behavior_from_args(args))
+        base_url = f"http://127.0.0.1:{server.server_port}/v1"
+
+    requirements = load_requirements(args.requirements_file, args.requirements)
+
+    results = {}
+    try:
+        for mode in args.modes:
+            print(f"Running {mode} mode on {len(requirements)} requirements...")
+            results[mode] = run_mode(mode, requirements, args, base_url)
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    # Print the comparison table
+    print()
+    print(
+        f"{'Mode':<12}{'Req/s':>8}{'Total':>9}{'Requests':>10}{'p50':>8}{'p99':>8}"
+        f"{'Covered':>10}{'429s':>6}{'5xx':>6}{'Broken':>8}"
+    )
+    for mode, result in results.items():
+        server_stats = result["server"]
+        print(
+            f"{mode:<12}{result['throughput']:>8.2f}{result['elapsed']:>8.1f}s{result['requests']:>10}"
+            f"{result['p50']:>7.2f}s{result['p99']:>7.2f}s"
+            f"{result['succeeded']:>5}/{len(requirements):<4}"
+            f"{server_stats.get('rate_limited', '-'):>6}{server_stats.get('errors', '-'):>6}"
+            f"{server_stats.get('malformed', '-'):>8}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Benchmark completion tokens and latency per test case output format.
+
+Sends the same requirements to the OpenAI API once per output format
+(standard, compact, structured) and reports the average completion tokens,
+latency and number of test cases per requirement, plus the savings relative
+to the standard format.
+
+Usage:
+    python tools/benchmark_output_format.py --api-key sk-... [--model gpt-4o-mini]
+        [--requirements requirements.json] [--num-test-cases 3] [--base-url URL]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+from pathlib import Path
+
+# Add the project root to path so we can import modules
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import openai
+from config import settings
+from services import ai_service
+
+# Typical hardening requirements used when no requirements file is given
+SAMPLE_REQUIREMENTS = [
+    {"requirement_id": "REQ-001", "description": "The /etc/shadow file must be owned by root and have permissions 0640 or stricter."},
+    {"requirement_id": "REQ-002", "description": "The host firewall (ufw) must be enabled and deny incoming connections by default."},
+    {"requirement_id": "REQ-003", "description": "SSH root login must be disabled in /etc/ssh/sshd_config."},
+    {"requirement_id": "REQ-004", "description": "Password authentication for SSH must be disabled; only key-based login is allowed."},
+    {"requirement_id": "REQ-005", "description": "The system must synchronize time with an approved NTP server."}
+]
+
+def load_requirements(path):
+    """
+    Load requirements from a JSON file, or use the built-in samples.
+
+    Args:
+        path (str): Path to a JSON list of requirements, or None
+
+    Returns:
+        list: Requirements
+    """
+    if not path:
+        return SAMPLE_REQUIREMENTS
+
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def run_format(client, model, requirements, num_test_cases, output_format):
+    """
+    Generate test cases for every requirement in one output format.
+
+    Args:
+        client (openai.OpenAI): OpenAI client
+        model (str): Model name
+        requirements (list): Requirements to generate for
+        num_test_cases (int): Number of test cases per requirement
+        output_format (str): Output format to benchmark
+
+    Returns:
+        list: One measurement dict per requirement
+    """
+    measurements = []
+
+    for req in requirements:
+        request = ai_service.build_generation_request(req, num_test_cases, output_format)
+
+        start = time.perf_counter()
+        try:
+            response = client.chat.completions.create(model=model, **request)
+        except Exception as e:
+            print(f"  {req.get('requirement_id')}: error: {e}")
+            continue
+        latency = time.perf_counter() - start
+
+        # Count the test cases that came back
+        try:
+            test_cases = ai_service._parse_test_cases(json.loads(response.choices[0].message.content))
+        except (json.JSONDecodeError, TypeError):
+            test_cases = []
+
+        usage = response.usage
+        measurements.append({
+            "requirement_id": req.get("requirement_id"),
+            "latency": latency,
+            "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+            "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+            "test_cases": len(test_cases)
+        })
+
+    return measurements
+
+def summarize(measurements):
+    """
+    Average the measurements of one output format.
+
+    Args:
+        measurements (list): Measurements from run_format
+
+    Returns:
+        dict: Averages per requirement, or None if nothing succeeded
+    """
+    if not measurements:
+        return None
+
+    return {
+        key: statistics.mean(m[key] for m in measurements)
+        for key in ("latency", "prompt_tokens", "completion_tokens", "test_cases")
+    }
+
+def main():
+    """
+    Parse arguments, run the benchmark and print the results.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark test case output formats")
+    parser.add_argument("--api-key", default=os.environ.get("OPENAI_API_KEY"), help="OpenAI API key")
+    parser.add_argument("--base-url", default=None, help="OpenAI-compatible API base URL")
+    parser.add_argument("--model", default=settings.DEFAULT_MODEL, help="Model to benchmark")
+    parser.add_argument("--requirements", default=None, help="JSON file with a list of requirements")
+    parser.add_argument("--num-test-cases", type=int, default=settings.DEFAULT_TEST_CASES_PER_REQ)
+    parser.add_argument("--formats", nargs="+", default=settings.OUTPUT_FORMATS, choices=settings.OUTPUT_FORMATS)
+    args = parser.parse_args()
+
+    if not args.api_key:
+        parser.error("an API key is required (--api-key or OPENAI_API_KEY)")
+
+    client = openai.OpenAI(api_key=args.api_key, base_url=args.base_url)
+    requirements = load_requirements(args.requirements)
+
+    results = {}
+    for output_format in args.formats:
+        print(f"Running {output_format} format on {len(requirements)} requirements...")
+        results[output_format] = summarize(
+            run_format(client, args.model, requirements, args.num_test_cases, output_format)
+        )
+
+    # Print the comparison table
+    baseline = results.get("standard")
+    print()
+    print(f"{'Format':<12}{'Latency/req':>14}{'Prompt tok':>12}{'Completion tok':>16}{'TCs/req':>10}{'Tokens saved':>14}{'Time saved':>12}")
+    for output_format, summary in results.items():
+        if summary is None:
+            print(f"{output_format:<12}{'(all requests failed)':>40}")
+            continue
+
+        token_saving = time_saving = ""
+        if baseline and output_format != "standard":
+            if baseline["completion_tokens"]:
+                token_saving = f"{(1 - summary['completion_tokens'] / baseline['completion_tokens']) * 100:.1f}%"
+            if baseline["latency"]:
+                time_saving = f"{(1 - summary['latency'] / baseline['latency']) * 100:.1f}%"
+
+        print(
+            f"{output_format:<12}{summary['latency']:>13.2f}s{summary['prompt_tokens']:>12.0f}"
+            f"{summary['completion_tokens']:>16.0f}{summary['test_cases']:>10.1f}"
+            f"{token_saving:>14}{time_saving:>12}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,453 @@
+"""
+Local stand-in for the OpenAI chat completions API.
+
+Serves synthetic test case JSON in the shape the generation prompts ask for
+(standard, compact and packed requests), so test case generation can be
+load-tested without spending API quota. Latency, streaming speed, rate limit
+errors, server errors and malformed JSON can all be injected.
+
+Point the app or a tool at it with an OpenAI-compatible base URL, e.g.
+``OPENAI_BASE_URL=http://127.0.0.1:8765/v1``. Request counters are available
+from ``GET /stats``.
+
+Usage:
+    python tools/mock_openai_server.py [--port 8765] [--latency 0.5] [--jitter 0.2]
+        [--tokens-per-second 400] [--rate-limit-rate 0.05] [--retry-after 1]
+        [--error-rate 0.0] [--malformed-rate 0.0] [--response-file canned.json]
+"""
+
+import re
+import json
+import time
+import uuid
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Prompt patterns written by services.ai_service
+_COUNT_PATTERN = re.compile(r"Create (\d+)")
+_SINGLE_ID_PATTERN = re.compile(r"TC-([A-Za-z0-9]+)-001")
+_PACKED_ID_PATTERN = re.compile(r"\[([^\]]+)\] \(test case IDs like TC-([A-Za-z0-9]+)-001\)")
+
+class MockBehavior:
+    """
+    Fault and latency settings of the mock server, plus request counters.
+    """
+
+    def __init__(self, latency=0.5, jitter=0.2, tokens_per_second=400.0, rate_limit_rate=0.0,
+                 retry_after=1.0, error_rate=0.0, malformed_rate=0.0, canned=None, seed=None):
+        """
+        Initialize the behavior.
+
+        Args:
+            latency (float): Seconds before the first byte of a response
+            jitter (float): Random extra latency of up to this many seconds
+            tokens_per_second (float): Completion speed (0 sends everything at once)
+            rate_limit_rate (float): Fraction of requests answered with 429
+            retry_after (float): Retry-After seconds sent with 429 responses
+            error_rate (float): Fraction of requests answered with 500
+            malformed_rate (float): Fraction of completions cut off mid-JSON
+            canned (str, optional): Fixed completion content to return
+            seed (int, optional): Random seed for reproducible fault injection
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.tokens_per_second = tokens_per_second
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.error_rate = error_rate
+        self.malformed_rate = malformed_rate
+        self.canned = canned
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._seen_prefixes = set()
+        self.stats = {"requests": 0, "completed": 0, "rate_limited": 0, "errors": 0, "malformed": 0}
+
+    def roll(self, rate):
+        """
+        Decide at random whether to inject a fault.
+
+        Args:
+            rate (float): Probability of the fault
+
+        Returns:
+            bool: True if the fault should be injected
+        """
+        with self._lock:
+            return self._random.random() < rate
+
+    def count(self, name):
+        """
+        Increment a request counter.
+
+        Args:
+            name (str): Counter name
+        """
+        with self._lock:
+            self.stats[name] += 1
+
+    def cached_tokens(self, messages):
+        """
+        Simulate provider-side prompt caching.
+
+        The first message of a request counts as cached once a request with
+        the same first message has been seen.
+
+        Args:
+            messages (list): Request messages
+
+        Returns:
+            int: Number of cached prompt tokens
+        """
+        if not messages or not isinstance(messages[0].get("content"), str):
+            return 0
+
+        prefix = messages[0]["content"]
+        with self._lock:
+            if prefix in self._seen_prefixes:
+                return len(prefix) // 4
+            self._seen_prefixes.add(prefix)
+            return 0
+
+    def snapshot(self):
+        """
+        Get a copy of the request counters.
+
+        Returns:
+            dict: Request counters
+        """
+        with self._lock:
+            return dict(self.stats)
+
+def build_content(prompt, canned=None):
+    """
+    Build a completion for a generation prompt.
+
+    Args:
+        prompt (str): User prompt sent by the client
+        canned (str, optional): Fixed content to return instead
+
+    Returns:
+        str: JSON completion content
+    """
+    if canned is not None:
+        return canned
+
+    match = _COUNT_PATTERN.search(prompt)
+    count = int(match.group(1)) if match else 3
+    compact = "Use exactly these keys" in prompt
+
+    packed = _PACKED_ID_PATTERN.findall(prompt)
+    if packed:
+        return json.dumps({
+            req_id: [_make_test_case(safe_id, n, compact) for n in range(1, count + 1)]
+            for req_id, safe_id in packed
+        })
+
+    match = _SINGLE_ID_PATTERN.search(prompt)
+    safe_id = match.group(1) if match else "REQ"
+    test_cases = [_make_test_case(safe_id, n, compact) for n in range(1, count + 1)]
+
+    return json.dumps({"tc": test_cases} if compact else {"test_cases": test_cases})
+
+def _make_test_case(safe_id, number, compact):
+    """
+    Build one synthetic test case.
+
+    Args:
+        safe_id (str): Alphanumeric requirement ID used in test case IDs
+        number (int): Test case number
+        compact (bool): Use the compact keys
+
+    Returns:
+        dict: Test case
+    """
+    test_case_id = f"TC-{safe_id}-{number:03d}"
+
+    if compact:
+        return {
+            "id": test_case_id,
+            "t": f"Verify configuration {number}",
+            "pre": "Root access to the host.",
+            "s": ["Inspect the configuration", "Compare with the requirement"],
+            "c": ["uname -a", "id"],
+            "er": "The configuration matches the requirement.",
+            "pc": "All commands succeed.",
+            "p": "M",
+            "ty": "Configuration"
+        }
+
+    return {
+        "test_case_id": test_case_id,
+        "title": f"Verify configuration {number}",
+        "preconditions": "Root access to the host.",
+        "test_steps": ["Inspect the configuration", "Compare with the requirement"],
+        "verification_commands": ["uname -a", "id"],
+        "expected_results": "The configuration matches the requirement.",
+        "pass_criteria": "All commands succeed.",
+        "priority": "Medium",
+        "type": "Configuration"
+    }
+
+class MockOpenAIHandler(BaseHTTPRequestHandler):
+    """
+    Request handler implementing POST /v1/chat/completions and GET /stats.
+    """
+
+    protocol_version = "HTTP/1.1"
+    behavior = MockBehavior()
+
+    def log_message(self, format, *args):
+        """Keep the console quiet under load."""
+
+    def do_GET(self):
+        """Serve the request counters."""
+        if self.path.rstrip("/") != "/stats":
+            self._send_json(404, {"error": {"message": "Not found", "type": "invalid_request_error"}})
+            return
+
+        self._send_json(200, self.behavior.snapshot())
+
+    def do_POST(self):
+        """Serve a chat completion, injecting the configured faults."""
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length)
+
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "Not found", "type": "invalid_request_error"}})
+            return
+
+        try:
+            request = json.loads(body or b"{}")
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": {"message": "Invalid JSON body", "type": "invalid_request_error"}})
+            return
+
+        behavior = self.behavior
+        behavior.count("requests")
+
+        if behavior.roll(behavior.rate_limit_rate):
+            behavior.count("rate_limited")
+            self._send_json(
+                429,
+                {"error": {"message": "Rate limit reached (mock)", "type": "requests", "code": "rate_limit_exceeded"}},
+                {"Retry-After": f"{behavior.retry_after:g}"}
+            )
+            return
+
+        if behavior.roll(behavior.error_rate):
+            behavior.count("errors")
+            self._send_json(500, {"error": {"message": "Internal server error (mock)", "type": "server_error"}})
+            return
+
+        time.sleep(behavior.latency + random.uniform(0, behavior.jitter))
+
+        prompt = "\n".join(
+            m.get("content") or "" for m in request.get("messages", []) if isinstance(m.get("content"), str)
+        )
+        content = build_content(prompt, behavior.canned)
+
+        if behavior.roll(behavior.malformed_rate):
+            behavior.count("malformed")
+            content = content[:max(1, len(content) * 2 // 3)]
+
+        usage = {
+            "prompt_tokens": len(prompt) // 4 + 1,
+            "completion_tokens": len(content) // 4 + 1
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        usage["prompt_tokens_details"] = {"cached_tokens": behavior.cached_tokens(request.get("messages", []))}
+
+        if request.get("stream"):
+            include_usage = (request.get("stream_options") or {}).get("include_usage", False)
+            self._stream(request.get("model", "mock"), content, usage if include_usage else None)
+        else:
+            self._sleep_for_tokens(usage["completion_tokens"])
+            self._send_json(200, {
+                "id": f"chatcmpl-{uuid.uuid4().hex}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model", "mock"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop"
+                }],
+                "usage": usage
+            })
+
+        behavior.count("completed")
+
+    def _stream(self, model, content, usage=None):
+        """
+        Send a completion as server-sent events.
+
+        Args:
+            model (str): Model name to report
+            content (str): Completion content
+            usage (dict, optional): Token usage to send in a final chunk
+        """
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        chunk_size = 16  # about four tokens per chunk
+
+        for start in range(0, len(content), chunk_size):
+            self._send_event({
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": content[start:start + chunk_size]}, "finish_reason": None}]
+            })
+            self._sleep_for_tokens(chunk_size // 4)
+
+        self._send_event({
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]
+        })
+        if usage is not None:
+            self._send_event({
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [],
+                "usage": usage
+            })
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+    def _send_event(self, data):
+        """
+        Write one server-sent event.
+
+        Args:
+            data (dict): Event payload
+        """
+        self.wfile.write(f"data: {json.dumps(data)}\n\n".encode("utf-8"))
+        self.wfile.flush()
+
+    def _sleep_for_tokens(self, tokens):
+        """
+        Simulate the time taken to generate some tokens.
+
+        Args:
+            tokens (int): Number of tokens generated
+        """
+        if self.behavior.tokens_per_second > 0:
+            time.sleep(tokens / self.behavior.tokens_per_second)
+
+    def _send_json(self, status, payload, headers=None):
+        """
+        Send a JSON response.
+
+        Args:
+            status (int): HTTP status code
+            payload (dict): Response body
+            headers (dict, optional): Extra response headers
+        """
+        body = json.dumps(payload).encode("utf-8")
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+def start_server(behavior, host="127.0.0.1", port=0):
+    """
+    Start the mock server in a background thread.
+
+    Args:
+        behavior (MockBehavior): Latency and fault settings
+        host (str, optional): Interface to listen on
+        port (int, optional): Port to listen on (0 picks a free port)
+
+    Returns:
+        ThreadingHTTPServer: Running server; its base URL is
+            ``http://{host}:{server.server_port}/v1``
+    """
+    handler = type("ConfiguredMockOpenAIHandler", (MockOpenAIHandler,), {"behavior": behavior})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def add_behavior_arguments(parser):
+    """
+    Add the latency and fault injection options to an argument parser.
+
+    Args:
+        parser (argparse.ArgumentParser): Parser to extend
+    """
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds before the first byte")
+    parser.add_argument("--jitter", type=float, default=0.2, help="Random extra latency in seconds")
+    parser.add_argument("--tokens-per-second", type=float, default=400.0, help="Completion speed (0 = instant)")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds on 429 responses")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 500")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="Fraction of completions cut off mid-JSON")
+    parser.add_argument("--response-file", default=None, help="File with fixed completion content to return")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for fault injection")
+
+def behavior_from_args(args):
+    """
+    Build the mock behavior from parsed arguments.
+
+    Args:
+        args (argparse.Namespace): Arguments added by add_behavior_arguments
+
+    Returns:
+        MockBehavior: Configured behavior
+    """
+    canned = None
+    if args.response_file:
+        with open(args.response_file, "r", encoding="utf-8") as f:
+            canned = f.read()
+
+    return MockBehavior(
+        latency=args.latency,
+        jitter=args.jitter,
+        tokens_per_second=args.tokens_per_second,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        error_rate=args.error_rate,
+        malformed_rate=args.malformed_rate,
+        canned=canned,
+        seed=args.seed
+    )
+
+def main():
+    """
+    Parse arguments and serve until interrupted.
+    """
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible mock server")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on")
+    add_behavior_arguments(parser)
+    args = parser.parse_args()
+
+    server = start_server(behavior_from_args(args), args.host, args.port)
+    print(f"Mock OpenAI API listening on http://{args.host}:{server.server_port}/v1 (Ctrl+C to stop)")
+
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -7,7 +7,8 @@ import streamlit as st
 import os
 import base64
 from config import settings
-from utils import encryption
+from services import fleet_service
+from utils import encryption, file_parser
 
 def load_css():
     """
@@ -166,9 +167,18 @@ def setup_sidebar():
             value=settings.DEFAULT_TEST_CASES_PER_REQ
         )"""
         
+        max_concurrency = st.slider(
+            "Concurrent Requests",
+            min_value=1,
+            max_value=settings.MAX_GENERATION_CONCURRENCY,
+            value=settings.DEFAULT_GENERATION_CONCURRENCY,
+            help="Number of requirements generated in parallel (1 = one at a time)"
+        )
+        
         openai_config = {
             "api_key": openai_api_key,
             "model": model_selection,
+            "max_concurrency": max_concurrency,
             #"num_test_cases": num_test_cases
         }
         
@@ -177,6 +187,10 @@ def setup_sidebar():
         if operation_mode == "Generate and Execute Tests":
             st.markdown('<h3 class="section-header">SSH Settings</h3>', unsafe_allow_html=True)
             
+            target = st.radio("Target", ["Single Host", "Fleet (Inventory)"], horizontal=True)
+            if target == "Fleet (Inventory)":
+                return operation_mode, openai_config, _setup_fleet_inventory()
+            
             hostname = st.text_input("Hostname/IP", type="password")
             port = st.text_input("Port", value=settings.DEFAULT_PORT)
             username = st.text_input("Username", type="password")
@@ -209,4 +223,59 @@ def display_footer():
     st.markdown(
         f"Your company AI-based End-to-End Testing Tool v{settings.APP_VERSION} | "
         f"© {st.session_state.get('current_year', '2025')} Your company"
-    )
\ No newline at end of file
+    )
+
+def _setup_fleet_inventory():
+    """
+    Set up the host inventory and per-group credentials for fleet mode.
+    
+    Returns:
+        dict: SSH configuration with the configuration of every host under 'inventory'
+    """
+    inventory_file = st.file_uploader("Inventory file", type=["ini", "txt", "cfg"])
+    inventory_text = st.text_area(
+        "Or paste an inventory",
+        height=150,
+        placeholder="[web]\nweb[01:20].example.com\n\n[db]\ndb01.example.com:2222 username=admin",
+        help="INI format: hosts under [group] sections, optional :port and key=value "
+             "variables (hostname, port, username), and [group:vars] sections."
+    )
+    
+    if inventory_file is not None:
+        try:
+            inventory_text = inventory_file.read().decode("utf-8")
+        except UnicodeDecodeError:
+            st.error("Could not decode the inventory file. Please ensure it is UTF-8 text.")
+            inventory_text = ""
+    
+    hosts = file_parser.parse_inventory(inventory_text) if inventory_text.strip() else []
+    if not hosts:
+        return {"inventory": []}
+    
+    groups = list(dict.fromkeys(host["group"] for host in hosts))
+    st.caption(f"{len(hosts)} hosts in {len(groups)} groups")
+    
+    # Credentials are entered per group, never read from the inventory
+    group_credentials = {}
+    for group in groups:
+        with st.expander(f"Credentials: {group} ({sum(1 for host in hosts if host['group'] == group)} hosts)"):
+            username = st.text_input("Username", key=f"fleet_username_{group}",
+                                     help="Used for hosts whose inventory entry sets no username")
+            auth_type = st.radio("Authentication Type", ["Password", "Private Key"], horizontal=True,
+                                 key=f"fleet_auth_type_{group}")
+            
+            if auth_type == "Password":
+                password = st.text_input("Password", type="password", key=f"fleet_password_{group}")
+                private_key = ""
+            else:
+                password = ""
+                private_key = st.text_area("Private Key", height=100, key=f"fleet_private_key_{group}")
+            
+            group_credentials[group] = {
+                "username": username,
+                "auth_type": auth_type.lower(),
+                "password": password,
+                "private_key": private_key
+            }
+    
+    return {"inventory": fleet_service.build_host_configs(hosts, group_credentials)}
@@ -5,9 +5,11 @@ This module handles the UI for entering, uploading, and managing requirements.
 
 import streamlit as st
 import pandas as pd
+from config import settings
+from services import prefetch_service
 from utils import file_parser, helpers
 
-def display_requirements_section():
+def display_requirements_section(openai_config=None):
     """
     Display the requirements input section of the UI.
     
@@ -16,6 +18,11 @@ def display_requirements_section():
     2. Adding requirements to session state
     3. Displaying current requirements
     4. Requirements management (edit, delete, etc.)
+    5. Optional background generation of test cases for loaded requirements
+    
+    Args:
+        openai_config (dict, optional): OpenAI API configuration, needed for
+            background generation
     """
     st.markdown('<h2 class="section-header">Requirements Input</h2>', unsafe_allow_html=True)
     
@@ -26,14 +33,25 @@ def display_requirements_section():
         horizontal=True
     )
     
+    # Start generating test cases as soon as requirements are loaded
+    st.checkbox(
+        "Generate test cases in the background when requirements are loaded",
+        value=settings.PREFETCH_ENABLED,
+        key="prefetch_checkbox",
+        disabled=not (openai_config or {}).get("api_key"),
+        help="Results go to the test case cache, so Generate Test Cases mostly returns immediately. Uses API quota."
+    )
+    
     if input_method == "Enter requirements manually":
         _display_manual_input_form()
     
     elif input_method == "Upload requirements file":
-        _display_file_upload()
+        _display_file_upload(openai_config)
     
     else:  # Paste requirements text
-        _display_text_paste()
+        _display_text_paste(openai_config)
+    
+    _display_prefetch_status()
     
     # Display current requirements
     if "requirements" in st.session_state and st.session_state.requirements:
@@ -84,9 +102,12 @@ def _display_manual_input_form():
             else:
                 st.error("Please fill in both requirement ID and description")
 
-def _display_file_upload():
+def _display_file_upload(openai_config=None):
     """
     Display file upload interface for requirements.
+    
+    Args:
+        openai_config (dict, optional): OpenAI API configuration
     """
     uploaded_file = st.file_uploader(
         "Upload requirements file",
@@ -98,12 +119,15 @@ def _display_file_upload():
         
         if requirements:
             if st.button("Load Requirements"):
-                st.session_state.requirements = requirements
+                _load_requirements(requirements, openai_config)
                 st.success(f"Loaded {len(requirements)} requirements")
 
-def _display_text_paste():
+def _display_text_paste(openai_config=None):
     """
     Display text area for pasting requirements.
+    
+    Args:
+        openai_config (dict, optional): OpenAI API configuration
     """
     req_text = st.text_area(
         "Paste requirements (format: REQ-XXX: Description)",
@@ -113,11 +137,117 @@ def _display_text_paste():
     if req_text and st.button("Parse Requirements"):
         requirements = file_parser.extract_requirements_from_text(req_text)
         if requirements:
-            st.session_state.requirements = requirements
+            _load_requirements(requirements, openai_config)
             st.success(f"Parsed {len(requirements)} requirements")
         else:
             st.error("Could not parse any requirements from the text")
 
+def _load_requirements(requirements, openai_config=None):
+    """
+    Replace the current requirements, keeping test cases that are still valid.
+    
+    The new requirements are compared with those test cases were generated
+    for. Test cases of unchanged requirements are kept, while those of
+    modified and removed requirements are dropped so that only added and
+    modified requirements need to be regenerated. With background generation
+    enabled, generation for the new requirements starts right away.
+    
+    Args:
+        requirements (list): Newly loaded requirements
+        openai_config (dict, optional): OpenAI API configuration
+    """
+    fingerprints = st.session_state.get("generated_fingerprints", {})
+    changes = file_parser.diff_requirements(fingerprints, requirements)
+    
+    # Group near-duplicates so each group only needs to be generated once
+    if settings.DEDUP_ENABLED:
+        duplicates = file_parser.mark_near_duplicates(requirements)
+        if duplicates:
+            st.info(
+                f"{duplicates} requirements are near-duplicates of other requirements "
+                "and will share their test cases."
+            )
+    
+    st.session_state.requirements = requirements
+    
+    if st.session_state.get("prefetch_checkbox") and openai_config:
+        prefetch_service.start_prefetch(requirements, _get_prefetch_config(openai_config))
+    
+    if not st.session_state.get("test_cases") or not fingerprints:
+        return
+    
+    # Drop test cases of requirements that changed or no longer exist
+    unchanged = set(changes["unchanged"])
+    st.session_state.test_cases = [
+        tc for tc in st.session_state.test_cases
+        if tc.get("requirement_id") in unchanged
+    ]
+    st.session_state.generated_fingerprints = {
+        req_id: fp for req_id, fp in fingerprints.items() if req_id in unchanged
+    }
+    
+    st.info(
+        f"Compared with the previously generated set: {len(changes['added'])} added, "
+        f"{len(changes['modified'])} modified, {len(changes['removed'])} removed, "
+        f"{len(changes['unchanged'])} unchanged. Test cases of unchanged requirements were kept."
+    )
+
+def _get_prefetch_config(openai_config):
+    """
+    Combine the OpenAI configuration with the generation options of the Test Cases tab.
+    
+    The options are read from the widget state, since that tab is rendered
+    after this one. Until it has been shown, the defaults apply.
+    
+    Args:
+        openai_config (dict): OpenAI API configuration
+    
+    Returns:
+        dict: Configuration for background generation
+    """
+    state = st.session_state
+    return dict(
+        openai_config,
+        num_test_cases=state.get("num_test_cases_slider", settings.DEFAULT_TEST_CASES_PER_REQ),
+        use_cache=state.get("use_cache_checkbox", settings.CACHE_ENABLED),
+        use_retrieval=state.get("use_retrieval_checkbox", settings.RETRIEVAL_ENABLED),
+        template_mode=state.get("template_mode_select", settings.DEFAULT_TEMPLATE_MODE),
+        dedupe=state.get("dedupe_requirements_checkbox", settings.DEDUP_ENABLED),
+        pack_size=settings.PACK_MAX_REQUIREMENTS if state.get("pack_requirements_checkbox") else 1,
+        output_format=state.get("output_format_select", settings.DEFAULT_OUTPUT_FORMAT)
+    )
+
+def _display_prefetch_status():
+    """
+    Display the progress of background generation, if any.
+    """
+    job = prefetch_service.get_prefetch_job()
+    if job is None:
+        return
+    
+    status = job.status()
+    if status["error"]:
+        st.warning(f"Background generation failed: {status['error']}")
+        return
+    
+    if status["total"] is None:
+        st.caption("Background generation is starting...")
+        return
+    
+    progress = f"{status['done']}/{status['total']} requirements"
+    if status["failed"]:
+        progress += f", {status['failed']} failed"
+    
+    if status["running"]:
+        col1, col2 = st.columns([3, 1])
+        col1.caption(f"Generating test cases in the background: {progress}")
+        if col2.button("Stop Background Generation", key="stop_prefetch"):
+            job.cancel()
+    elif status["cancelled"]:
+        st.caption(f"Background generation stopped after {progress}")
+    else:
+        st.caption(f"Background generation finished: {progress}. Generate Test Cases will use the cached results.")
+
 def _display_current_requirements():
     """
     Display and manage current requirements in session state.
@@ -129,7 +259,8 @@ def _display_current_requirements():
         {
             "ID": r.get("requirement_id", ""),
             "Type": r.get("type", ""),
-            "Description": r.get("description", "")
+            "Description": r.get("description", ""),
+            "Duplicate Of": r.get("duplicate_of", "")
         }
         for r in st.session_state.requirements
     ])
@@ -143,7 +274,9 @@ def _display_current_requirements():
     with col1:
         if st.button("Clear All Requirements"):
             if st.session_state.requirements:
+                prefetch_service.stop_prefetch()
                 st.session_state.requirements = []
+                st.session_state.generated_fingerprints = {}
                 st.experimental_rerun()
     
     with col2:
@@ -5,7 +5,8 @@ This module handles the UI for executing tests and displaying results.
 
 import streamlit as st
 import pandas as pd
-from services import ssh_service, report_service
+from config import settings
+from services import fleet_service, ssh_service, ssh_pool_service, report_service
 from utils import helpers
 
 def display_results_section(ssh_config, operation_mode):
@@ -56,6 +57,11 @@ def _display_test_case_execution(ssh_config, operation_mode):
         st.info("Switch to 'Generate and Execute Tests' mode in the sidebar to execute test cases.")
         return
     
+    # Fleet mode runs the whole suite on every host of the inventory
+    if "inventory" in ssh_config:
+        _display_fleet_execution(ssh_config["inventory"])
+        return
+    
     # Check SSH configuration
     if not _validate_ssh_config(ssh_config):
         st.error("Please provide complete SSH connection details in the sidebar before executing tests.")
@@ -63,6 +69,7 @@ def _display_test_case_execution(ssh_config, operation_mode):
         
     st.markdown("### Execute Individual Test Cases")
     st.markdown("Review the generated Python code for each test case and execute them individually:")
+    _display_connection_status(ssh_config)
     
     # Group test cases by requirement
     test_cases_by_req = {}
@@ -152,12 +159,14 @@ def _display_test_case_execution(ssh_config, operation_mode):
     
     # Add button to execute all test cases
     st.markdown("### Execute All Test Cases")
+    execution_mode = _select_execution_mode("execution_mode_select")
     if st.button("Execute All Test Cases", key="execute_all_test_cases_tab1"):
         with st.spinner("Executing all test cases on remote system..."):
             # Execute test cases
             results = ssh_service.execute_test_cases(
                 st.session_state.test_cases,
-                ssh_config
+                ssh_config,
+                mode=execution_mode
             )
             
             # Store results in session state
@@ -174,6 +183,112 @@ def _display_test_case_execution(ssh_config, operation_mode):
             else:
                 st.error("Test execution failed. Please check the logs.")
 
+def _display_fleet_execution(host_configs):
+    """
+    Display the execution of all test cases on every host of the inventory.
+    
+    Args:
+        host_configs (list): SSH configurations of the inventory hosts
+    """
+    if not host_configs:
+        st.error("Please provide an inventory with at least one host in the sidebar before executing tests.")
+        return
+    
+    groups = list(dict.fromkeys(config["group"] for config in host_configs))
+    missing = [config["name"] for config in host_configs if not config.get("username")]
+    
+    st.markdown("### Execute on Fleet")
+    st.markdown(
+        f"Run all {len(st.session_state.test_cases)} test cases on {len(host_configs)} hosts "
+        f"in {len(groups)} groups ({', '.join(groups)})."
+    )
+    if missing:
+        st.warning(f"{len(missing)} hosts have no username and will be skipped: {', '.join(missing[:10])}")
+    
+    execution_mode = _select_execution_mode("fleet_execution_mode_select")
+    if st.button("Execute on All Hosts", key="execute_fleet"):
+        with st.spinner(f"Executing test cases on {len(host_configs)} hosts..."):
+            fleet_results = fleet_service.execute_fleet(
+                st.session_state.test_cases,
+                host_configs,
+                mode=execution_mode
+            )
+        
+        # Results are keyed by (host, test case index); the flat list feeds the reports
+        st.session_state.fleet_results = fleet_results
+        st.session_state.test_results = list(fleet_results.values())
+        
+        if fleet_results:
+            stats = helpers.calculate_test_statistics()
+            st.success(
+                f"Executed {stats['total']} test cases: "
+                f"{stats['passed']} passed, {stats['failed']} failed, "
+                f"{stats['not_run']} not run."
+            )
+    
+    if st.session_state.get("fleet_results"):
+        st.markdown("#### Results by Host")
+        st.dataframe(
+            fleet_service.summarize_hosts(st.session_state.fleet_results, host_configs),
+            use_container_width=True
+        )
+
+def _select_execution_mode(key):
+    """
+    Display the choice of how a suite is run over each connection.
+    
+    Args:
+        key (str): Widget key
+    
+    Returns:
+        str: 'parallel', 'bundle' or 'agent'
+    """
+    labels = {
+        "parallel": "Parallel channels (one upload and run per test case)",
+        "bundle": "Bundle (one upload and one remote runner for all test cases)",
+        "agent": "Agent (resident remote interpreter, no per-test startup)"
+    }
+    
+    return st.selectbox(
+        "Execution Mode",
+        settings.EXECUTION_MODES,
+        index=settings.EXECUTION_MODES.index(settings.DEFAULT_EXECUTION_MODE),
+        format_func=lambda mode: labels.get(mode, mode),
+        key=key,
+        help="Bundle mode needs the fewest round trips, which matters most on high-latency links"
+    )
+
+def _display_connection_status(ssh_config):
+    """
+    Display the state of the pooled SSH connection with an option to close it.
+    
+    Args:
+        ssh_config (dict): SSH connection configuration
+    """
+    if not settings.SSH_POOL_ENABLED:
+        return
+    
+    try:
+        pool = ssh_pool_service.get_pool()
+        status = pool.status(ssh_config)
+    except Exception:
+        return
+    
+    if not status["connected"]:
+        st.caption("A connection to the remote system is opened on the first execution and reused afterwards.")
+        return
+    
+    col1, col2 = st.columns([4, 1])
+    with col1:
+        st.caption(
+            f"Reusing the SSH connection to {ssh_config['hostname']} "
+            f"(open for {int(status['age'])}s, used {status['uses']} times)."
+        )
+    with col2:
+        if st.button("Disconnect", key="close_ssh_connection"):
+            pool.close(ssh_config)
+            st.experimental_rerun()
+
 def _display_results_tabs(tab_prefix=""):
     """
     Display test results in tabs for better organization.
@@ -223,10 +338,12 @@ def _display_previous_results():
     if "test_results" in st.session_state and st.session_state.test_results:
         st.markdown("### Previous Test Runs")
         
-        # Group results by test case
+        # Group results by test case (and host in fleet mode)
         test_case_results = {}
         for result in st.session_state.test_results:
             test_id = result.get("test_case_id", "Unknown")
+            if result.get("host"):
+                test_id = f"{result['host']} / {test_id}"
             if test_id not in test_case_results:
                 test_case_results[test_id] = []
             test_case_results[test_id].append(result)
@@ -363,6 +480,8 @@ def _display_summary_view():
             "Priority": priority,
             "Notes": result.get("notes", "")
         }
+        if result.get("host"):
+            row = {"Host": result["host"], **row}
         data.append(row)
     
     df = pd.DataFrame(data)
@@ -435,6 +554,8 @@ def _display_detailed_results():
             # Create expander title with status indicator
             test_id = result.get('test_case_id', 'Unknown')
             expander_title = f"{test_id}: {result.get('title', 'Untitled')} - Status: {status}"
+            if result.get("host"):
+                expander_title = f"{result['host']} / {expander_title}"
             
             with st.expander(expander_title):
                 # Test result details
@@ -3,11 +3,13 @@ UI components for test case generation and management.
 """
 
 import json
+import time
 import pandas as pd
 import streamlit as st
 import io
 import base64
-from services import ai_service
+from services import ai_service, cache_service, journal_service, prefetch_service, queue_service, retrieval_service
+from config import settings
 from utils import helpers
 
 def display_test_cases_section(openai_config):
@@ -33,34 +35,90 @@ def display_test_cases_section(openai_config):
         key="num_test_cases_slider"
     )
     
+    # Reuse previously generated test cases for unchanged requirements
+    use_cache = st.checkbox(
+        "Reuse cached test cases for unchanged requirements",
+        value=settings.CACHE_ENABLED,
+        key="use_cache_checkbox"
+    )
+    
+    # Reuse test cases generated for similar requirements in earlier runs
+    use_retrieval = st.checkbox(
+        "Reuse test cases of similar past requirements",
+        value=settings.RETRIEVAL_ENABLED,
+        key="use_retrieval_checkbox",
+        help=f"Requirements at least {settings.RETRIEVAL_SIMILARITY_THRESHOLD:.0%} similar to a past one are not sent to OpenAI"
+    )
+    
+    # Offline template library for common controls
+    template_mode = st.selectbox(
+        "Offline Templates",
+        settings.TEMPLATE_MODES,
+        index=settings.TEMPLATE_MODES.index(settings.DEFAULT_TEMPLATE_MODE),
+        key="template_mode_select",
+        format_func=lambda mode: {
+            "fallback": "Use when the API fails",
+            "prefer": "Use first for common controls",
+            "off": "Never use"
+        }[mode],
+        help="Generates test cases for common controls (file permissions, firewall, SSH options, services, "
+             "packages, time sync) locally without calling OpenAI"
+    )
+    
+    # Pack several short requirements into each API request
+    pack_requirements = st.checkbox(
+        "Pack short requirements into shared requests",
+        value=False,
+        key="pack_requirements_checkbox",
+        help=f"Sends up to {settings.PACK_MAX_REQUIREMENTS} short requirements per request"
+    )
+    
+    # Generate once per group of near-duplicate requirements
+    dedupe = st.checkbox(
+        "Generate once for near-duplicate requirements",
+        value=settings.DEDUP_ENABLED,
+        key="dedupe_requirements_checkbox",
+        help="Near-duplicates found at import share the test cases of the first requirement in their group"
+    )
+    
+    # Show test cases as soon as they arrive instead of after each request
+    stream = st.checkbox(
+        "Show test cases as they are generated",
+        value=settings.STREAMING_ENABLED,
+        key="stream_test_cases_checkbox"
+    )
+    
+    # Output format requested from the model
+    output_format = st.selectbox(
+        "Output Format",
+        settings.OUTPUT_FORMATS,
+        index=settings.OUTPUT_FORMATS.index(settings.DEFAULT_OUTPUT_FORMAT),
+        key="output_format_select",
+        help="Compact and structured formats use short keys and bounded lists to cut completion tokens"
+    )
+    
     # Update the OpenAI config with the selected number of test cases
     openai_config['num_test_cases'] = num_test_cases
+    openai_config['use_cache'] = use_cache
+    openai_config['use_retrieval'] = use_retrieval
+    openai_config['template_mode'] = template_mode
+    openai_config['pack_size'] = settings.PACK_MAX_REQUIREMENTS if pack_requirements else 1
+    openai_config['stream'] = stream
+    openai_config['dedupe'] = dedupe
+    openai_config['output_format'] = output_format
     
     # Generate test cases button
     col1, col2 = st.columns([1, 2])
     
     with col1:
         if st.button("Generate Test Cases", key="generate_test_cases"):
-            if not openai_config.get("api_key"):
-                st.error("OpenAI API key is required to generate test cases.")
-            else:
-                with st.spinner("Generating test cases... This might take a moment."):
-                    try:
-                        # Call generate_test_cases method with the number of test cases
-                        test_cases = ai_service.generate_test_cases(
-                            st.session_state.requirements, 
-                            openai_config
-                        )
-                        
-                        # Store in session state
-                        st.session_state.test_cases = test_cases
-                        
-                        if test_cases:
-                            st.success(f"Generated {len(test_cases)} test cases!")
-                        else:
-                            st.error("No test cases were generated. Please check the requirements or AI service configuration.")
-                    except Exception as e:
-                        st.error(f"Error generating test cases: {str(e)}")
+            _run_generation(openai_config)
+        
+        # Offer to regenerate only added or modified requirements
+        stale = helpers.get_stale_requirements()
+        if st.session_state.get("test_cases") and 0 < len(stale) < len(st.session_state.requirements):
+            if st.button(f"Generate Changed Requirements ({len(stale)})", key="generate_changed_test_cases"):
+                _run_generation(openai_config, requirements=stale)
     
     with col2:
         st.info(
@@ -68,11 +126,261 @@ def display_test_cases_section(openai_config):
             f"using OpenAI's {openai_config.get('model', 'gpt-4')} model. "
             "You can adjust the number of test cases using the slider."
         )
+        
+        # Other sessions using the same API key share the generation capacity
+        if openai_config.get("api_key"):
+            queue_status = queue_service.get_queue(openai_config["api_key"]).status()
+            if queue_status["active"]:
+                st.caption(
+                    f"Shared generation queue: {queue_status['active']}/{queue_status['capacity']} slots in use "
+                    f"by {queue_status['sessions']} sessions, {queue_status['waiting_total']} requests waiting"
+                )
+    
+    # Offer to resume an interrupted run
+    _display_resumable_run(openai_config)
+    
+    if use_cache:
+        _display_cache_stats()
+    
+    if use_retrieval:
+        _display_retrieval_stats()
+    
+    # Show where the time and tokens of the last run went
+    _display_generation_telemetry()
     
     # Display test cases if they exist
     if "test_cases" in st.session_state and st.session_state.test_cases:
         _display_test_cases_tabs()
 
+def _run_generation(openai_config, resume_run_id=None, requirements=None):
+    """
+    Generate test cases and store them in session state.
+    
+    Args:
+        openai_config (dict): OpenAI API configuration
+        resume_run_id (str, optional): ID of an interrupted run to resume
+        requirements (list, optional): Subset of requirements to (re)generate.
+            Test cases of the other requirements are kept. Defaults to all.
+    """
+    if not openai_config.get("api_key"):
+        st.error("OpenAI API key is required to generate test cases.")
+        return
+    
+    # Keep the existing test cases of requirements that are not regenerated
+    if requirements is None:
+        requirements = st.session_state.requirements
+        kept = []
+        st.session_state.generated_fingerprints = {}
+    else:
+        regenerated = {req.get("requirement_id") for req in requirements}
+        kept = [tc for tc in st.session_state.get("test_cases", [])
+                if tc.get("requirement_id") not in regenerated]
+    
+    # Let background generation finish its requests so their results are cached
+    prefetch_job = prefetch_service.get_prefetch_job()
+    if prefetch_job is not None and prefetch_job.running:
+        with st.spinner("Finishing background generation..."):
+            prefetch_service.stop_prefetch(wait=True)
+    
+    # Streamed test cases are appended to what is kept while generation runs
+    st.session_state.test_cases = list(kept)
+    
+    with st.spinner("Generating test cases... This might take a moment."):
+        try:
+            # Call generate_test_cases method with the number of test cases
+            test_cases = ai_service.generate_test_cases(
+                requirements, 
+                dict(openai_config, resume_run_id=resume_run_id)
+            )
+            
+            # Store in session state
+            st.session_state.test_cases = _merge_test_cases(kept, test_cases)
+            _update_generated_fingerprints(requirements, test_cases)
+            
+            if test_cases:
+                st.success(f"Generated {len(test_cases)} test cases!")
+            else:
+                st.error("No test cases were generated. Please check the requirements or AI service configuration.")
+        except Exception as e:
+            st.error(f"Error generating test cases: {str(e)}")
+
+def _merge_test_cases(kept, generated):
+    """
+    Merge kept and newly generated test cases in requirement order.
+    
+    Args:
+        kept (list): Existing test cases to keep
+        generated (list): Newly generated test cases
+    
+    Returns:
+        list: All test cases ordered by the current requirements
+    """
+    by_requirement = {}
+    for tc in kept + generated:
+        by_requirement.setdefault(tc.get("requirement_id"), []).append(tc)
+    
+    merged = []
+    for req in st.session_state.requirements:
+        merged.extend(by_requirement.pop(req.get("requirement_id"), []))
+    
+    # Test cases whose requirement is not in the list go last
+    for test_cases in by_requirement.values():
+        merged.extend(test_cases)
+    
+    return merged
+
+def _update_generated_fingerprints(requirements, test_cases):
+    """
+    Remember which requirement descriptions test cases were generated for.
+    
+    Args:
+        requirements (list): Requirements that were generated
+        test_cases (list): Test cases that were generated
+    """
+    generated_ids = {tc.get("requirement_id") for tc in test_cases}
+    fingerprints = st.session_state.setdefault("generated_fingerprints", {})
+    
+    for req in requirements:
+        req_id = req.get("requirement_id")
+        if req_id in generated_ids:
+            fingerprints[req_id] = helpers.requirement_fingerprint(req)
+        else:
+            fingerprints.pop(req_id, None)
+
+def _display_resumable_run(openai_config):
+    """
+    Offer to resume the most recent interrupted generation run.
+    
+    Args:
+        openai_config (dict): OpenAI API configuration
+    """
+    try:
+        run = journal_service.find_resumable_run(
+            openai_config.get("model"),
+            openai_config.get("num_test_cases"),
+            journal_service.owner_id(openai_config.get("api_key"))
+        )
+    except Exception:
+        return
+    
+    if not run:
+        return
+    
+    started = time.strftime("%Y-%m-%d %H:%M", time.localtime(run.get("created_at", 0)))
+    st.warning(
+        f"Generation run {run['run_id']} (started {started}) was interrupted after "
+        f"{len(run['completed'])} of {run.get('total', '?')} requirements."
+    )
+    
+    if st.button("Resume Generation", key="resume_generation"):
+        _run_generation(openai_config, resume_run_id=run["run_id"])
+
+def _display_cache_stats():
+    """
+    Display statistics for the generated test case cache.
+    """
+    try:
+        cache = cache_service.get_cache()
+        stats = cache.stats()
+    except Exception as e:
+        st.warning(f"Test case cache unavailable: {str(e)}")
+        return
+    
+    with st.expander("Test Case Cache"):
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Cached Requirements", stats["entries"])
+        col2.metric("Hits", stats["hits"])
+        col3.metric("Misses", stats["misses"])
+        col4.metric("Hit Rate", f"{stats['hit_rate']:.1f}%")
+        
+        if st.button("Clear Cache", key="clear_test_case_cache"):
+            cache.clear()
+            st.success("Test case cache cleared")
+
+def _display_retrieval_stats():
+    """
+    Display statistics for the index of past test cases.
+    """
+    try:
+        past_index = retrieval_service.get_index()
+        stats = past_index.stats()
+    except Exception as e:
+        st.warning(f"Past test case index unavailable: {str(e)}")
+        return
+    
+    with st.expander("Past Test Case Index"):
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Indexed Requirements", stats["entries"])
+        col2.metric("Reused", stats["hits"])
+        col3.metric("Misses", stats["misses"])
+        col4.metric("Hit Rate", f"{stats['hit_rate']:.1f}%")
+        
+        if st.button("Clear Index", key="clear_past_test_case_index"):
+            past_index.clear()
+            st.success("Past test case index cleared")
+
+def _display_generation_telemetry():
+    """
+    Display throughput, token usage and the slowest requirements of the last
+    generation run.
+    """
+    telemetry = st.session_state.get("generation_telemetry")
+    if telemetry is None or not telemetry.records():
+        return
+    
+    summary = telemetry.summary()
+    
+    with st.expander("Generation Telemetry"):
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Requirements/s", f"{summary['throughput']:.2f}")
+        col2.metric("Mean Latency", f"{summary['mean_latency']:.1f}s")
+        col3.metric("p95 Latency", f"{summary['p95_latency']:.1f}s")
+        col4.metric("Mean Queue Wait", f"{summary['mean_queue_wait']:.1f}s")
+        
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Prompt Tokens", summary["prompt_tokens"])
+        col2.metric(
+            "Cached Prompt Tokens",
+            summary["cached_tokens"],
+            f"{summary['prompt_cache_rate']:.0f}% of prompt",
+            delta_color="off"
+        )
+        col3.metric("Completion Tokens", summary["completion_tokens"])
+        col4.metric("Retries", summary["retries"])
+        
+        st.caption(
+            f"{summary['model']}: {summary['requirements']} requirements in {summary['elapsed']:.1f}s "
+            f"({summary['generated']} generated, {summary['cached']} from cache, "
+            f"{summary['resumed']} resumed, {summary['retrieved']} reused from similar past requirements, "
+            f"{summary['templated']} from offline templates, {summary['deduplicated']} shared with near-duplicates, "
+            f"{summary['failed']} failed, "
+            f"{summary['parse_failures']} parse failures, {summary['requests']} API requests)"
+        )
+        
+        if summary["retrieved"] and summary["estimated_time_saved"]:
+            st.caption(
+                f"Reusing past test cases saved about {summary['estimated_time_saved']:.1f}s of generation time"
+            )
+        
+        if summary["slowest"]:
+            st.markdown("**Slowest Requirements**")
+            st.dataframe(
+                pd.DataFrame(summary["slowest"])[[
+                    "requirement_id", "latency", "queue_wait", "retries",
+                    "prompt_tokens", "completion_tokens", "cached_tokens", "pack_size"
+                ]],
+                hide_index=True,
+                use_container_width=True
+            )
+        
+        st.download_button(
+            label="Download Telemetry (JSONL)",
+            data="\n".join(json.dumps(record) for record in telemetry.records()),
+            file_name="generation_telemetry.jsonl",
+            mime="application/x-ndjson",
+            key="download_generation_telemetry"
+        )
+
 def _display_test_cases_tabs():
     """
     Display test cases in tabs for better organization.
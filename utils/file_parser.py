@@ -8,6 +8,8 @@ import json
 import time
 import pandas as pd
 import streamlit as st
+from config import settings
+from utils import helpers, similarity
 
 def parse_uploaded_file(uploaded_file):
     """
@@ -48,6 +50,78 @@ def parse_uploaded_file(uploaded_file):
         st.error(f"Error parsing file: {str(e)}")
         return []
 
+def diff_requirements(previous_fingerprints, requirements):
+    """
+    Compare requirements against the set test cases were last generated for.
+    
+    Requirements are matched by requirement ID, and a changed description
+    fingerprint marks a requirement as modified.
+    
+    Args:
+        previous_fingerprints (dict): Requirement ID -> description fingerprint
+                                      of the previously generated requirements
+        requirements (list): Newly loaded requirements
+    
+    Returns:
+        dict: Lists of requirement IDs under 'added', 'modified', 'unchanged'
+              and 'removed'
+    """
+    changes = {"added": [], "modified": [], "unchanged": [], "removed": []}
+    seen = set()
+    
+    for req in requirements:
+        req_id = req.get("requirement_id")
+        seen.add(req_id)
+        
+        if req_id not in previous_fingerprints:
+            changes["added"].append(req_id)
+        elif previous_fingerprints[req_id] != helpers.requirement_fingerprint(req):
+            changes["modified"].append(req_id)
+        else:
+            changes["unchanged"].append(req_id)
+    
+    # Requirements that are no longer present
+    changes["removed"] = [req_id for req_id in previous_fingerprints if req_id not in seen]
+    
+    return changes
+
+def mark_near_duplicates(requirements, threshold=settings.DEDUP_SIMILARITY_THRESHOLD):
+    """
+    Mark requirements that are near-duplicates of an earlier requirement.
+    
+    Catalogues often repeat the same control in slightly different words.
+    Every requirement in a group of near-duplicates except the first gets a
+    'duplicate_of' key holding the first one's requirement ID, so test cases
+    only need to be generated once per group. Marks from a previous import
+    are cleared.
+    
+    Args:
+        requirements (list): Requirements to mark (modified in place)
+        threshold (float, optional): Jaccard similarity considered a near-duplicate
+    
+    Returns:
+        int: Number of requirements marked as duplicates
+    """
+    for req in requirements:
+        req.pop("duplicate_of", None)
+    
+    groups = similarity.find_near_duplicates(
+        [str(req.get("description", "")) for req in requirements],
+        threshold
+    )
+    
+    marked = 0
+    for group in groups:
+        representative_id = requirements[group[0]].get("requirement_id")
+        for index in group[1:]:
+            # Identical IDs would make the group ambiguous
+            if requirements[index].get("requirement_id") == representative_id:
+                continue
+            requirements[index]["duplicate_of"] = representative_id
+            marked += 1
+    
+    return marked
+
 def extract_requirements_from_text(text):
     """
     Extract requirements from a text string.
@@ -122,6 +196,112 @@ def extract_requirements_from_text(text):
         
     return requirements
     
+def parse_inventory(text):
+    """
+    Parse a host inventory in INI format.
+    
+    Hosts are listed one per line under [group] sections, optionally with a
+    :port suffix and key=value variables (hostname, port, username; the
+    ansible_host, ansible_port and ansible_user spellings are accepted too).
+    A [group:vars] section sets variables for every host of the group.
+    Numeric ranges such as web[01:20].example.com expand to one host each.
+    Hosts listed before any section belong to the 'ungrouped' group.
+    
+    Args:
+        text (str): Inventory text
+    
+    Returns:
+        list: Hosts as dictionaries with name, hostname, port, username and group
+    """
+    hosts = []
+    group_vars = {}
+    seen = set()
+    group, is_vars = "ungrouped", False
+    
+    for line_number, line in enumerate(text.splitlines(), 1):
+        line = line.split("#", 1)[0].strip()
+        if not line or line.startswith(";"):
+            continue
+        
+        section = re.fullmatch(r"\[([^\]:]+)(:vars)?\]", line)
+        if section:
+            group, is_vars = section.group(1).strip(), bool(section.group(2))
+            continue
+        
+        if is_vars:
+            key, _, value = line.partition("=")
+            group_vars.setdefault(group, {})[_inventory_key(key)] = value.strip()
+            continue
+        
+        tokens = line.split()
+        host_vars = {}
+        for token in tokens[1:]:
+            key, separator, value = token.partition("=")
+            if not separator:
+                st.warning(f"Inventory line {line_number}: ignoring '{token}', expected key=value")
+                continue
+            host_vars[_inventory_key(key)] = value
+        
+        for name in _expand_host_range(tokens[0]):
+            address, _, port = name.rpartition(":") if name.count(":") == 1 else (name, "", "")
+            if name in seen:
+                st.warning(f"Inventory line {line_number}: host {name} is listed twice, keeping the first entry")
+                continue
+            seen.add(name)
+            
+            host = {"name": name, "hostname": address, "port": port or None, "username": None, "group": group}
+            host.update({key: value for key, value in host_vars.items() if key in host})
+            hosts.append(host)
+    
+    # Group variables fill in what the host lines leave unset
+    for host in hosts:
+        for key, value in group_vars.get(host["group"], {}).items():
+            if key in ("hostname", "port", "username") and not host.get(key):
+                host[key] = value
+        host["port"] = host["port"] or settings.DEFAULT_PORT
+    
+    return hosts
+
+def _inventory_key(key):
+    """
+    Normalize an inventory variable name.
+    
+    Args:
+        key (str): Variable name as written
+    
+    Returns:
+        str: hostname, port, username or the lower-case name
+    """
+    key = key.strip().lower()
+    aliases = {
+        "ansible_host": "hostname", "host": "hostname",
+        "ansible_port": "port",
+        "ansible_user": "username", "user": "username"
+    }
+    return aliases.get(key, key)
+
+def _expand_host_range(pattern):
+    """
+    Expand a numeric range in a host pattern.
+    
+    Args:
+        pattern (str): Host pattern, e.g. web[01:03].example.com
+    
+    Returns:
+        list: Host names (zero padding of the range start is kept)
+    """
+    match = re.search(r"\[(\d+):(\d+)\]", pattern)
+    if not match:
+        return [pattern]
+    
+    start, end = match.group(1), match.group(2)
+    width = len(start) if start.startswith("0") else 0
+    
+    return [
+        pattern[:match.start()] + str(number).zfill(width) + pattern[match.end():]
+        for number in range(int(start), int(end) + 1)
+    ]
+
 def _parse_json_file(uploaded_file):
     """
     Parse a JSON file to extract requirements.
@@ -5,7 +5,9 @@ session state management, data conversion, and download links.
 """
 
 import json
+import uuid
 import base64
+import hashlib
 import datetime
 import streamlit as st
 from cryptography.fernet import Fernet
@@ -27,6 +29,13 @@ def init_session_state():
     if 'test_results' not in st.session_state:
         st.session_state.test_results = []
     
+    # Description fingerprints of the requirements test cases were generated for
+    if 'generated_fingerprints' not in st.session_state:
+        st.session_state.generated_fingerprints = {}
+    
+    # Identifies this session in process-wide queues
+    get_session_id()
+    
     # Encryption for sensitive data
     if 'encryption_key' not in st.session_state:
         # Generate a key for encrypting sensitive information
@@ -36,6 +45,18 @@ def init_session_state():
     # Current year for copyright notice
     st.session_state.current_year = datetime.datetime.now().year
 
+def get_session_id():
+    """
+    Get the random identifier of the current session.
+    
+    Returns:
+        str: Session identifier, created on first use
+    """
+    if 'session_id' not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+    
+    return st.session_state.session_id
+
 def encrypt_data(data):
     """
     Encrypt sensitive data using Fernet symmetric encryption.
@@ -86,6 +107,22 @@ def convert_to_json(data):
     """
     return json.dumps(data, indent=2)
 
+def requirement_fingerprint(requirement):
+    """
+    Compute a fingerprint of a requirement's description.
+    
+    Two requirements with the same fingerprint produce the same test cases,
+    so this is used to detect unchanged requirements.
+    
+    Args:
+        requirement (dict): Requirement dictionary
+    
+    Returns:
+        str: Hex digest of the normalized description
+    """
+    description = " ".join(str(requirement.get("description", "") or "").split())
+    return hashlib.sha256(description.encode("utf-8")).hexdigest()
+
 def create_download_link(data, filename, link_text="Download", mime="text/csv"):
     """
     Create a download link for data.
@@ -187,6 +224,21 @@ def get_test_cases_for_requirement(req_id):
     return [tc for tc in st.session_state.test_cases 
             if tc.get('requirement_id') == req_id]
 
+def get_stale_requirements():
+    """
+    Get the requirements whose test cases are missing or out of date.
+    
+    A requirement is stale if test cases were never generated for it or its
+    description has changed since they were generated.
+    
+    Returns:
+        list: Stale requirements, in requirement order
+    """
+    fingerprints = st.session_state.get('generated_fingerprints', {})
+    
+    return [req for req in st.session_state.get('requirements', [])
+            if fingerprints.get(req.get('requirement_id')) != requirement_fingerprint(req)]
+
 def get_test_results_for_test_case(test_case_id):
     """
     Get test results for a specific test case.
@@ -0,0 +1,271 @@
+"""
+Incremental JSON parsing utilities.
+This module extracts complete objects from JSON arrays while the JSON text is
+still arriving, so streamed model responses can be used before they finish.
+"""
+
+import json
+
+class IncrementalJSONArrayParser:
+    """
+    Incremental parser that yields the objects inside JSON arrays as soon as
+    each object is complete.
+
+    The parser accepts arbitrary text chunks (for example streamed completion
+    deltas). Every JSON object that is a direct element of an array is decoded
+    and returned together with the key of that array in its parent object, or
+    None for a top-level array. For the response
+    ``{"test_cases": [{...}, {...}]}`` each test case is returned as
+    ``("test_cases", {...})`` once its closing brace has been received.
+    """
+
+    def __init__(self):
+        """Initialize an empty parser."""
+        # Open containers ('{' or '[') and, for arrays, their key in the parent
+        self._stack = []
+        self._array_keys = []
+
+        # String scanning state
+        self._in_string = False
+        self._escape = False
+        self._string_chars = []
+        self._last_string = None
+
+        # Object currently being captured
+        self._capture_depth = None
+        self._capture_key = None
+        self._capture_chars = []
+
+        self.objects_parsed = 0
+
+    def feed(self, text):
+        """
+        Feed the next chunk of JSON text to the parser.
+
+        Args:
+            text (str): Next chunk of text
+
+        Returns:
+            list: (array_key, object) tuples completed by this chunk
+        """
+        completed = []
+
+        for char in text or "":
+            capturing = self._capture_depth is not None
+            if capturing:
+                self._capture_chars.append(char)
+
+            # Inside a string only quotes and escapes matter
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if not capturing:
+                        self._last_string = self._decode_string("".join(self._string_chars))
+                if not capturing and self._in_string:
+                    self._string_chars.append(char)
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_chars = []
+
+            elif char == "{":
+                # Start capturing objects that are direct elements of an array
+                if not capturing and self._stack and self._stack[-1] == "[":
+                    self._capture_depth = len(self._stack)
+                    self._capture_key = self._array_keys[-1]
+                    self._capture_chars = [char]
+                self._stack.append("{")
+
+            elif char == "[":
+                # Remember which key this array belongs to
+                key = self._last_string if self._stack and self._stack[-1] == "{" else None
+                self._stack.append("[")
+                self._array_keys.append(key)
+
+            elif char in "}]":
+                if not self._stack:
+                    continue
+
+                opener = self._stack.pop()
+                if opener == "[":
+                    self._array_keys.pop()
+
+                # Object complete, decode it
+                if char == "}" and capturing and len(self._stack) == self._capture_depth:
+                    obj = self._decode_object("".join(self._capture_chars))
+                    if obj is not None:
+                        completed.append((self._capture_key, obj))
+                        self.objects_parsed += 1
+                    self._capture_depth = None
+                    self._capture_key = None
+                    self._capture_chars = []
+
+        return completed
+
+    @staticmethod
+    def _decode_string(raw):
+        """
+        Decode the raw contents of a JSON string.
+
+        Args:
+            raw (str): Characters between the quotes
+
+        Returns:
+            str: Decoded string, or the raw text if it cannot be decoded
+        """
+        try:
+            return json.loads(f'"{raw}"')
+        except json.JSONDecodeError:
+            return raw
+
+    @staticmethod
+    def _decode_object(text):
+        """
+        Decode a complete JSON object.
+
+        Args:
+            text (str): JSON text of the object
+
+        Returns:
+            dict: Decoded object, or None if it is not valid JSON
+        """
+        try:
+            obj = json.loads(text)
+        except json.JSONDecodeError:
+            return None
+
+        return obj if isinstance(obj, dict) else None
+
+def repair_json(text):
+    """
+    Decode JSON from a model response, repairing common damage.
+
+    Markdown code fences and prose around the JSON are ignored and trailing
+    commas are removed. A truncated response is cut back to the last complete
+    object inside an array and its open brackets are closed, so every complete
+    object is kept and only the incomplete one is lost.
+
+    Args:
+        text (str): Response text
+
+    Returns:
+        Decoded JSON value
+
+    Raises:
+        json.JSONDecodeError: If no usable JSON could be recovered
+    """
+    text = text or ""
+
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError as e:
+        error = e
+
+    # Skip anything before the JSON itself, such as a code fence or prose
+    starts = [index for index in (text.find("{"), text.find("[")) if index >= 0]
+    if not starts:
+        raise error
+
+    text = _remove_trailing_commas(text[min(starts):])
+    decoder = json.JSONDecoder()
+
+    try:
+        # raw_decode ignores whatever follows the JSON value
+        return decoder.raw_decode(text)[0]
+    except json.JSONDecodeError:
+        pass
+
+    closed = _close_truncated(text)
+    if closed is not None:
+        try:
+            return decoder.raw_decode(closed)[0]
+        except json.JSONDecodeError:
+            pass
+
+    raise error
+
+def _remove_trailing_commas(text):
+    """
+    Remove commas directly before a closing bracket, outside of strings.
+
+    Args:
+        text (str): JSON text
+
+    Returns:
+        str: JSON text without trailing commas
+    """
+    result = []
+    in_string = False
+    escape = False
+
+    for index, char in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == ",":
+            following = index + 1
+            while following < len(text) and text[following].isspace():
+                following += 1
+            if following < len(text) and text[following] in "}]":
+                continue
+
+        result.append(char)
+
+    return "".join(result)
+
+def _close_truncated(text):
+    """
+    Cut truncated JSON back to its last complete array element object and
+    close the brackets that are still open at that point.
+
+    Args:
+        text (str): Truncated JSON text
+
+    Returns:
+        str: Closed JSON text, or None if no array element object is complete
+    """
+    stack = []
+    in_string = False
+    escape = False
+    cut = None
+
+    for index, char in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == '"':
+                in_string = False
+            continue
+
+        if char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append(char)
+        elif char in "}]":
+            if not stack:
+                break
+            stack.pop()
+
+            # A complete object inside an array is a safe place to cut
+            if char == "}" and stack and stack[-1] == "[":
+                cut = (index + 1, list(stack))
+
+    if cut is None:
+        return None
+
+    position, open_brackets = cut
+    closers = "".join("]" if bracket == "[" else "}" for bracket in reversed(open_brackets))
+    return text[:position] + closers
@@ -0,0 +1,297 @@
+"""
+Near-duplicate text detection.
+This module finds requirements that say the same thing in slightly different
+words, using word shingles, MinHash signatures and locality-sensitive hashing
+so that large catalogues can be clustered without comparing every pair.
+"""
+
+import re
+import numpy as np
+from config import settings
+
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+
+# Signatures are computed for this many texts at a time to bound memory use
+_SIGNATURE_BATCH = 1000
+
+# Tokens containing digits (file modes, ports, retention periods, ...)
+_NUMERIC_TOKEN = re.compile(r"\w*\d\w*")
+
+# Words that flip the meaning of a requirement, by the polarity they express;
+# matched against the words of a text joined by single spaces
+_POLARITY_WORDS = {
+    "not": re.compile(r"\b(?:not|no|never|none|nor|without|cannot|\w+n t)\b"),
+    "enabled": re.compile(r"\benabl(?:e|ed|es|ing)\b"),
+    "disabled": re.compile(r"\bdisabl(?:e|ed|es|ing)\b"),
+    "allowed": re.compile(r"\ballow(?:s|ed|ing)?\b"),
+    "denied": re.compile(r"\b(?:den(?:y|ies|ied|ying)|disallow(?:s|ed|ing)?)\b"),
+    "permitted": re.compile(r"\bpermit(?:s|ted|ting)?\b"),
+    "forbidden": re.compile(r"\b(?:forbid(?:s|den|ding)?|prohibit(?:s|ed|ing)?)\b"),
+    "readable": re.compile(r"\b(?:readable|read only)\b"),
+    "writable": re.compile(r"\b(?:writeable|writable)\b"),
+}
+
+def words(text):
+    """
+    Split text into lower-case words.
+
+    Args:
+        text (str): Text to split
+
+    Returns:
+        list: Words in order of appearance
+    """
+    return re.findall(r"\w+", (text or "").lower())
+
+def numeric_tokens(text):
+    """
+    Get the tokens of a text that contain digits.
+
+    Texts that differ in these (file modes, ports, retention periods, ...)
+    usually mean different things even when worded alike.
+
+    Args:
+        text (str): Text to scan
+
+    Returns:
+        frozenset: Lower-case tokens containing digits
+    """
+    return frozenset(_NUMERIC_TOKEN.findall((text or "").lower()))
+
+def polarity_tokens(text):
+    """
+    Get the polarity of a text: negations and words like enabled/disabled.
+
+    Texts that differ in these ('root login is enabled' and 'root login is
+    disabled') mean opposite things even when worded alike.
+
+    Args:
+        text (str): Text to scan
+
+    Returns:
+        frozenset: Polarities found, such as 'not', 'enabled' or 'denied'
+    """
+    normalized = " ".join(words(text))
+    return frozenset(polarity for polarity, pattern in _POLARITY_WORDS.items() if pattern.search(normalized))
+
+def shingles(text, size=settings.DEDUP_SHINGLE_SIZE):
+    """
+    Split text into overlapping word shingles.
+
+    Args:
+        text (str): Text to split
+        size (int, optional): Number of words per shingle
+
+    Returns:
+        set: Shingles (a single shingle for texts shorter than size)
+    """
+    tokens = words(text)
+    if len(tokens) <= size:
+        return {" ".join(tokens)} if tokens else set()
+
+    return {" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+def jaccard(a, b):
+    """
+    Jaccard similarity of two sets.
+
+    Args:
+        a (set): First set
+        b (set): Second set
+
+    Returns:
+        float: Similarity between 0 and 1
+    """
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+class MinHashLSH:
+    """
+    MinHash signatures indexed by locality-sensitive hashing.
+
+    Signatures are split into bands; texts sharing any band are candidate
+    near-duplicates. The number of bands is chosen so that pairs around the
+    similarity threshold are likely to become candidates.
+    """
+
+    def __init__(self, threshold=settings.DEDUP_SIMILARITY_THRESHOLD, num_perm=settings.DEDUP_NUM_PERM, seed=1):
+        """
+        Initialize an empty index.
+
+        Args:
+            threshold (float): Jaccard similarity considered a near-duplicate
+            num_perm (int): Number of hash permutations per signature
+            seed (int): Seed of the permutations
+        """
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands, self.rows = _choose_bands(threshold, num_perm)
+
+        # Multiply-shift hash functions (a odd), one per permutation
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(0, 2 ** 63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._b = rng.randint(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+        self._band_weights = rng.randint(0, 2 ** 63, size=self.rows, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._buckets = [{} for _ in range(self.bands)]
+
+    def signatures(self, shingle_sets):
+        """
+        Compute the MinHash signatures of several sets of shingles.
+
+        Shingle hashes only need to be consistent within one process, so the
+        built-in string hash is used.
+
+        Args:
+            shingle_sets (list): Sets of shingles
+
+        Returns:
+            numpy.ndarray: One row of num_perm values per set
+        """
+        result = np.full((len(shingle_sets), self.num_perm), _MAX_HASH, dtype=np.uint64)
+
+        for start in range(0, len(shingle_sets), _SIGNATURE_BATCH):
+            batch = [
+                (row, shingle_set)
+                for row, shingle_set in enumerate(shingle_sets[start:start + _SIGNATURE_BATCH], start)
+                if shingle_set
+            ]
+            if not batch:
+                continue
+
+            hashes = np.fromiter(
+                (hash(shingle) & 0xFFFFFFFF for _, shingle_set in batch for shingle in shingle_set),
+                dtype=np.uint64
+            )
+            offsets = np.cumsum([0] + [len(shingle_set) for _, shingle_set in batch[:-1]])
+
+            # One row per permutation, arithmetic wraps around modulo 2**64
+            with np.errstate(over="ignore"):
+                permuted = (np.outer(self._a, hashes) + self._b[:, None]) >> np.uint64(32)
+            minimums = np.minimum.reduceat(permuted, offsets, axis=1)
+            result[[row for row, _ in batch]] = minimums.T
+
+        return result
+
+    def band_keys(self, signatures):
+        """
+        Reduce signatures to one bucket key per band.
+
+        Args:
+            signatures (numpy.ndarray): Signatures from signatures()
+
+        Returns:
+            list: One list of band keys per signature
+        """
+        bands = signatures[:, :self.bands * self.rows].reshape(len(signatures), self.bands, self.rows)
+        with np.errstate(over="ignore"):
+            return (bands * self._band_weights).sum(axis=2, dtype=np.uint64).tolist()
+
+    def insert(self, key, band_keys):
+        """
+        Add a text to the index.
+
+        Args:
+            key: Identifier of the text
+            band_keys (list): Band keys of its signature, from band_keys()
+
+        Returns:
+            set: Keys already in the index that share a band with it
+        """
+        candidates = set()
+
+        for buckets, band_key in zip(self._buckets, band_keys):
+            bucket = buckets.get(band_key)
+
+            # Most buckets hold a single key, which is stored without a list
+            if bucket is None:
+                buckets[band_key] = key
+            elif isinstance(bucket, list):
+                candidates.update(bucket)
+                bucket.append(key)
+            else:
+                candidates.add(bucket)
+                buckets[band_key] = [bucket, key]
+
+        return candidates
+
+def find_near_duplicates(texts, threshold=settings.DEDUP_SIMILARITY_THRESHOLD):
+    """
+    Group texts that are near-duplicates of each other.
+
+    Texts with the same words are grouped by hash first, so only distinct
+    texts go through the LSH index. Candidate pairs come from the index and
+    are confirmed with their exact shingle Jaccard similarity. Texts whose
+    numbers differ (for example file modes 0640 and 0600) or whose polarity
+    differs (enabled and disabled, allow and deny, a negation) are never
+    grouped. Groups are formed transitively.
+
+    Args:
+        texts (list): Texts to compare
+        threshold (float, optional): Jaccard similarity considered a near-duplicate
+
+    Returns:
+        list: Groups of two or more text indices, each sorted, in order of
+              their first index
+    """
+    parent = list(range(len(texts)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    # Exact duplicates join the first text with the same words
+    first_by_words = {}
+    distinct = []
+    for i, text in enumerate(texts):
+        normalized = " ".join(words(text))
+        if not normalized:
+            continue
+        if normalized in first_by_words:
+            parent[i] = first_by_words[normalized]
+        else:
+            first_by_words[normalized] = i
+            distinct.append(i)
+
+    index = MinHashLSH(threshold)
+    shingle_sets = {i: shingles(texts[i]) for i in distinct}
+    numbers = {i: numeric_tokens(texts[i]) for i in distinct}
+    polarities = {i: polarity_tokens(texts[i]) for i in distinct}
+    band_keys = index.band_keys(index.signatures([shingle_sets[i] for i in distinct]))
+
+    for i, keys in zip(distinct, band_keys):
+        for j in index.insert(i, keys):
+            if find(i) == find(j) or numbers[i] != numbers[j] or polarities[i] != polarities[j]:
+                continue
+
+            if jaccard(shingle_sets[i], shingle_sets[j]) >= threshold:
+                # Always keep the earliest text as the root of its group
+                root_i, root_j = find(i), find(j)
+                parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    groups = {}
+    for i in range(len(texts)):
+        groups.setdefault(find(i), []).append(i)
+
+    return [members for root, members in sorted(groups.items()) if len(members) > 1]
+
+def _choose_bands(threshold, num_perm):
+    """
+    Choose the LSH band layout for a similarity threshold.
+
+    The S-curve of b bands of r rows rises at about (1/b) ** (1/r); the
+    layout is picked so that point sits a little below the threshold, which
+    favours finding near-duplicates over skipping candidate checks.
+
+    Args:
+        threshold (float): Jaccard similarity considered a near-duplicate
+        num_perm (int): Number of hash permutations
+
+    Returns:
+        tuple: (bands, rows)
+    """
+    target = threshold * 0.9
+    layouts = [(num_perm // rows, rows) for rows in range(1, num_perm + 1) if num_perm % rows == 0]
+    return min(layouts, key=lambda layout: abs((1 / layout[0]) ** (1 / layout[1]) - target))